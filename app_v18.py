@@ -19,17 +19,28 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageFilter
 import json
+import pickle
 import time
 import random
 import io
 import os
+import bisect
+import hashlib
+import shutil
+import subprocess
+import tempfile
 from datetime import datetime
 from pathlib import Path
 import pandas as pd
+import progress_analytics
 from streamlit_webrtc import webrtc_streamer, WebRtcMode, RTCConfiguration
 import av
 import threading
+import atexit
 from typing import Union
+from collections import namedtuple
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 
 # ==================== 페이지 설정 ====================
 st.set_page_config(page_title="춤마루 (Choomaru)", page_icon="💃", layout="wide")
@@ -48,6 +59,7 @@ INSTRUCTORS_FILE = DATA_DIR / "instructors.json"
 STUDENTS_FILE = DATA_DIR / "students.json"
 GROUPS_FILE = DATA_DIR / "groups.json"
 PROGRESS_FILE = DATA_DIR / "progress.json"
+ORG_STATS_FILE = DATA_DIR / "org_stats.json"
 
 # 데이터 디렉토리 생성
 DATA_DIR.mkdir(exist_ok=True)
@@ -56,20 +68,327 @@ DATA_DIR.mkdir(exist_ok=True)
 EXPERT_VIDEOS_DIR = Path("expert_videos")
 EXPERT_VIDEOS_DIR.mkdir(exist_ok=True)
 
+# 동시 저장 묶음 처리(group commit) 대기 시간 (초)
+# 이 시간 안에 같은 파일로 들어온 저장 요청은 한 번의 쓰기 + fsync로 합쳐짐
+GROUP_COMMIT_WINDOW = 0.005
+
+@st.cache_resource
+def _get_storage_state():
+    """서버 프로세스 전역 저장소 상태 (스크립트 재실행/세션 간 공유)"""
+    return {
+        'guard': threading.Lock(),  # 아래 두 dict 보호용
+        'file_locks': {},           # 파일 경로 -> threading.Lock (파일 단위 잠금)
+        'pending_updates': {},      # 파일 경로 -> 대기 중인 변경 요청 목록
+        'mutator_context': threading.local(),  # 스레드별 mutator 실행 상태 (재적용 중 여부)
+    }
+
+_storage_state = _get_storage_state()
+_storage_guard = _storage_state['guard']
+_file_locks = _storage_state['file_locks']
+_pending_updates = _storage_state['pending_updates']
+_mutator_context = _storage_state['mutator_context']
+
+def _get_file_lock(file_path):
+    """파일별 잠금 객체 반환 (없으면 생성)"""
+    key = str(file_path)
+    with _storage_guard:
+        if key not in _file_locks:
+            _file_locks[key] = threading.Lock()
+        return _file_locks[key]
+
 def load_json(file_path):
     """JSON 파일 로드"""
     if file_path.exists():
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        except:
+        except Exception as e:
+            print(f"JSON 로드 실패 ({file_path}): {e}")
             return {}
     return {}
 
+def _load_json_for_update(file_path):
+    """update_json용 로드 - 파일이 손상됐으면 예외 (빈 dict에 변경을 적용해 기존 레코드를 덮어쓰지 않도록)"""
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON 파일이 손상되어 저장을 중단합니다 ({file_path}): {e}") from e
+
+def _write_json_atomic(file_path, data):
+    """임시 파일에 쓰고 fsync 후 rename - 중간에 죽어도 기존 파일은 온전히 남음"""
+    file_path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def save_json(file_path, data):
-    """JSON 파일 저장"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """JSON 파일 저장 (전체 덮어쓰기, 원자적)"""
+    with _get_file_lock(file_path):
+        _write_json_atomic(file_path, data)
+
+def is_replaying_mutator():
+    """현재 스레드가 되돌린 묶음에 이미 성공한 mutator를 다시 적용하는 중인지
+    (mutator 밖에 남기는 부수 효과는 처음 실행 때 이미 반영됐으므로 다시 반영하지 않을 것)"""
+    return getattr(_mutator_context, 'replaying', False)
+
+def _replay_mutators(items, data):
+    _mutator_context.replaying = True
+    try:
+        for item in items:
+            item['result'] = item['mutator'](data)
+    finally:
+        _mutator_context.replaying = False
+
+def update_json(file_path, mutator):
+    """
+    JSON 파일 읽기-수정-쓰기를 잠금 안에서 수행
+
+    mutator(data)는 로드된 dict를 직접 수정하고, 반환값은 호출자에게 그대로 전달됨.
+    GROUP_COMMIT_WINDOW 안에 같은 파일로 들어온 요청은 먼저 온 요청(리더)이
+    한 번에 모아 적용한 뒤 한 번만 기록함 (동시 세션의 변경 유실 방지 + fsync 횟수 감소)
+    예외를 낸 mutator의 변경은 기록되지 않고, 파일이 손상됐으면 아무것도 쓰지 않고 예외를 전달함
+    (묶음 시작 상태를 한 번만 직렬화해 두고, 실패하면 그 상태로 되돌린 뒤 앞서 성공한 mutator를 다시 적용
+     - 다시 적용하는 동안은 is_replaying_mutator()가 True)
+    """
+    key = str(file_path)
+    request = {'mutator': mutator, 'done': threading.Event(), 'result': None, 'error': None}
+
+    with _storage_guard:
+        queue = _pending_updates.setdefault(key, [])
+        queue.append(request)
+        is_leader = len(queue) == 1
+
+    if is_leader:
+        time.sleep(GROUP_COMMIT_WINDOW)
+        with _get_file_lock(file_path):
+            with _storage_guard:
+                batch = _pending_updates.pop(key)
+            try:
+                data = _load_json_for_update(file_path)
+                # 요청이 하나뿐이면 사본 없이 적용 (실패하면 아예 쓰지 않음)
+                snapshot = pickle.dumps(data, pickle.HIGHEST_PROTOCOL) if len(batch) > 1 else None
+                applied = []
+                for item in batch:
+                    try:
+                        item['result'] = item['mutator'](data)
+                    except Exception as e:
+                        item['error'] = e
+                        if snapshot is not None:
+                            # 실패한 mutator의 부분 수정 제거: 묶음 시작 상태로 되돌리고 성공한 것만 다시 적용
+                            data = pickle.loads(snapshot)
+                            _replay_mutators(applied, data)
+                        continue
+                    applied.append(item)
+                if applied:
+                    _write_json_atomic(file_path, data)
+            except Exception as e:
+                for item in batch:
+                    item['error'] = item['error'] or e
+            finally:
+                for item in batch:
+                    item['done'].set()
+    else:
+        request['done'].wait()
+
+    if request['error'] is not None:
+        raise request['error']
+    return request['result']
+
+def save_record(file_path, record_id, record_data):
+    """레코드 하나 추가/수정"""
+    def _put(data):
+        data[record_id] = record_data
+    update_json(file_path, _put)
+
+def delete_records(file_path, record_ids):
+    """레코드 여러 개 삭제 (한 번의 쓰기), 삭제된 레코드 목록 반환"""
+    def _delete(data):
+        return [data.pop(record_id) for record_id in record_ids if record_id in data]
+    return update_json(file_path, _delete)
+
+# ==================== ID 생성 ====================
+# ULID/snowflake 방식: 타임스탬프(ms, 48bit) + 프로세스 식별자(30bit) + 카운터(20bit)
+# Crockford Base32 고정 길이(20자)라 문자열 정렬 = 생성 시간 순서, 중앙 조정 없이 충돌 없음
+_ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ID_TIME_CHARS = 10     # 50bit (48bit 타임스탬프 수용)
+_ID_NODE_CHARS = 6      # 30bit = 프로세스 ID 20bit + 난수 10bit
+_ID_COUNTER_CHARS = 4   # 20bit = 같은 ms 안에서 최대 1,048,576개
+_ID_COUNTER_MAX = 32 ** _ID_COUNTER_CHARS - 1
+@st.cache_resource
+def _get_id_state():
+    """서버 프로세스 전역 ID 생성 상태 (스크립트 재실행/세션 간 공유)"""
+    return {
+        'lock': threading.Lock(),
+        'node': ((os.getpid() & 0xFFFFF) << 10) | random.getrandbits(10),
+        'last_ms': 0,
+        'counter': 0,
+    }
+
+_id_state = _get_id_state()
+_id_lock = _id_state['lock']
+_ID_NODE = _id_state['node']
+
+def _encode_base32(value, length):
+    """정수를 고정 길이 Crockford Base32 문자열로 변환"""
+    chars = []
+    for _ in range(length):
+        chars.append(_ID_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def generate_id(prefix):
+    """시간순 정렬 가능한 고유 ID 생성 (예: feedback_01JB8Z4K6M0F3A9X0000)"""
+    with _id_lock:
+        now_ms = int(time.time() * 1000)
+        if now_ms > _id_state['last_ms']:
+            _id_state['last_ms'] = now_ms
+            _id_state['counter'] = 0
+        else:
+            # 같은 ms 또는 시계가 뒤로 간 경우: 마지막 시간을 유지하고 카운터 증가
+            _id_state['counter'] += 1
+            if _id_state['counter'] > _ID_COUNTER_MAX:
+                _id_state['last_ms'] += 1
+                _id_state['counter'] = 0
+        timestamp_ms = _id_state['last_ms']
+        counter = _id_state['counter']
+
+    return (f"{prefix}_"
+            f"{_encode_base32(timestamp_ms, _ID_TIME_CHARS)}"
+            f"{_encode_base32(_ID_NODE, _ID_NODE_CHARS)}"
+            f"{_encode_base32(counter, _ID_COUNTER_CHARS)}")
+
+def id_timestamp_ms(record_id):
+    """ID에서 생성 시각(ms) 추출 - 기존 '{prefix}_{초}' 형식도 지원, 해석 불가 시 None"""
+    suffix = str(record_id).rsplit('_', 1)[-1]
+    if suffix.isdigit():
+        return int(suffix) * 1000
+    if len(suffix) == _ID_TIME_CHARS + _ID_NODE_CHARS + _ID_COUNTER_CHARS:
+        value = 0
+        for ch in suffix[:_ID_TIME_CHARS]:
+            index = _ID_ALPHABET.find(ch)
+            if index < 0:
+                return None
+            value = value * 32 + index
+        return value
+    return None
+
+def id_sort_key(record_id):
+    """ID 기준 시간순 정렬 키 (created_at 없이 정렬/범위 검색용)"""
+    return (id_timestamp_ms(record_id) or 0, str(record_id))
+
+# ==================== 정렬 인덱스 / 페이지 조회 ====================
+# 파일별로 (created_at, id) 정렬 인덱스를 만들어 두고 파일이 바뀔 때만 재구성
+# 페이지 조회는 bisect로 cursor 위치를 찾아 page_size개만 잘라오므로 렌더링 비용이 카탈로그 크기와 무관
+@st.cache_resource
+def _get_sorted_index_cache():
+    """파일 경로 -> {'version', 'data', 'groups': {group_field: 그룹별 정렬 키}} - 프로세스 전역 캐시
+
+    데이터는 파일당 한 벌만 두고 group_field별로는 정렬 키만 보관
+    """
+    return {}
+
+_sorted_index_cache = _get_sorted_index_cache()
+
+def _group_value(record, group_field):
+    """그룹 필드 값 (필드가 tuple이면 값도 tuple)"""
+    if group_field is None:
+        return None
+    if isinstance(group_field, tuple):
+        return tuple(record.get(field) for field in group_field)
+    return record.get(group_field)
+
+def get_sorted_index(file_path, group_field=None):
+    """
+    group_field 값별 (created_at, id) 오름차순 인덱스와 데이터 반환
+    반환된 데이터 dict는 캐시와 공유되므로 수정하지 말 것
+    """
+    try:
+        stat = os.stat(file_path)
+        # 저장은 항상 새 파일로 교체(os.replace)하므로 inode가 바뀜
+        # (mtime 해상도가 낮은 파일시스템에서 같은 크기로 연달아 쓴 경우도 구분)
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return {}, {}
+
+    cached = _sorted_index_cache.get(str(file_path))
+    if not cached or cached['version'] != version:
+        cached = {'version': version, 'data': load_json(Path(file_path)), 'groups': {}}
+        _sorted_index_cache[str(file_path)] = cached
+
+    groups = cached['groups'].get(group_field)
+    if groups is None:
+        groups = {}
+        for record_id, record in cached['data'].items():
+            key = (record.get('created_at', ''), record_id)
+            groups.setdefault(_group_value(record, group_field), []).append(key)
+        for keys in groups.values():
+            keys.sort()
+        cached['groups'][group_field] = groups
+    return groups, cached['data']
+
+def encode_page_cursor(sort_key):
+    """정렬 키 (created_at, id) -> cursor 문자열"""
+    return f"{sort_key[0]}|{sort_key[1]}"
+
+def decode_page_cursor(cursor):
+    """cursor 문자열 -> 정렬 키 (created_at, id)"""
+    created_at, _, record_id = cursor.partition('|')
+    return (created_at, record_id)
+
+def query_records_page(file_path, group_field=None, group_value=None, cursor=None, page_size=9):
+    """
+    최신순 페이지 조회
+    반환: (레코드 목록, 다음 페이지 cursor 또는 None, 조건에 맞는 전체 개수)
+    """
+    groups, data = get_sorted_index(file_path, group_field)
+    if group_field is None:
+        group_value = None
+    keys = groups.get(group_value, [])
+
+    end = bisect.bisect_left(keys, decode_page_cursor(cursor)) if cursor else len(keys)
+    start = max(0, end - page_size)
+    page = [data[record_id] for _, record_id in reversed(keys[start:end])]
+    next_cursor = encode_page_cursor(keys[start]) if start > 0 else None
+    return page, next_cursor, len(keys)
+
+def search_records_page(file_path, group_field, group_value, query, fields, cursor=None, page_size=9):
+    """
+    최신순 검색 페이지 조회 (fields 중 하나라도 query를 포함하는 레코드, 대소문자 무시)
+    최신 레코드부터 page_size개(+다음 페이지 확인용 1개)를 채울 때까지만 훑음
+    반환: (레코드 목록, 다음 페이지 cursor 또는 None)
+    """
+    groups, data = get_sorted_index(file_path, group_field)
+    if group_field is None:
+        group_value = None
+    keys = groups.get(group_value, [])
+    query = query.lower()
+
+    end = bisect.bisect_left(keys, decode_page_cursor(cursor)) if cursor else len(keys)
+    page = []
+    for index in range(end - 1, -1, -1):
+        record = data[keys[index][1]]
+        if any(query in str(record.get(field) or '').lower() for field in fields):
+            if len(page) == page_size:
+                return page, encode_page_cursor(keys[index + 1])
+            page.append(record)
+    return page, None
+
+def count_records(file_path, group_field, group_value):
+    """그룹별 레코드 수 (인덱스 기준 O(1))"""
+    groups, _ = get_sorted_index(file_path, group_field)
+    return len(groups.get(group_value, []))
 
 def get_experts():
     """전문가 데이터 로드"""
@@ -77,9 +396,7 @@ def get_experts():
 
 def save_expert(expert_id, expert_data):
     """전문가 데이터 저장"""
-    experts = get_experts()
-    experts[expert_id] = expert_data
-    save_json(EXPERTS_FILE, experts)
+    save_record(EXPERTS_FILE, expert_id, expert_data)
 
 def get_videos():
     """영상 데이터 로드"""
@@ -87,9 +404,7 @@ def get_videos():
 
 def save_video(video_id, video_data):
     """영상 데이터 저장"""
-    videos = get_videos()
-    videos[video_id] = video_data
-    save_json(VIDEOS_FILE, videos)
+    save_record(VIDEOS_FILE, video_id, video_data)
 
 def get_feedback():
     """피드백 데이터 로드"""
@@ -97,9 +412,7 @@ def get_feedback():
 
 def save_feedback(feedback_id, feedback_data):
     """피드백 데이터 저장"""
-    feedbacks = get_feedback()
-    feedbacks[feedback_id] = feedback_data
-    save_json(FEEDBACK_FILE, feedbacks)
+    save_record(FEEDBACK_FILE, feedback_id, feedback_data)
 
 def calculate_reputation_score(expert_id):
     """전문가 평판 점수 계산"""
@@ -139,9 +452,7 @@ def get_organizations():
 
 def save_organization(org_id, org_data):
     """단체 데이터 저장"""
-    orgs = get_organizations()
-    orgs[org_id] = org_data
-    save_json(ORGANIZATIONS_FILE, orgs)
+    save_record(ORGANIZATIONS_FILE, org_id, org_data)
 
 def get_subscriptions():
     """구독 데이터 로드"""
@@ -149,29 +460,54 @@ def get_subscriptions():
 
 def save_subscription(sub_id, sub_data):
     """구독 데이터 저장"""
-    subs = get_subscriptions()
-    subs[sub_id] = sub_data
-    save_json(SUBSCRIPTIONS_FILE, subs)
+    save_record(SUBSCRIPTIONS_FILE, sub_id, sub_data)
 
 def get_instructors():
     """강사 데이터 로드"""
     return load_json(INSTRUCTORS_FILE)
 
 def save_instructor(instructor_id, instructor_data):
-    """강사 데이터 저장"""
-    instructors = get_instructors()
-    instructors[instructor_id] = instructor_data
-    save_json(INSTRUCTORS_FILE, instructors)
+    """강사 데이터 저장 (단체 통계도 함께 갱신)"""
+    def _put(data):
+        previous = data.get(instructor_id)
+        data[instructor_id] = instructor_data
+        _apply_org_stats_change(instructor_data.get('org_id'),
+                                lambda stats: _stats_on_instructor_saved(stats, previous, instructor_data))
+    update_json_with_org_stats(INSTRUCTORS_FILE, _put)
+
+def delete_instructors(instructor_ids):
+    """강사 여러 명 삭제 (한 번의 쓰기, 단체 통계도 함께 갱신), 삭제된 레코드 목록 반환"""
+    def _delete(data):
+        deleted = [data.pop(i) for i in instructor_ids if i in data]
+        for instructor in deleted:
+            _apply_org_stats_change(instructor.get('org_id'),
+                                    lambda stats, instructor=instructor: _stats_on_instructor_deleted(stats, instructor))
+        return deleted
+    return update_json_with_org_stats(INSTRUCTORS_FILE, _delete)
 
 def get_students():
     """학생 데이터 로드"""
     return load_json(STUDENTS_FILE)
 
 def save_student(student_id, student_data):
-    """학생 데이터 저장"""
-    students = get_students()
-    students[student_id] = student_data
-    save_json(STUDENTS_FILE, students)
+    """학생 데이터 저장 (단체 통계도 함께 갱신)"""
+    def _put(data):
+        previous = data.get(student_id)
+        data[student_id] = student_data
+        _apply_org_stats_change(student_data.get('org_id'),
+                                lambda stats: _stats_on_student_saved(stats, previous, student_data))
+    update_json_with_org_stats(STUDENTS_FILE, _put)
+
+def delete_students(student_ids):
+    """학생 여러 명 삭제 (한 번의 쓰기, 단체 통계도 함께 갱신), 삭제된 레코드 목록 반환"""
+    def _delete(data):
+        deleted = [data.pop(i) for i in student_ids if i in data]
+        for org_id in {s.get('org_id') for s in deleted}:
+            org_deleted = [s for s in deleted if s.get('org_id') == org_id]
+            _apply_org_stats_change(org_id,
+                                    lambda stats, org_deleted=org_deleted: _stats_on_students_deleted(stats, org_deleted, data))
+        return deleted
+    return update_json_with_org_stats(STUDENTS_FILE, _delete)
 
 def get_groups():
     """그룹 데이터 로드"""
@@ -179,19 +515,568 @@ def get_groups():
 
 def save_group(group_id, group_data):
     """그룹 데이터 저장"""
-    groups = get_groups()
-    groups[group_id] = group_data
-    save_json(GROUPS_FILE, groups)
+    save_record(GROUPS_FILE, group_id, group_data)
 
 def get_progress():
     """진행 상황 데이터 로드"""
     return load_json(PROGRESS_FILE)
 
 def save_progress(progress_id, progress_data):
-    """진행 상황 데이터 저장"""
-    progress = get_progress()
-    progress[progress_id] = progress_data
-    save_json(PROGRESS_FILE, progress)
+    """진행 상황 데이터 저장 (단체 통계도 함께 갱신)"""
+    def _put(data):
+        previous = data.get(progress_id)
+        data[progress_id] = progress_data
+        _apply_org_stats_change(progress_data.get('org_id'),
+                                lambda stats: _stats_on_progress_saved(stats, previous, progress_data))
+    update_json_with_org_stats(PROGRESS_FILE, _put)
+
+# ==================== 연습 진행 기록 (버퍼링 후 일괄 저장) ====================
+# 연습 시도/점수는 세션별 버퍼에 모았다가 주기적으로, 또는 세션 종료(유휴) 시 한 번에 기록
+# progress.json: (학생, 동작)별 집계 레코드 1개 / movement_log.jsonl: 시도별 원본 기록 (추가 전용)
+MOVEMENT_LOG_FILE = DATA_DIR / "movement_log.jsonl"
+PROGRESS_FLUSH_INTERVAL = 30           # 초
+PROGRESS_FLUSH_MAX_PENDING = 100       # 이만큼 쌓이면 즉시 저장
+PROGRESS_SESSION_IDLE_SECONDS = 600    # 이 시간 동안 활동이 없으면 세션 종료로 간주
+
+def progress_record_id(student_id, action_key):
+    """(학생, 동작) 집계 레코드 ID - 같은 조합은 항상 같은 ID"""
+    return "progress_" + hashlib.sha1(f"{student_id}|{action_key}".encode("utf-8")).hexdigest()[:16]
+
+def append_movement_log(attempts):
+    """시도 기록을 movement_log.jsonl에 추가 (한 번의 쓰기)"""
+    lines = "".join(json.dumps(a, ensure_ascii=False) + "\n" for a in attempts)
+    with _get_file_lock(MOVEMENT_LOG_FILE):
+        with open(MOVEMENT_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _merge_progress_attempts(data, attempts):
+    """시도 목록을 progress.json 집계 레코드에 반영 (update_json mutator) + 단체 통계 갱신"""
+    previous_records = {}   # 이번 flush에서 처음 건드린 레코드의 변경 전 값
+    for attempt in attempts:
+        progress_id = progress_record_id(attempt['student_id'], attempt['action_key'])
+        if progress_id not in previous_records:
+            previous_records[progress_id] = dict(data[progress_id]) if progress_id in data else None
+        record = data.get(progress_id) or {
+            'id': progress_id,
+            'org_id': attempt['org_id'],
+            'student_id': attempt['student_id'],
+            'action_key': attempt['action_key'],
+            'action_name': attempt['action_name'],
+            'attempts': 0,
+            'best_score': 0,
+            'completed': False,
+            'created_at': attempt['timestamp']
+        }
+        record['instructor_id'] = attempt.get('instructor_id')
+        record['attempts'] += 1
+        record['last_score'] = attempt['score']
+        record['best_score'] = max(record['best_score'], attempt['score'])
+        record['completed'] = record['completed'] or attempt['completed']
+        record['last_mode'] = attempt['mode']
+        record['updated_at'] = attempt['timestamp']
+        data[progress_id] = record
+
+    for org_id in {data[pid].get('org_id') for pid in previous_records}:
+        changes = [(previous, data[pid]) for pid, previous in previous_records.items()
+                   if data[pid].get('org_id') == org_id]
+        def _apply(stats, changes=changes):
+            for previous, record in changes:
+                _stats_on_progress_saved(stats, previous, record)
+        _apply_org_stats_change(org_id, _apply)
+
+def make_progress_attempt(student_id, org_id, action_key, action_name, score, completed,
+                          instructor_id=None, mode='single'):
+    """연습 시도 1건 (progress.json 집계 + movement_log.jsonl 원본 기록의 단위)"""
+    return {
+        'student_id': student_id,
+        'org_id': org_id,
+        'instructor_id': instructor_id,
+        'action_key': action_key,
+        'action_name': action_name,
+        'score': round(float(score), 1),
+        'completed': bool(completed),
+        'mode': mode,
+        'timestamp': datetime.now().isoformat()
+    }
+
+class ProgressRecorder:
+    """세션별 연습 시도 버퍼 - flush() 한 번에 progress.json 1회 쓰기 + 로그 1회 추가"""
+
+    def __init__(self, flush_interval=PROGRESS_FLUSH_INTERVAL, max_pending=PROGRESS_FLUSH_MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = []
+        self.unlogged = []      # progress.json에는 반영됐지만 로그 추가에 실패한 시도
+        self.last_flush = time.time()
+        self.last_activity = time.time()
+
+    def record_attempt(self, student_id, org_id, action_key, action_name, score, completed,
+                       instructor_id=None, mode='single'):
+        """연습 시도 1건 기록 (버퍼에만 추가)"""
+        attempt = make_progress_attempt(student_id, org_id, action_key, action_name, score, completed,
+                                        instructor_id=instructor_id, mode=mode)
+        with self.lock:
+            self.pending.append(attempt)
+            self.last_activity = time.time()
+            is_full = len(self.pending) >= self.max_pending
+        if is_full:
+            self.flush()
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending) + len(self.unlogged)
+
+    def maybe_flush(self):
+        """마지막 저장 후 flush_interval이 지났으면 저장"""
+        if self.pending_count() and time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write(self, attempts, unlogged=()):
+        """progress.json 1회 쓰기 후 로그 1회 추가 - progress.json 쓰기 실패만 예외로 전달
+
+        progress.json에 이미 반영된 시도를 버퍼에 되돌리면 시도/완료 수가 두 번 집계되므로
+        로그 추가 실패는 해당 시도를 unlogged에 남겨 다음 저장 때 로그만 다시 추가
+        """
+        if attempts:
+            update_json_with_org_stats(PROGRESS_FILE, lambda data: _merge_progress_attempts(data, attempts))
+        to_log = list(unlogged) + list(attempts)
+        if not to_log:
+            return
+        try:
+            append_movement_log(to_log)
+        except Exception as e:
+            print(f"연습 로그 추가 실패 (다음 저장 때 재시도): {e}")
+            with self.lock:
+                self.unlogged = to_log + self.unlogged
+
+    def flush(self):
+        """버퍼의 시도를 한 번에 저장, 반환: 저장한 시도 수 (progress.json 쓰기 실패 시 버퍼에 되돌리고 None)"""
+        with self.lock:
+            attempts, self.pending = self.pending, []
+            unlogged, self.unlogged = self.unlogged, []
+            self.last_flush = time.time()
+        if not attempts and not unlogged:
+            return 0
+        try:
+            self._write(attempts, unlogged)
+        except Exception as e:
+            print(f"진행 기록 저장 실패: {e}")
+            with self.lock:
+                self.pending = attempts + self.pending
+                self.unlogged = unlogged + self.unlogged
+            return None
+        return len(attempts)
+
+    def save_attempts(self, attempts):
+        """시도 목록을 버퍼를 거치지 않고 바로 저장, 반환: 성공 여부
+
+        실패하면 아무것도 반영되지 않으므로 호출한 쪽에서 그대로 다시 시도해도 중복 집계되지 않음
+        """
+        try:
+            self._write(attempts)
+        except Exception as e:
+            print(f"진행 기록 저장 실패: {e}")
+            return False
+        self.last_activity = time.time()
+        return True
+
+@st.cache_resource
+def _get_progress_recorder_registry():
+    """프로세스 전체 기록기 목록 + 백그라운드 저장 스레드 (세션이 끝나 재실행이 없어도 저장)"""
+    registry = {'lock': threading.Lock(), 'recorders': set()}
+
+    def flush_all(drop_idle=False):
+        with registry['lock']:
+            recorders = list(registry['recorders'])
+        for recorder in recorders:
+            idle = time.time() - recorder.last_activity > PROGRESS_SESSION_IDLE_SECONDS
+            if idle:
+                recorder.flush()
+            else:
+                recorder.maybe_flush()
+            if drop_idle and idle and not recorder.pending_count():
+                with registry['lock']:
+                    registry['recorders'].discard(recorder)
+
+    def flush_loop():
+        while True:
+            time.sleep(PROGRESS_FLUSH_INTERVAL)
+            try:
+                flush_all(drop_idle=True)
+            except Exception as e:
+                print(f"진행 기록 주기 저장 실패: {e}")
+
+    threading.Thread(target=flush_loop, daemon=True, name="progress-flush").start()
+    atexit.register(lambda: [r.flush() for r in list(registry['recorders'])])
+    return registry
+
+def get_progress_recorder():
+    """현재 세션의 진행 기록기 (처음 호출 시 생성)
+
+    유휴 상태로 프로세스 목록에서 빠진 기록기도 세션에는 남아 있으므로 호출할 때마다 다시 등록
+    """
+    if 'progress_recorder' not in st.session_state:
+        st.session_state.progress_recorder = ProgressRecorder()
+    recorder = st.session_state.progress_recorder
+    registry = _get_progress_recorder_registry()
+    with registry['lock']:
+        registry['recorders'].add(recorder)
+    return recorder
+
+def get_practice_student():
+    """현재 연습 중인 학생 레코드 (단체 계정에서 선택한 학생, 없으면 None)
+
+    정렬 인덱스 캐시의 데이터를 읽으므로 재실행마다 students.json을 다시 읽지 않음 (수정하지 말 것)
+    """
+    if not st.session_state.get('student_id'):
+        return None
+    _, students = get_sorted_index(STUDENTS_FILE, 'org_id')
+    student = students.get(st.session_state.student_id)
+    if student and student.get('org_id') == st.session_state.get('org_id'):
+        return student
+    return None
+
+def logout_org():
+    """단체 로그아웃 (로그아웃 버튼의 on_click - 위젯 상태인 student_id는 위젯이 그려지기 전에만 바꿀 수 있음)"""
+    get_progress_recorder().flush()
+    st.session_state.org_logged_in = False
+    st.session_state.org_id = None
+    st.session_state.user_role = None
+    st.session_state.student_id = None
+
+# ==================== 단체 통계 (미리 집계한 뷰) ====================
+# org_stats.json: 단체별 학생/강사 수, 진행 기록/완료 수, 동작별 집계, 최근 학생
+# 학생/강사/진행 기록을 쓰는 함수가 같은 잠금 안에서 증분 갱신 → 대시보드/통계 페이지는 O(1) 읽기
+# 항목이 없거나 버전이 다르면 원본 파일을 훑어 다시 만듦
+ORG_STATS_VERSION = 1
+ORG_STATS_RECENT_STUDENTS = 10
+
+def _progress_action_key(record):
+    """진행 기록의 동작 키 (action_key가 없는 예전 기록은 action_index/이름으로 대체)"""
+    if record.get('action_key'):
+        return record['action_key']
+    if record.get('action_index') is not None:
+        return f"basic:{record['action_index']}"
+    return record.get('action_name', '')
+
+def _recent_student_entry(student):
+    return {'id': student['id'], 'name': student.get('name', ''), 'instructor_id': student.get('instructor_id')}
+
+def _recent_students_from(students, org_id):
+    """단체 학생 중 최근 등록순 ORG_STATS_RECENT_STUDENTS명"""
+    org_students = [s for s in students.values() if s.get('org_id') == org_id]
+    org_students.sort(key=lambda s: s.get('created_at', ''), reverse=True)
+    return [_recent_student_entry(s) for s in org_students[:ORG_STATS_RECENT_STUDENTS]]
+
+def _build_org_stats(org_id):
+    """원본 파일을 훑어 단체 통계 새로 계산 (항목이 없을 때만 사용)"""
+    stats = {
+        'version': ORG_STATS_VERSION,
+        'student_count': 0,
+        'instructor_count': 0,
+        'instructor_names': {},
+        'progress_total': 0,
+        'completed': 0,
+        'actions': {},
+        'recent_students': []
+    }
+    students = get_students()
+    stats['student_count'] = sum(1 for s in students.values() if s.get('org_id') == org_id)
+    stats['recent_students'] = _recent_students_from(students, org_id)
+    for instructor in get_instructors().values():
+        if instructor.get('org_id') == org_id:
+            _stats_on_instructor_saved(stats, None, instructor)
+    for record in get_progress().values():
+        if record.get('org_id') == org_id:
+            _stats_on_progress_saved(stats, None, record)
+    return stats
+
+def _org_stats_entry(data, org_id):
+    """org_stats.json 데이터에서 단체 항목 반환 (없거나 예전 버전이면 다시 만듦)"""
+    entry = data.get(org_id)
+    if not entry or entry.get('version') != ORG_STATS_VERSION:
+        entry = data[org_id] = _build_org_stats(org_id)
+    return entry
+
+def get_org_stats(org_id):
+    """단체 통계 읽기"""
+    entry = load_json(ORG_STATS_FILE).get(org_id)
+    if entry and entry.get('version') == ORG_STATS_VERSION:
+        return entry
+    return update_json(ORG_STATS_FILE, lambda data: _org_stats_entry(data, org_id))
+
+def rebuild_org_stats(org_id=None):
+    """단체 통계를 원본 파일 기준으로 다시 계산 (org_id=None이면 전체 무효화, 다음 읽기 때 재계산)"""
+    def _rebuild(data):
+        if org_id is None:
+            data.clear()
+        else:
+            data[org_id] = _build_org_stats(org_id)
+    update_json(ORG_STATS_FILE, _rebuild)
+
+def invalidate_org_stats(org_ids):
+    """단체 통계 항목 삭제 - 다음 읽기 때 원본 파일 기준으로 다시 계산"""
+    def _invalidate(data):
+        for org_id in org_ids:
+            data.pop(org_id, None)
+    update_json(ORG_STATS_FILE, _invalidate)
+
+# update_json_with_org_stats가 실행 중인 mutator가 건드린 단체 (mutator를 실행하는 스레드 기준)
+_org_stats_context = threading.local()
+
+def update_json_with_org_stats(file_path, mutator):
+    """
+    단체 통계를 함께 갱신하는 원본 파일 쓰기 (mutator 안에서 _apply_org_stats_change 호출)
+
+    통계는 원본보다 먼저 기록되므로 원본 쓰기가 실패하면 건드린 단체 항목을 삭제하고,
+    증분 갱신에 실패한 단체 항목은 원본 쓰기가 끝난 뒤 삭제 → 어느 쪽이든 다음 읽기 때 다시 계산
+    (원본 쓰기 전에 삭제하면 그 사이 읽기가 변경 전 원본으로 다시 만들어 변경분이 빠질 수 있음)
+    """
+    touched, stale = set(), set()
+
+    def _run(data):
+        _org_stats_context.touched, _org_stats_context.stale = touched, stale
+        try:
+            return mutator(data)
+        finally:
+            _org_stats_context.touched = _org_stats_context.stale = None
+
+    try:
+        result = update_json(file_path, _run)
+    except Exception:
+        if touched:
+            invalidate_org_stats(touched)
+        raise
+    if stale:
+        invalidate_org_stats(stale)
+    return result
+
+def _apply_org_stats_change(org_id, apply):
+    """
+    단체 통계 증분 갱신 - update_json_with_org_stats mutator 안(원본 쓰기 전, 같은 잠금 안)에서 호출
+    재계산이 필요한 경우 원본 파일의 변경 전 내용을 읽으므로 변경분이 두 번 반영되지 않음
+    갱신에 실패하면 항목을 무효화 대상으로 표시 (원본 쓰기는 그대로 진행)
+    """
+    if not org_id:
+        return
+    touched = getattr(_org_stats_context, 'touched', None)
+    if touched is None:
+        raise RuntimeError("_apply_org_stats_change는 update_json_with_org_stats 안에서만 호출할 수 있습니다")
+    touched.add(org_id)
+    if is_replaying_mutator():
+        # 증분은 처음 실행 때 이미 반영됨 - 원본 쓰기 후 다시 계산하도록 표시만
+        _org_stats_context.stale.add(org_id)
+        return
+    try:
+        update_json(ORG_STATS_FILE, lambda data: apply(_org_stats_entry(data, org_id)))
+    except Exception as e:
+        print(f"단체 통계 갱신 실패 ({org_id}), 다음 읽기 때 다시 계산: {e}")
+        _org_stats_context.stale.add(org_id)
+
+def _stats_on_student_saved(stats, previous, student):
+    if previous is None:
+        stats['student_count'] += 1
+        stats['recent_students'].insert(0, _recent_student_entry(student))
+        del stats['recent_students'][ORG_STATS_RECENT_STUDENTS:]
+        return
+    for i, entry in enumerate(stats['recent_students']):
+        if entry['id'] == student['id']:
+            stats['recent_students'][i] = _recent_student_entry(student)
+
+def _stats_on_students_deleted(stats, deleted, students):
+    """students: 삭제가 반영된 학생 데이터 (최근 목록에서 빠진 자리를 채울 때만 사용)"""
+    stats['student_count'] = max(0, stats['student_count'] - len(deleted))
+    deleted_ids = {s['id'] for s in deleted}
+    if any(entry['id'] in deleted_ids for entry in stats['recent_students']):
+        org_id = deleted[0].get('org_id')
+        stats['recent_students'] = _recent_students_from(students, org_id)
+
+def _stats_on_instructor_saved(stats, previous, instructor):
+    if previous is None:
+        stats['instructor_count'] += 1
+    stats['instructor_names'][instructor['id']] = instructor.get('name', '')
+
+def _stats_on_instructor_deleted(stats, instructor):
+    stats['instructor_count'] = max(0, stats['instructor_count'] - 1)
+    stats['instructor_names'].pop(instructor['id'], None)
+    for entry in stats['recent_students']:
+        if entry['instructor_id'] == instructor['id']:
+            entry['instructor_id'] = None
+
+def _stats_on_progress_saved(stats, previous, record):
+    action_key = _progress_action_key(record)
+    action = stats['actions'].setdefault(action_key, {
+        'name': record.get('action_name', ''), 'records': 0, 'completed': 0, 'best_score': 0
+    })
+    if previous is None:
+        stats['progress_total'] += 1
+        action['records'] += 1
+    was_completed = bool(previous and previous.get('completed'))
+    is_completed = bool(record.get('completed'))
+    if is_completed != was_completed:
+        delta = 1 if is_completed else -1
+        stats['completed'] += delta
+        action['completed'] += delta
+    action['best_score'] = max(action['best_score'], record.get('best_score') or 0)
+
+# ==================== 단체 명단 일괄 등록 (CSV/XLSX) ====================
+# 파일 전체를 pandas로 한 번에 검증하고, 플랜 인원 제한은 묶음 단위로 한 번만 확인한 뒤
+# 학생/강사 파일에 한 번의 쓰기로 저장 (단체 통계도 같은 잠금 안에서 한 번에 갱신)
+ROSTER_COLUMNS = {
+    'student': {'required': ['name', 'email'], 'optional': ['instructor_email']},
+    'instructor': {'required': ['name', 'email'], 'optional': ['phone']},
+}
+ROSTER_COLUMN_ALIASES = {
+    '이름': 'name', '학생명': 'name', '강사명': 'name',
+    '이메일': 'email', 'e-mail': 'email',
+    '전화번호': 'phone', '연락처': 'phone',
+    '담당 강사 이메일': 'instructor_email', '강사 이메일': 'instructor_email',
+}
+ROSTER_EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+def read_roster_file(uploaded_file):
+    """업로드한 CSV/XLSX 명단을 문자열 DataFrame으로 읽기 (열 이름 정규화)"""
+    if uploaded_file.name.lower().endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(uploaded_file, dtype=str)
+    else:
+        df = pd.read_csv(uploaded_file, dtype=str, encoding='utf-8-sig')
+    columns = df.columns.str.strip().str.lower()
+    df.columns = [ROSTER_COLUMN_ALIASES.get(c, c) for c in columns]
+    return df
+
+def instructor_email_index(org_id):
+    """단체 강사 이메일(소문자) -> 강사 ID"""
+    return {i['email'].strip().lower(): i['id'] for i in get_instructors().values()
+            if i.get('org_id') == org_id and i.get('email')}
+
+def validate_roster(df, kind, existing_emails, instructor_index=None):
+    """
+    명단 검증 (행 단위 반복 없이 열 연산으로 처리)
+    반환: (등록할 행 DataFrame, 오류 행 DataFrame['row', 'name', 'email', 'error'])
+    """
+    spec = ROSTER_COLUMNS[kind]
+    missing_columns = [c for c in spec['required'] if c not in df.columns]
+    if missing_columns:
+        raise ValueError(f"필수 열이 없습니다: {', '.join(missing_columns)}")
+
+    df = df.reindex(columns=spec['required'] + spec['optional'])
+    df = df.astype(object).apply(lambda col: col.str.strip()).replace('', np.nan)
+    df['email'] = df['email'].str.lower()
+    df['row'] = df.index + 2  # 파일 기준 행 번호 (머리글 1행)
+
+    missing_required = df[spec['required']].isna().any(axis=1)
+    invalid_email = ~missing_required & ~df['email'].str.match(ROSTER_EMAIL_PATTERN, na=False)
+    duplicate_in_file = df['email'].notna() & df['email'].duplicated(keep='first')
+    already_registered = df['email'].isin(existing_emails)
+    conditions = [missing_required, invalid_email, duplicate_in_file, already_registered]
+    reasons = ["필수 항목 누락", "이메일 형식 오류", "파일 안에서 중복된 이메일", "이미 등록된 이메일"]
+
+    if kind == 'student':
+        instructor_index = instructor_index or {}
+        df['instructor_id'] = df['instructor_email'].str.lower().map(instructor_index)
+        conditions.append(df['instructor_email'].notna() & df['instructor_id'].isna())
+        reasons.append("등록되지 않은 강사 이메일")
+
+    error = pd.Series(np.select(conditions, reasons, default=''), index=df.index)
+    errors = df.loc[error != '', ['row', 'name', 'email']].assign(error=error[error != ''])
+    return df[error == ''].drop(columns='row'), errors
+
+def import_roster(kind, org_id, valid_rows, max_count):
+    """
+    검증된 명단을 한 번의 쓰기로 등록, 반환: 등록된 인원 수
+    쓰기 잠금 안에서 중복 이메일을 다시 거른 뒤 실제로 추가할 인원으로 제한 확인 (검증 후 다른 세션이 추가한 경우 대비)
+    """
+    file_path = STUDENTS_FILE if kind == 'student' else INSTRUCTORS_FILE
+    count_field = 'student_count' if kind == 'student' else 'instructor_count'
+    rows = valid_rows.astype(object).where(valid_rows.notna(), None).to_dict('records')
+
+    def _insert(data):
+        existing = {(r.get('email') or '').lower() for r in data.values() if r.get('org_id') == org_id}
+        new_rows = []
+        for row in rows:
+            if row['email'] in existing:
+                continue
+            existing.add(row['email'])
+            new_rows.append(row)
+        current_count = get_org_stats(org_id)[count_field]
+        if max_count > 0 and current_count + len(new_rows) > max_count:
+            raise ValueError(f"인원 제한 초과: 현재 {current_count}명 + 등록 {len(new_rows)}명 > 최대 {max_count}명")
+        now = datetime.now().isoformat()
+        added = []
+        for row in new_rows:
+            record_id = generate_id(kind)
+            record = {'id': record_id, 'org_id': org_id, 'name': row['name'], 'email': row['email']}
+            if kind == 'student':
+                record['instructor_id'] = row.get('instructor_id')
+            else:
+                record['phone'] = row.get('phone') or ''
+            record['created_at'] = now
+            data[record_id] = record
+            added.append(record)
+
+        on_saved = _stats_on_student_saved if kind == 'student' else _stats_on_instructor_saved
+        def _apply(stats):
+            for record in added:
+                on_saved(stats, None, record)
+        if added:
+            _apply_org_stats_change(org_id, _apply)
+        return len(added)
+
+    return update_json_with_org_stats(file_path, _insert)
+
+# ==================== 집계 함수 (대시보드/랭킹) ====================
+
+def compute_org_dashboard_stats(org_id):
+    """단체 대시보드 통계 (org_stats.json에서 읽기만 함, 학생/강사/진행 파일을 훑지 않음)"""
+    stats = get_org_stats(org_id)
+    progress_total = stats['progress_total']
+    instructor_names = stats['instructor_names']
+
+    recent_activity = [{
+        '학생명': s.get('name', ''),
+        '강사': instructor_names.get(s.get('instructor_id'), ''),
+        '상태': '활성'
+    } for s in stats['recent_students']]
+
+    return {
+        'instructor_count': stats['instructor_count'],
+        'student_count': stats['student_count'],
+        'progress_total': progress_total,
+        'completed': stats['completed'],
+        'completion_rate': (stats['completed'] / progress_total * 100) if progress_total > 0 else 0,
+        'actions': stats['actions'],
+        'recent_activity': recent_activity
+    }
+
+def compute_expert_rankings():
+    """전문가 랭킹 계산 (평판 점수 내림차순, 영상/좋아요/댓글 수 포함)"""
+    experts = get_experts()
+    expert_scores = []
+
+    for expert_id, expert_data in experts.items():
+        score = calculate_reputation_score(expert_id)
+        expert_scores.append({
+            'expert_id': expert_id,
+            'expert_data': expert_data,
+            'score': score
+        })
+
+    expert_scores.sort(key=lambda x: x['score'], reverse=True)
+
+    for item in expert_scores:
+        videos = get_videos()
+        expert_videos = [v for v in videos.values() if v.get('expert_id') == item['expert_id']]
+        feedbacks = get_feedback()
+        video_ids = [v['id'] for v in expert_videos]
+        expert_feedbacks = [f for f in feedbacks.values() if f.get('video_id') in video_ids]
+        item['video_count'] = len(expert_videos)
+        item['total_likes'] = sum(1 for f in expert_feedbacks if f.get('type') == 'like')
+        item['total_comments'] = sum(1 for f in expert_feedbacks if f.get('type') == 'comment')
+
+    return expert_scores
 
 # ==================== 구독 플랜 정의 ====================
 
@@ -458,6 +1343,7 @@ TRANSLATIONS = {
         'group_name': '그룹명',
         'group_management': '그룹 관리',
         'custom_actions': '커스텀 동작 설정',
+        'group_practice': '그룹 연습',
         'select_actions': '동작 선택',
         'dashboard': '대시보드',
         'statistics': '통계',
@@ -687,6 +1573,7 @@ TRANSLATIONS = {
         'group_name': 'Group Name',
         'group_management': 'Group Management',
         'custom_actions': 'Custom Actions Setup',
+        'group_practice': 'Group Practice',
         'select_actions': 'Select Actions',
         'dashboard': 'Dashboard',
         'statistics': 'Statistics',
@@ -2023,11 +2910,107 @@ def render_detail_videos(detail_videos, main_video_path):
                 else:
                     st.info(f"🎬 {'영상 준비 중' if lang == 'ko' else 'Coming soon'}")
 
+# ==================== 포즈 모델 등급 (lite/full/heavy) ====================
+# 가벼운 순서대로 등록 - models/ 에 있는 파일만 사용
+POSE_MODEL_TIERS = {
+    'lite': "pose_landmarker_lite.task",
+    'full': "pose_landmarker_full.task",
+    'heavy': "pose_landmarker_heavy.task",
+}
+DEFAULT_POSE_MODEL_TIER = 'lite'
+# 프레임당 포즈 감지 지연 예산 (ms, 환경 변수 POSE_MODEL_BUDGET_MS로 변경 가능)
+POSE_MODEL_LATENCY_BUDGET_MS = float(os.environ.get("POSE_MODEL_BUDGET_MS", "30"))
+
+def pose_model_file(tier):
+    """모델 등급 → .task 파일 경로"""
+    return os.path.join(os.path.dirname(__file__), "models", POSE_MODEL_TIERS[tier])
+
+def available_pose_model_tiers():
+    """models/ 에 파일이 있는 등급 목록 (가벼운 순)"""
+    return [tier for tier in POSE_MODEL_TIERS if os.path.exists(pose_model_file(tier))]
+
+def _calibration_sample_frame(library_dir="videos", width=640):
+    """캘리브레이션용 샘플 프레임 (videos/ 첫 영상의 중간 프레임, 가로 width로 축소)"""
+    for video_path in sorted(Path(library_dir).rglob("*.mp4")):
+        frame = capture_video_frame(str(video_path), 0.5)
+        if frame is not None:
+            if frame.width > width:
+                frame = frame.resize((width, int(frame.height * width / frame.width)))
+            return np.asarray(frame.convert("RGB")), str(video_path)
+    return np.zeros((480, width, 3), dtype=np.uint8), None
+
+def benchmark_pose_model(tier, frame, runs=5):
+    """등급별 포즈 감지 지연 측정 (IMAGE 모드, 워밍업 1회 후 중앙값 ms)"""
+    options = vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(model_asset_path=pose_model_file(tier)),
+        running_mode=vision.RunningMode.IMAGE
+    )
+    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(frame))
+    with vision.PoseLandmarker.create_from_options(options) as landmarker:
+        landmarker.detect(mp_image)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            landmarker.detect(mp_image)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+@st.cache_resource
+def calibrate_pose_models(latency_budget_ms=POSE_MODEL_LATENCY_BUDGET_MS):
+    """서버 프로세스당 1회: 사용 가능한 등급별 지연을 측정하고 예산 안의 가장 무거운 등급 선택
+
+    반환: {'tier', 'timings_ms': {등급: ms}, 'budget_ms', 'sample_video'}
+    """
+    frame, sample_video = _calibration_sample_frame()
+    timings = {}
+    for tier in available_pose_model_tiers():
+        try:
+            timings[tier] = round(benchmark_pose_model(tier, frame), 1)
+        except Exception as e:
+            print(f"포즈 모델 캘리브레이션 실패 ({tier}): {e}")
+
+    within_budget = [tier for tier, ms in timings.items() if ms <= latency_budget_ms]
+    if within_budget:
+        selected = within_budget[-1]
+    elif timings:
+        selected = min(timings, key=timings.get)   # 예산을 모두 넘으면 가장 빠른 등급
+    else:
+        selected = DEFAULT_POSE_MODEL_TIER
+    return {
+        'tier': selected,
+        'timings_ms': timings,
+        'budget_ms': latency_budget_ms,
+        'sample_video': sample_video
+    }
+
+def get_pose_model_path(tier=None):
+    """포즈 모델 경로 - tier 미지정 시 캘리브레이션으로 고른 등급 (파일이 없으면 lite)
+
+    WebRTC 프로세서 스레드에서는 페이지 코드에서 미리 구한 경로를 사용할 것
+    """
+    if tier is None:
+        tier = calibrate_pose_models()['tier']
+    if tier not in POSE_MODEL_TIERS or not os.path.exists(pose_model_file(tier)):
+        tier = DEFAULT_POSE_MODEL_TIER
+    return pose_model_file(tier)
+
+def get_offline_pose_model_tier():
+    """전문가 영상 사전 처리용 등급 (지연 제약이 없으므로 있는 것 중 가장 정확한 등급)
+
+    더 정확한 모델 파일을 추가하면 등급이 바뀌므로 파생 산출물 캐시 키에 포함할 것
+    """
+    tiers = available_pose_model_tiers()
+    return tiers[-1] if tiers else DEFAULT_POSE_MODEL_TIER
+
+def get_offline_pose_model_path():
+    """전문가 영상 사전 처리용 모델 경로"""
+    return pose_model_file(get_offline_pose_model_tier())
+
 # MediaPipe 초기화
 @st.cache_resource
 def init_mediapipe():
     """MediaPipe Pose Landmarker 초기화 (새 API)"""
-    model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
+    model_path = get_pose_model_path()
 
     # PoseLandmarker 옵션 설정
     base_options = python.BaseOptions(model_asset_path=model_path)
@@ -2320,6 +3303,49 @@ def generate_feedback(angle_diffs, user_angles, expert_angles):
 
     return feedback
 
+# ==================== 벡터화 관절 각도 (실시간 채점용) ====================
+# calculate_joint_angles와 같은 8개 관절을 (..., 33, 4) 배열 단위로 한 번에 계산
+# 각도는 이동/균일 스케일에 불변이므로 normalize_landmarks 없이 원 좌표로 계산해도 동일
+JOINT_ANGLE_NAMES = [
+    'left_elbow', 'right_elbow', 'left_knee', 'right_knee',
+    'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'
+]
+# (점1, 꼭짓점, 점3) 인덱스 - JOINT_ANGLE_NAMES 순서
+JOINT_ANGLE_TRIPLETS = np.array([
+    [11, 13, 15], [12, 14, 16], [23, 25, 27], [24, 26, 28],
+    [23, 11, 13], [24, 12, 14], [11, 23, 25], [12, 24, 26]
+])
+JOINT_MIN_VISIBILITY = 0.3
+
+def joint_angles_array(landmarks_array, min_visibility=JOINT_MIN_VISIBILITY):
+    """(..., 33, 4) 배열 → (..., 8) 관절 각도(도), visibility가 낮은 관절은 NaN"""
+    landmarks_array = np.asarray(landmarks_array, dtype=np.float32)
+    p1 = landmarks_array[..., JOINT_ANGLE_TRIPLETS[:, 0], :]
+    p2 = landmarks_array[..., JOINT_ANGLE_TRIPLETS[:, 1], :]
+    p3 = landmarks_array[..., JOINT_ANGLE_TRIPLETS[:, 2], :]
+
+    v1 = p1[..., :3] - p2[..., :3]
+    v2 = p3[..., :3] - p2[..., :3]
+    cos_angle = np.sum(v1 * v2, axis=-1) / (
+        np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1) + 1e-6
+    )
+    angles = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+    visible = np.minimum(np.minimum(p1[..., 3], p2[..., 3]), p3[..., 3]) >= min_visibility
+    return np.where(visible, angles, np.nan)
+
+def score_angle_diffs(angle_diffs):
+    """관절 각도 차이 배열(..., 8) → 점수(...,) - compare_poses와 같은 기준 (0도=100점, 30도 이상=0점)
+
+    비교 가능한 관절이 없으면 NaN
+    """
+    joint_scores = np.clip(100 - (np.abs(angle_diffs) / 30.0) * 100, 0, 100)
+    valid = ~np.isnan(joint_scores)
+    count = valid.sum(axis=-1)
+    total = np.where(valid, joint_scores, 0).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
 # 동작 분석 함수 (간단한 예시)
 def analyze_movement(pose_landmarks, action_name):
     """
@@ -2369,79 +3395,1197 @@ def capture_video_frame(video_path, frame_position=0.5):
     
     return None
 
-# 밈 카드 생성 함수 (개선된 버전)
-def create_meme_card(dna_type_name, dna_data):
-    """DNA 영상 배경을 사용한 밈 카드 생성"""
-    width, height = 1080, 1080
-    
-    # 1. DNA 타입 영상에서 프레임 캡쳐 시도
-    video_path = f"videos/{dna_data['video_file']}"
-    background = capture_video_frame(video_path, frame_position=0.5)
-    
-    if background:
-        # 이미지 크기 조정 (정사각형으로 크롭)
-        bg_width, bg_height = background.size
-        
-        # 중앙 크롭
-        if bg_width > bg_height:
-            left = (bg_width - bg_height) // 2
-            background = background.crop((left, 0, left + bg_height, bg_height))
-        else:
-            top = (bg_height - bg_width) // 2
-            background = background.crop((0, top, bg_width, top + bg_width))
-        
-        # 리사이즈
-        background = background.resize((width, height), Image.Resampling.LANCZOS)
-        
-        # 약간 어둡게 (텍스트 가독성 향상)
-        enhancer = ImageEnhance.Brightness(background)
-        background = enhancer.enhance(0.5)
-        
-        # 약간 블러 효과
-        background = background.filter(ImageFilter.GaussianBlur(2))
-    else:
-        # 영상이 없으면 단색 배경 사용
-        background = Image.new('RGB', (width, height), color=dna_data['color'])
-    
-    # 2. 반투명 오버레이 레이어 추가
-    overlay = Image.new('RGBA', (width, height), (0, 0, 0, 120))
-    background = background.convert('RGBA')
-    background = Image.alpha_composite(background, overlay)
-    
-    # 3. 텍스트 추가
-    draw = ImageDraw.Draw(background)
-    
-    # 폰트 로드 시도
+# ==================== 전문가 영상 파생 산출물 캐시 ====================
+# 전문가 영상의 대표 자세 랜드마크와 Skeleton 렌더링 영상은 영상 내용(blob 해시)별로
+# data/derived/<key>/ 에 저장하고, 프로세스 메모리에도 공유 (세션마다 다시 계산하지 않음)
+DERIVED_DIR = DATA_DIR / "derived"
+DERIVED_DIR.mkdir(exist_ok=True)
+
+# npy 배열에서 복원한 랜드마크 (MediaPipe NormalizedLandmark와 같은 속성 접근)
+_Landmark = namedtuple('_Landmark', ['x', 'y', 'z', 'visibility'])
+
+@st.cache_resource
+def _get_derived_cache():
+    """파생 산출물 캐시 (프로세스당 1개): 완료된 값 + 계산 중인 키별 Event"""
+    return {'lock': threading.Lock(), 'values': {}, 'inflight': {}}
+
+def _single_flight(key, compute):
+    """같은 key의 계산은 한 번만 실행하고, 동시에 요청한 다른 세션은 결과를 기다림
+
+    계산 실패(None)는 캐시하지 않으므로 다음 요청에서 다시 시도
+    """
+    cache = _get_derived_cache()
+    with cache['lock']:
+        if key in cache['values']:
+            return cache['values'][key]
+        event = cache['inflight'].get(key)
+        is_leader = event is None
+        if is_leader:
+            event = threading.Event()
+            cache['inflight'][key] = event
+
+    if not is_leader:
+        event.wait()
+        with cache['lock']:
+            return cache['values'].get(key)
+
     try:
-        # Windows 한글 폰트
-        title_font = ImageFont.truetype("malgun.ttf", 90)
-        subtitle_font = ImageFont.truetype("malgun.ttf", 60)
-        hashtag_font = ImageFont.truetype("malgun.ttf", 45)
-    except:
+        value = compute()
+        if value is not None:
+            with cache['lock']:
+                cache['values'][key] = value
+        return value
+    finally:
+        with cache['lock']:
+            cache['inflight'].pop(key, None)
+        event.set()
+
+def landmarks_to_array(landmarks):
+    """랜드마크 목록 → (N, 4) float32 배열 [x, y, z, visibility]"""
+    return np.array(
+        [[lm.x, lm.y, lm.z, getattr(lm, 'visibility', 1.0)] for lm in landmarks],
+        dtype=np.float32
+    )
+
+def array_to_landmarks(array):
+    """(N, 4) 배열 → _Landmark 목록 (compare_poses 등에 그대로 사용)"""
+    return [_Landmark(*map(float, row)) for row in array]
+
+def _extract_expert_landmarks(expert_video_path):
+    """전문가 영상의 중간 프레임에서 landmarks 추출"""
+    pose_model_path = get_offline_pose_model_path()
+    pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
+    pose_options = vision.PoseLandmarkerOptions(
+        base_options=pose_base_options,
+        running_mode=vision.RunningMode.IMAGE
+    )
+
+    frame = capture_video_frame(expert_video_path, 0.5)
+    if frame is None:
+        return None
+
+    with vision.PoseLandmarker.create_from_options(pose_options) as pose_landmarker:
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.asarray(frame))
+        result = pose_landmarker.detect(mp_image)
+    if result.pose_landmarks:
+        return result.pose_landmarks[0]
+    return None
+
+def _render_skeleton_video(expert_video_path, output_path):
+    """전문가 영상에 skeleton을 그려서 output_path에 저장"""
+    pose_model_path = get_offline_pose_model_path()
+    pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
+    pose_options = vision.PoseLandmarkerOptions(
+        base_options=pose_base_options,
+        running_mode=vision.RunningMode.VIDEO
+    )
+    hand_model_path = os.path.join(os.path.dirname(__file__), "models", "hand_landmarker.task")
+    hand_base_options = python.BaseOptions(model_asset_path=hand_model_path)
+    hand_options = vision.HandLandmarkerOptions(
+        base_options=hand_base_options,
+        running_mode=vision.RunningMode.VIDEO,
+        num_hands=2
+    )
+
+    cap = cv2.VideoCapture(expert_video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # 임시 파일에 쓴 뒤 rename (다른 세션이 쓰다 만 파일을 읽지 않도록)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp.mp4")
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(str(tmp_path), fourcc, fps, (width, height))
+
+    frame_count = 0
+    with vision.PoseLandmarker.create_from_options(pose_options) as pose_landmarker, \
+            vision.HandLandmarker.create_from_options(hand_options) as hand_landmarker:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+            frame_timestamp_ms = int(frame_count * 1000 / fps)
+
+            pose_result = pose_landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+            if pose_result.pose_landmarks:
+                frame_rgb = draw_landmarks_on_image(frame_rgb, pose_result)
+
+            hand_result = hand_landmarker.detect_for_video(mp_image, frame_timestamp_ms)
+            if hand_result.hand_landmarks:
+                frame_rgb = draw_hands_on_image(frame_rgb, hand_result)
+
+            out.write(cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR))
+            frame_count += 1
+
+    cap.release()
+    out.release()
+    if frame_count == 0:
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def get_expert_landmarks(expert_video_path, content_key=None):
+    """전문가 대표 자세 landmarks (메모리 → data/derived/<key>/landmarks_<모델 등급>.npy → 추출 순으로 조회)"""
+    if not os.path.exists(expert_video_path):
+        return None
+    key = content_key or video_cache_key(expert_video_path)
+    tier = get_offline_pose_model_tier()
+
+    def compute():
+        cache_path = DERIVED_DIR / key / f"landmarks_{tier}.npy"
+        if cache_path.exists():
+            return array_to_landmarks(np.load(cache_path))
         try:
-            # 다른 한글 폰트 시도
-            title_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 90)
-            subtitle_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 60)
-            hashtag_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 45)
-        except:
-            # 기본 폰트
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
-            hashtag_font = ImageFont.load_default()
-    
-    # 언어에 따른 텍스트
-    lang = st.session_state.get('language', 'ko')
-    
-    # 텍스트 위치 및 내용
-    texts = [
-        {
-            "text": f"{t('meme_i_am', lang)} {dna_type_name}!",
-            "font": title_font,
-            "position": (width//2, height//3),
-            "fill": "white"
-        },
-        {
-            "text": f"{dna_data['emoji']} {dna_data['title']}",
+            landmarks = _extract_expert_landmarks(expert_video_path)
+        except Exception as e:
+            print(f"Expert landmarks 추출 실패: {e}")
+            return None
+        if landmarks is None:
+            return None
+        array = landmarks_to_array(landmarks)
+        cache_path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_name, cache_path)
+        return array_to_landmarks(array)
+
+    return _single_flight(('landmarks', key, tier), compute)
+
+def get_expert_skeleton_video(expert_video_path, content_key=None):
+    """Skeleton이 그려진 전문가 영상 경로 (data/derived/<key>/skeleton_<모델 등급>.mp4, 없으면 생성)"""
+    if not os.path.exists(expert_video_path):
+        return None
+    key = content_key or video_cache_key(expert_video_path)
+    tier = get_offline_pose_model_tier()
+
+    def compute():
+        output_path = DERIVED_DIR / key / f"skeleton_{tier}.mp4"
+        if output_path.exists():
+            return str(output_path)
+        output_path.parent.mkdir(exist_ok=True)
+        try:
+            rendered = _render_skeleton_video(expert_video_path, output_path)
+        except Exception as e:
+            print(f"전문가 영상 처리 실패: {e}")
+            return None
+        return str(rendered) if rendered else None
+
+    return _single_flight(('skeleton', key, tier), compute)
+
+# ==================== 전문가 키포즈 라이브러리 ====================
+# 중간 프레임 1장 대신, 전문가 영상 전체에서 샘플링한 자세를 관절 각도 기준으로
+# K개 대표 자세(클러스터 medoid)로 묶어 data/derived/<key>/keyposes_<모델 등급>_k<K>.npy 에 저장
+KEYPOSE_COUNT = 6
+KEYPOSE_SAMPLE_FRAMES = 48
+
+def _sample_expert_pose_arrays(expert_video_path, sample_count=KEYPOSE_SAMPLE_FRAMES):
+    """영상 전체에서 균등 간격으로 프레임을 뽑아 포즈 감지, 반환: (N, 33, 4) 배열"""
+    pose_model_path = get_offline_pose_model_path()
+    pose_options = vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(model_asset_path=pose_model_path),
+        running_mode=vision.RunningMode.IMAGE
+    )
+
+    cap = cv2.VideoCapture(expert_video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total_frames <= 0:
+        cap.release()
+        return np.empty((0, 33, 4), dtype=np.float32)
+    targets = set(np.linspace(0, total_frames - 1, min(sample_count, total_frames)).astype(int).tolist())
+
+    samples = []
+    with vision.PoseLandmarker.create_from_options(pose_options) as pose_landmarker:
+        frame_index = 0
+        last_target = max(targets)
+        while frame_index <= last_target:
+            # 샘플이 아닌 프레임은 디코딩만 건너뜀 (grab)
+            if frame_index not in targets:
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            result = pose_landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb))
+            if result.pose_landmarks:
+                samples.append(landmarks_to_array(result.pose_landmarks[0]))
+            frame_index += 1
+    cap.release()
+
+    if not samples:
+        return np.empty((0, 33, 4), dtype=np.float32)
+    return np.stack(samples)
+
+def select_keyposes(pose_arrays, k=KEYPOSE_COUNT, seed=0, iterations=20):
+    """관절 각도 k-means++ 클러스터링 후 각 클러스터의 medoid 자세 선택
+
+    pose_arrays: (N, 33, 4), 반환: (K, 33, 4) - 원래 영상 순서대로 정렬
+    """
+    n = len(pose_arrays)
+    if n <= k:
+        return pose_arrays.copy()
+
+    features = joint_angles_array(pose_arrays)
+    # 보이지 않는 관절은 해당 관절의 평균 각도로 채움
+    visible = ~np.isnan(features)
+    visible_count = visible.sum(axis=0)
+    column_mean = np.where(
+        visible_count > 0,
+        np.where(visible, features, 0).sum(axis=0) / np.maximum(visible_count, 1),
+        90.0
+    )
+    features = np.where(visible, features, column_mean)
+
+    rng = np.random.default_rng(seed)
+    centers = [features[rng.integers(n)]]
+    for _ in range(1, k):
+        dist_sq = np.min(((features[:, None, :] - np.array(centers)[None]) ** 2).sum(-1), axis=1)
+        probs = dist_sq / dist_sq.sum() if dist_sq.sum() > 0 else None
+        centers.append(features[rng.choice(n, p=probs)])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = ((features[:, None, :] - centers[None]) ** 2).sum(-1).argmin(axis=1)
+        new_centers = np.array([
+            features[labels == c].mean(axis=0) if np.any(labels == c) else centers[c]
+            for c in range(k)
+        ])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    # medoid: 각 중심에 가장 가까운 실제 프레임 (중복 제거, 영상 순서 유지)
+    medoids = sorted(set(((features[:, None, :] - centers[None]) ** 2).sum(-1).argmin(axis=0).tolist()))
+    return pose_arrays[medoids]
+
+def get_expert_keyposes(expert_video_path, content_key=None, k=KEYPOSE_COUNT):
+    """전문가 키포즈 라이브러리: {'landmarks': (K, 33, 4), 'angles': (K, 8)} - 없으면 None"""
+    if not os.path.exists(expert_video_path):
+        return None
+    key = content_key or video_cache_key(expert_video_path)
+    tier = get_offline_pose_model_tier()
+
+    def compute():
+        cache_path = DERIVED_DIR / key / f"keyposes_{tier}_k{k}.npy"
+        if cache_path.exists():
+            keyposes = np.load(cache_path)
+        else:
+            try:
+                keyposes = select_keyposes(_sample_expert_pose_arrays(expert_video_path), k=k)
+            except Exception as e:
+                print(f"전문가 키포즈 추출 실패: {e}")
+                return None
+            if len(keyposes) == 0:
+                return None
+            cache_path.parent.mkdir(exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, keyposes.astype(np.float32))
+            os.replace(tmp_name, cache_path)
+        return {'landmarks': keyposes, 'angles': joint_angles_array(keyposes)}
+
+    return _single_flight(('keyposes', key, tier, k), compute)
+
+def match_keypose(user_landmarks, keypose_library):
+    """사용자 자세와 가장 가까운 키포즈 찾기 (K개에 대한 벡터화 최소 거리)
+
+    반환: (키포즈 인덱스, 빠른 점수 0-100) - 비교 불가면 (None, 0)
+    """
+    if user_landmarks is None or len(user_landmarks) == 0 or keypose_library is None:
+        return None, 0
+    user_array = user_landmarks if isinstance(user_landmarks, np.ndarray) else landmarks_to_array(user_landmarks)
+    user_angles = joint_angles_array(user_array)
+    scores = score_angle_diffs(keypose_library['angles'] - user_angles[None, :])
+    if np.all(np.isnan(scores)):
+        return None, 0
+    best = int(np.nanargmax(scores))
+    return best, float(scores[best])
+
+def batch_pose_scores(pose_arrays, keypose_library=None, expert_landmarks=None):
+    """여러 명의 자세 (N, 33, 4)를 한 번에 채점 - 반환: (N,) 점수 (비교 불가는 NaN)
+
+    키포즈가 있으면 (N, K) 점수 행렬에서 사람별 최고점, 없으면 단일 기준 자세와 비교
+    """
+    pose_arrays = np.asarray(pose_arrays, dtype=np.float32)
+    if len(pose_arrays) == 0:
+        return np.empty(0, dtype=np.float32)
+    user_angles = joint_angles_array(pose_arrays)                       # (N, 8)
+    if keypose_library is not None:
+        scores = score_angle_diffs(user_angles[:, None, :] - keypose_library['angles'][None, :, :])  # (N, K)
+        all_nan = np.all(np.isnan(scores), axis=1)
+        return np.where(all_nan, np.nan, np.nanmax(np.where(np.isnan(scores), -1, scores), axis=1))
+    if expert_landmarks:
+        expert_angles = joint_angles_array(landmarks_to_array(expert_landmarks))
+        return score_angle_diffs(user_angles - expert_angles[None, :])
+    return np.full(len(pose_arrays), np.nan, dtype=np.float32)
+
+def compare_with_keyposes(user_landmarks, keypose_library):
+    """가장 가까운 키포즈와 compare_poses로 상세 비교 (피드백 포함), 결과에 keypose_index 추가"""
+    index, _ = match_keypose(user_landmarks, keypose_library)
+    if index is None:
+        return compare_poses(user_landmarks, None)
+    result = compare_poses(user_landmarks, array_to_landmarks(keypose_library['landmarks'][index]))
+    result['keypose_index'] = index
+    return result
+
+# ==================== 랜드마크 스무딩 (One Euro 필터) ====================
+# 프레임별 원시 랜드마크의 떨림을 줄이고, 감지를 건너뛴 프레임은 속도 추정으로 위치를 예측
+# min_cutoff: 정지 시 떨림 제거 강도 (낮을수록 부드러움), beta: 빠른 움직임 추종 (높을수록 지연 감소)
+SMOOTHING_PARAMS = {'min_cutoff': 1.0, 'beta': 10.0, 'd_cutoff': 1.0}
+MAX_PREDICT_SECONDS = 0.3     # 마지막 감지 후 이 시간까지만 예측 (이후는 미감지 처리)
+LANDMARK_DETECT_EVERY = 2     # N프레임마다 감지, 나머지는 예측값 사용
+
+class OneEuroFilter:
+    """배열 단위 One Euro 필터 (좌표 배열 모양은 첫 입력 기준, 예: 33×3)"""
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x_hat = None
+        self.dx_hat = None
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        """새 관측값 x(시각 t, 초)를 필터링한 값 반환"""
+        x = np.asarray(x, dtype=np.float32)
+        if self.x_hat is None or self.x_hat.shape != x.shape:
+            self.x_hat = x.copy()
+            self.dx_hat = np.zeros_like(x)
+            self.t_prev = t
+            return self.x_hat
+
+        dt = max(t - self.t_prev, 1e-3)
+        dx = (x - self.x_hat) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx_hat = a_d * dx + (1 - a_d) * self.dx_hat
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx_hat)
+        a = self._alpha(cutoff, dt)
+        self.x_hat = a * x + (1 - a) * self.x_hat
+        self.t_prev = t
+        return self.x_hat
+
+    def predict(self, t, max_seconds=MAX_PREDICT_SECONDS):
+        """관측 없이 시각 t의 위치 예측 (등속 가정), 마지막 관측이 오래됐으면 None"""
+        if self.x_hat is None or t - self.t_prev > max_seconds:
+            return None
+        return self.x_hat + self.dx_hat * (t - self.t_prev)
+
+class LandmarkSmoother:
+    """세션(프로세서)별 포즈 33×3 / 손 21×3 랜드마크 스무딩 + 예측
+
+    visibility는 필터링하지 않고 마지막 감지값을 그대로 사용
+    """
+
+    def __init__(self, max_predict_seconds=MAX_PREDICT_SECONDS, **params):
+        self.params = {**SMOOTHING_PARAMS, **params}
+        self.max_predict_seconds = max_predict_seconds
+        self.pose_filter = OneEuroFilter(**self.params)
+        self.pose_visibility = None
+        self.hand_filters = {}   # 손 구분(Left/Right) → OneEuroFilter
+
+    @staticmethod
+    def _to_landmarks(xyz, visibility):
+        return [_Landmark(float(x), float(y), float(z), float(v)) for (x, y, z), v in zip(xyz, visibility)]
+
+    def smooth_pose(self, landmarks, t):
+        """감지된 포즈 랜드마크를 스무딩해서 반환 (_Landmark 목록)"""
+        array = landmarks_to_array(landmarks)
+        self.pose_visibility = array[:, 3]
+        return self._to_landmarks(self.pose_filter(array[:, :3], t), self.pose_visibility)
+
+    def predict_pose(self, t):
+        """감지를 건너뛴 프레임의 포즈 예측 (예측 불가면 None)"""
+        xyz = self.pose_filter.predict(t, self.max_predict_seconds)
+        if xyz is None:
+            return None
+        return self._to_landmarks(xyz, self.pose_visibility)
+
+    def reset_pose(self):
+        self.pose_filter.reset()
+        self.pose_visibility = None
+
+    def smooth_hands(self, hand_result, t):
+        """HandLandmarker 결과의 손별 랜드마크를 스무딩해서 반환 (손 목록)"""
+        smoothed = []
+        seen = set()
+        for i, hand_landmarks in enumerate(hand_result.hand_landmarks or []):
+            handedness = hand_result.handedness[i][0].category_name if hand_result.handedness else str(i)
+            seen.add(handedness)
+            hand_filter = self.hand_filters.setdefault(handedness, OneEuroFilter(**self.params))
+            xyz = hand_filter(landmarks_to_array(hand_landmarks)[:, :3], t)
+            smoothed.append(self._to_landmarks(xyz, np.ones(len(xyz))))
+        # 이번에 감지되지 않은 손은 필터 초기화
+        for handedness in list(self.hand_filters):
+            if handedness not in seen:
+                del self.hand_filters[handedness]
+        return smoothed
+
+    def predict_hands(self, t):
+        """감지를 건너뛴 프레임의 손 예측 (손 목록, 예측 가능한 손만)"""
+        predicted = []
+        for hand_filter in self.hand_filters.values():
+            xyz = hand_filter.predict(t, self.max_predict_seconds)
+            if xyz is not None:
+                predicted.append(self._to_landmarks(xyz, np.ones(len(xyz))))
+        return predicted
+
+# ==================== 실시간 점수 집계 ====================
+SCORE_PASS_THRESHOLD = 80
+
+def fast_pose_score(user_landmarks, keypose_library=None, expert_landmarks=None):
+    """프레임별 빠른 점수 (벡터화 관절 각도, 피드백 문장 없음) - 비교 불가면 None"""
+    if not user_landmarks:
+        return None
+    if keypose_library is not None:
+        index, score = match_keypose(user_landmarks, keypose_library)
+        return score if index is not None else None
+    if expert_landmarks:
+        diffs = joint_angles_array(landmarks_to_array(expert_landmarks)) - joint_angles_array(landmarks_to_array(user_landmarks))
+        score = float(score_angle_diffs(diffs))
+        return None if np.isnan(score) else score
+    return None
+
+class PoseScoreAggregator:
+    """프레임별 점수의 이동 평균 / EMA / 최고점 / 기준 이상 유지 시간 (고정 크기, O(1) 조회)"""
+
+    __slots__ = ('window', 'ema_alpha', 'threshold', 'max_gap_seconds', '_ring', '_ring_index', '_ring_count',
+                 '_ring_sum', 'last', 'ema', 'best', 'time_above', 'frames', '_t_prev')
+
+    def __init__(self, window=30, ema_alpha=0.15, threshold=SCORE_PASS_THRESHOLD, max_gap_seconds=0.5):
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self.threshold = threshold
+        self.max_gap_seconds = max_gap_seconds
+        self.reset()
+
+    def reset(self):
+        self._ring = np.zeros(self.window, dtype=np.float32)
+        self._ring_index = 0
+        self._ring_count = 0
+        self._ring_sum = 0.0
+        self.last = 0.0
+        self.ema = 0.0
+        self.best = 0.0
+        self.time_above = 0.0
+        self.frames = 0
+        self._t_prev = None
+
+    def update(self, score, t):
+        """시각 t(초)의 프레임 점수 반영 - score가 None이면 (미감지) 시간만 진행"""
+        dt = 0.0 if self._t_prev is None else min(max(t - self._t_prev, 0.0), self.max_gap_seconds)
+        self._t_prev = t
+        if score is None:
+            return
+        score = float(score)
+
+        # 이동 평균 (최근 window 프레임, 링 버퍼)
+        self._ring_sum += score - float(self._ring[self._ring_index])
+        self._ring[self._ring_index] = score
+        self._ring_index = (self._ring_index + 1) % self.window
+        self._ring_count = min(self._ring_count + 1, self.window)
+
+        self.ema = score if self.frames == 0 else self.ema_alpha * score + (1 - self.ema_alpha) * self.ema
+        self.last = score
+        self.best = max(self.best, score)
+        if score >= self.threshold:
+            self.time_above += dt
+        self.frames += 1
+
+    def snapshot(self):
+        """현재 집계값 dict"""
+        return {
+            'last': self.last,
+            'mean': self._ring_sum / self._ring_count if self._ring_count else 0.0,
+            'ema': self.ema,
+            'best': self.best,
+            'time_above': self.time_above,
+            'frames': self.frames
+        }
+
+# ==================== 그룹 연습 (다인원 추적) ====================
+GROUP_MAX_DANCERS = 6
+
+def landmark_bounding_boxes(pose_arrays, min_visibility=0.5):
+    """(N, 33, 4) → (N, 4) 정규화 bbox [x1, y1, x2, y2] (보이는 랜드마크 기준)"""
+    pose_arrays = np.asarray(pose_arrays, dtype=np.float32)
+    visible = pose_arrays[..., 3:4] >= min_visibility
+    # 보이는 점이 없으면 전체 랜드마크 사용
+    visible = np.where(visible.any(axis=1, keepdims=True), visible, True)
+    xy = pose_arrays[..., :2]
+    low = np.where(visible, xy, np.inf).min(axis=1)
+    high = np.where(visible, xy, -np.inf).max(axis=1)
+    return np.concatenate([low, high], axis=1)
+
+def box_iou(boxes_a, boxes_b):
+    """(N, 4) × (M, 4) → (N, M) IoU 행렬"""
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+class GroupTracker:
+    """프레임 간 댄서 식별 유지 - IoU 우선, 겹치지 않으면 중심점 거리로 탐욕 매칭
+
+    max_missed 프레임 동안 보이지 않은 트랙은 삭제, 새 사람은 새 번호 부여
+    """
+
+    def __init__(self, iou_threshold=0.2, max_centroid_distance=0.15, max_missed=15):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.tracks = {}   # 트랙 번호 → {'bbox': (4,), 'missed': int}
+
+    def update(self, boxes):
+        """이번 프레임 bbox 목록 (N, 4) → 각 bbox의 트랙 번호 목록"""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        assigned = [None] * len(boxes)
+        track_ids = list(self.tracks)
+
+        if track_ids and len(boxes):
+            track_boxes = np.array([self.tracks[t]['bbox'] for t in track_ids])
+            iou = box_iou(boxes, track_boxes)
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            distance = np.linalg.norm(centers[:, None, :] - track_centers[None, :, :], axis=-1)
+            # 매칭 점수: IoU가 기준 이상이면 IoU, 아니면 가까운 중심점 (음수 거리), 둘 다 아니면 매칭 불가
+            affinity = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                                np.where(distance <= self.max_centroid_distance, -distance, -np.inf))
+            while np.isfinite(affinity).any():
+                i, j = np.unravel_index(np.argmax(affinity), affinity.shape)
+                assigned[i] = track_ids[j]
+                affinity[i, :] = -np.inf
+                affinity[:, j] = -np.inf
+
+        matched = set()
+        for i, track_id in enumerate(assigned):
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+                assigned[i] = track_id
+            self.tracks[track_id] = {'bbox': boxes[i], 'missed': 0}
+            matched.add(track_id)
+
+        for track_id in list(self.tracks):
+            if track_id not in matched:
+                self.tracks[track_id]['missed'] += 1
+                if self.tracks[track_id]['missed'] > self.max_missed:
+                    del self.tracks[track_id]
+        return assigned
+
+# ==================== 감지 해상도 자동 조절 ====================
+# 포즈 감지는 축소한 복사본에서 실행하고, 랜드마크는 정규화 좌표(0~1)이므로
+# 원본(표시) 해상도 프레임에 그대로 그림
+DETECTION_RESOLUTIONS = [256, 384, 512, 640]   # 감지용 가로 해상도 단계 (px)
+DETECTION_LATENCY_BUDGET_MS = 40               # 프레임당 감지 지연 목표
+CAMERA_RESOLUTION = (640, 480)                 # 브라우저/웹캠에 요청하는 표시 해상도
+
+def webrtc_video_constraints(width=CAMERA_RESOLUTION[0], height=CAMERA_RESOLUTION[1], frame_rate=15, max_frame_rate=20):
+    """webrtc_streamer media_stream_constraints (감지 단계 최대 해상도에 맞춘 카메라 해상도)"""
+    return {
+        "video": {
+            "width": {"ideal": width},
+            "height": {"ideal": height},
+            "frameRate": {"ideal": frame_rate, "max": max_frame_rate}
+        },
+        "audio": False
+    }
+
+class ResolutionController:
+    """측정된 감지 지연과 감지 신뢰도(평균 visibility)로 감지 해상도 단계 선택
+
+    window 프레임 평균 지연이 예산을 넘으면 한 단계 내리고, 여유가 있는데 신뢰도가 낮으면 한 단계 올림.
+    단계를 바꾼 뒤에는 측정값을 초기화해서 새 해상도 기준으로 다시 판단 (진동 방지)
+    """
+
+    def __init__(self, ladder=DETECTION_RESOLUTIONS, latency_budget_ms=DETECTION_LATENCY_BUDGET_MS,
+                 min_confidence=0.6, window=15, start_width=384):
+        self.ladder = sorted(ladder)
+        self.latency_budget_ms = latency_budget_ms
+        self.min_confidence = min_confidence
+        self.window = window
+        self.index = self.ladder.index(start_width) if start_width in self.ladder else len(self.ladder) // 2
+        self._latency_sum = 0.0
+        self._confidence_sum = 0.0
+        self._samples = 0
+
+    @property
+    def width(self):
+        return self.ladder[self.index]
+
+    def downscale(self, frame):
+        """감지용 축소 복사본 (원본이 더 작으면 원본 그대로, 확대하지 않음)"""
+        h, w = frame.shape[:2]
+        if w <= self.width:
+            return frame
+        return cv2.resize(frame, (self.width, int(round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+
+    def report(self, latency_ms, confidence):
+        """프레임별 감지 지연(ms)과 신뢰도(0~1, 미감지 0) 반영"""
+        self._latency_sum += latency_ms
+        self._confidence_sum += confidence
+        self._samples += 1
+        if self._samples < self.window:
+            return
+
+        avg_latency = self._latency_sum / self._samples
+        avg_confidence = self._confidence_sum / self._samples
+        if avg_latency > self.latency_budget_ms and self.index > 0:
+            self.index -= 1
+        elif (avg_latency < self.latency_budget_ms * 0.6 and avg_confidence < self.min_confidence
+              and self.index < len(self.ladder) - 1):
+            self.index += 1
+        self._latency_sum = self._confidence_sum = 0.0
+        self._samples = 0
+
+def pose_confidence(pose_landmarks):
+    """포즈 감지 신뢰도 - 랜드마크 평균 visibility (미감지 0)"""
+    if not pose_landmarks:
+        return 0.0
+    return float(np.mean([lm.visibility for lm in pose_landmarks]))
+
+# ==================== WebRTC 프레임 버퍼 ====================
+# recv 경로: PyAV에서 rgb24로 바로 받고 → 재사용 버퍼에 좌우 반전 → 버퍼에 직접 그리기 → rgb24로 반환
+# (BGR↔RGB 변환 2회, flip 결과, draw_* 복사본 할당 제거)
+
+class FrameAllocationCounter:
+    """recv 프레임당 새로 할당한 배열 바이트 수 집계 (마지막 프레임 / 이동 평균)"""
+
+    def __init__(self, ema_alpha=0.1):
+        self.ema_alpha = ema_alpha
+        self.frame_bytes = 0
+        self.last_frame_bytes = 0
+        self.avg_frame_bytes = 0.0
+        self.frames = 0
+
+    def add(self, nbytes):
+        self.frame_bytes += int(nbytes)
+
+    def end_frame(self):
+        self.last_frame_bytes = self.frame_bytes
+        if self.frames == 0:
+            self.avg_frame_bytes = float(self.frame_bytes)
+        else:
+            self.avg_frame_bytes = self.ema_alpha * self.frame_bytes + (1 - self.ema_alpha) * self.avg_frame_bytes
+        self.frames += 1
+        self.frame_bytes = 0
+
+def mirror_into_buffer(src, buffer, counter=None):
+    """src를 좌우 반전해서 buffer에 기록 (크기가 바뀐 경우에만 새로 할당), 반환: buffer"""
+    if buffer is None or buffer.shape != src.shape:
+        buffer = np.empty_like(src)
+        if counter:
+            counter.add(buffer.nbytes)
+    cv2.flip(src, 1, dst=buffer)
+    return buffer
+
+# ==================== 영상 썸네일 / 미리보기 ====================
+# 그리드에서는 포스터 이미지(JPEG)와 짧은 저화질 미리보기만 사용하고
+# 전체 영상(st.video)은 상세 페이지에서만 로드
+THUMBNAILS_DIR = DATA_DIR / "thumbnails"
+THUMBNAILS_DIR.mkdir(exist_ok=True)
+POSTER_MAX_SIZE = 480       # 포스터 최대 가로/세로 (px)
+PREVIEW_WIDTH = 320         # 미리보기 클립 가로 (px)
+PREVIEW_SECONDS = 3         # 미리보기 클립 길이 (초)
+PREVIEW_FPS = 12
+FFMPEG_PATH = shutil.which("ffmpeg")
+
+def video_cache_key(video_path):
+    """영상 파일 캐시 키 (경로 + 크기 + 수정 시각)"""
+    stat = os.stat(video_path)
+    raw = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+def _write_preview_clip(video_path, output_path):
+    """앞부분 PREVIEW_SECONDS초를 저해상도/저비트레이트 H.264로 인코딩 (ffmpeg 없으면 OpenCV 시도)"""
+    # 호출마다 고유한 임시 파일 (같은 영상을 동시에 인코딩해도 서로 덮어쓰지 않음)
+    fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp.mp4")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        return _encode_preview_clip(video_path, output_path, tmp_path)
+    finally:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+
+def _encode_preview_clip(video_path, output_path, tmp_path):
+    if FFMPEG_PATH:
+        command = [
+            FFMPEG_PATH, "-y", "-loglevel", "error",
+            "-t", str(PREVIEW_SECONDS), "-i", str(video_path),
+            "-vf", f"scale={PREVIEW_WIDTH}:-2,fps={PREVIEW_FPS}",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "32",
+            "-an", "-movflags", "+faststart", str(tmp_path)
+        ]
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode == 0 and tmp_path.stat().st_size > 0:
+            os.replace(tmp_path, output_path)
+            return True
+        print(f"미리보기 인코딩 실패 ({video_path}): {result.stderr.decode('utf-8', 'ignore')[:200]}")
+        return False
+
+    # ffmpeg가 없으면 OpenCV (H.264 지원 빌드에서만 브라우저 재생 가능)
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        return False
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    src_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    src_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    if src_w <= 0 or src_h <= 0:
+        cap.release()
+        return False
+    out_h = int(src_h * PREVIEW_WIDTH / src_w) // 2 * 2
+    writer = cv2.VideoWriter(str(tmp_path), cv2.VideoWriter_fourcc(*'avc1'), PREVIEW_FPS, (PREVIEW_WIDTH, out_h))
+    if not writer.isOpened():
+        cap.release()
+        return False
+
+    step = max(1, int(round(src_fps / PREVIEW_FPS)))
+    max_frames = int(src_fps * PREVIEW_SECONDS)
+    for frame_index in range(max_frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_index % step == 0:
+            writer.write(cv2.resize(frame, (PREVIEW_WIDTH, out_h), interpolation=cv2.INTER_AREA))
+    cap.release()
+    writer.release()
+    os.replace(tmp_path, output_path)
+    return True
+
+def _write_poster(video_path, poster_path):
+    """영상 30% 지점 프레임을 포스터 JPEG로 저장 (고유 임시 파일에 쓰고 rename)"""
+    frame = capture_video_frame(str(video_path), frame_position=0.3)
+    if frame is None:
+        return
+    frame.thumbnail((POSTER_MAX_SIZE, POSTER_MAX_SIZE), Image.Resampling.LANCZOS)
+    fd, tmp_name = tempfile.mkstemp(dir=poster_path.parent, prefix=f".{poster_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            frame.save(f, format='JPEG', quality=80, optimize=True)
+        os.replace(tmp_name, poster_path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def get_video_thumbnails(video_path, cache_key=None, generate=True):
+    """
+    포스터 JPEG와 미리보기 클립 경로 반환
+    generate=True면 없는 것을 생성해서 디스크에 캐시 (같은 영상은 프로세스 안에서 한 번만 인코딩),
+    generate=False면 이미 있는 것만 반환 (페이지 렌더링용 - 인코딩하지 않음)
+    반환: {'poster': 경로 또는 None, 'preview': 경로 또는 None}
+    """
+    if not video_path or not os.path.exists(video_path):
+        return {'poster': None, 'preview': None}
+
+    key = cache_key or video_cache_key(video_path)
+    poster_path = THUMBNAILS_DIR / f"{key}.jpg"
+    preview_path = THUMBNAILS_DIR / f"{key}_preview.mp4"
+    failed_marker = THUMBNAILS_DIR / f"{key}_preview.failed"
+
+    def _existing():
+        return {
+            'poster': str(poster_path) if poster_path.exists() else None,
+            'preview': str(preview_path) if preview_path.exists() else None
+        }
+
+    is_complete = poster_path.exists() and (preview_path.exists() or failed_marker.exists())
+    if is_complete or not generate:
+        return _existing()
+
+    def _generate():
+        if not poster_path.exists():
+            _write_poster(video_path, poster_path)
+        if not preview_path.exists() and not failed_marker.exists():
+            if not _write_preview_clip(video_path, preview_path):
+                # 인코딩 불가 환경에서 매번 재시도하지 않도록 표시
+                failed_marker.touch()
+        # 포스터를 못 만든 경우 None을 반환해 캐시하지 않음 (다음 요청에서 재시도)
+        return _existing() if poster_path.exists() else None
+
+    return _single_flight(('thumbnails', key), _generate) or _existing()
+
+@st.cache_resource
+def _get_thumbnail_jobs():
+    """페이지 렌더링 중 발견한 썸네일 누락분을 만드는 백그라운드 작업 (프로세스당 1개)"""
+    return {'executor': ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails"),
+            'lock': threading.Lock(), 'pending': set()}
+
+def request_video_thumbnails(video_path, cache_key=None):
+    """썸네일 생성을 백그라운드에 예약 (같은 영상은 한 번만 예약)"""
+    if not video_path or not os.path.exists(video_path):
+        return
+    key = cache_key or video_cache_key(video_path)
+    jobs = _get_thumbnail_jobs()
+    with jobs['lock']:
+        if key in jobs['pending']:
+            return
+        jobs['pending'].add(key)
+
+    def _job():
+        try:
+            get_video_thumbnails(video_path, cache_key=key)
+        except Exception as e:
+            print(f"썸네일 생성 실패 ({video_path}): {e}")
+        finally:
+            with jobs['lock']:
+                jobs['pending'].discard(key)
+
+    jobs['executor'].submit(_job)
+
+def get_cached_thumbnails(video_path, cache_key=None):
+    """렌더링용 썸네일 - 이미 만든 것만 반환하고, 포스터가 없으면 백그라운드 생성 예약"""
+    thumbnails = get_video_thumbnails(video_path, cache_key=cache_key, generate=False)
+    if thumbnails['poster'] is None:
+        request_video_thumbnails(video_path, cache_key=cache_key)
+    return thumbnails
+
+def get_record_thumbnails(video):
+    """videos.json 레코드의 썸네일 (업로드 시 저장된 경로 우선, 없으면 캐시/백그라운드 생성)"""
+    poster = video.get('thumbnail_path')
+    if poster and os.path.exists(poster):
+        preview = video.get('preview_path')
+        return {'poster': poster, 'preview': preview if preview and os.path.exists(preview) else None}
+    return get_cached_thumbnails(video.get('video_path'), cache_key=video.get('blob_hash'))
+
+def generate_library_thumbnails(library_dir="videos"):
+    """videos/ 라이브러리 전체 썸네일 생성 (이미 있는 것은 건너뜀)"""
+    for video_path in sorted(Path(library_dir).rglob("*.mp4")):
+        try:
+            get_video_thumbnails(str(video_path))
+        except Exception as e:
+            print(f"썸네일 생성 실패 ({video_path}): {e}")
+
+@st.cache_resource
+def start_library_thumbnail_warmup():
+    """서버 프로세스당 한 번, 백그라운드에서 라이브러리 썸네일 생성"""
+    thread = threading.Thread(target=generate_library_thumbnails, daemon=True)
+    thread.start()
+    return thread
+
+def show_video_thumbnail(video_path, key, thumbnails=None, fallback_text="영상 로드 중..."):
+    """그리드 카드용 영상 표시 - 포스터 + 미리보기 토글 (전체 영상은 상세 페이지에서)"""
+    try:
+        thumbnails = thumbnails or get_cached_thumbnails(video_path)
+    except Exception as e:
+        print(f"썸네일 로드 실패 ({video_path}): {e}")
+        thumbnails = {'poster': None, 'preview': None}
+
+    if thumbnails.get('preview') and st.session_state.get('previewing_video_key') == key:
+        st.video(thumbnails['preview'], loop=True, autoplay=True, muted=True)
+    elif thumbnails.get('poster'):
+        st.image(thumbnails['poster'], use_container_width=True)
+        if thumbnails.get('preview') and st.button("▶ 미리보기", key=f"preview_{key}"):
+            st.session_state.previewing_video_key = key
+            st.rerun()
+    else:
+        st.info(fallback_text)
+
+# ==================== 영상 업로드 처리 (ingestion) ====================
+# 업로드 원본을 청크 단위로 디스크에 저장한 뒤, 백그라운드 작업에서
+# H.264 MP4(faststart) 해상도별 변환본을 만들고 길이/fps를 videos.json에 기록
+UPLOAD_CHUNK_SIZE = 1024 * 1024   # 1MB
+# 업로드 최대 크기 (MB, 환경 변수 MAX_UPLOAD_MB로 변경 가능)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "500")) * 1024 * 1024
+# 내용 주소 저장소: 영상 원본은 expert_videos/blobs/<aa>/<sha256>.<ext> 에 한 번만 저장
+BLOBS_DIR = EXPERT_VIDEOS_DIR / "blobs"
+BLOBS_DIR.mkdir(exist_ok=True)
+RENDITIONS_DIR = EXPERT_VIDEOS_DIR / "renditions"
+RENDITIONS_DIR.mkdir(exist_ok=True)
+RENDITION_HEIGHTS = {'360p': 360, '720p': 720}
+# 화면 용도별 선호 변환본 (앞에서부터 있는 것 사용, 없으면 원본)
+# 그리드 카드는 포스터/미리보기 클립만 쓰므로 전체 영상 재생은 상세 페이지뿐
+RENDITION_PREFERENCES = {
+    'detail': ['720p', '360p'],
+}
+FFPROBE_PATH = shutil.which("ffprobe")
+
+def stream_upload_to_disk(uploaded_file, dest_path, chunk_size=UPLOAD_CHUNK_SIZE, max_bytes=None):
+    """업로드 파일을 chunk_size 단위로 복사하면서 SHA-256 계산
+
+    임시 파일에 쓴 뒤 rename하며, max_bytes를 넘으면 임시 파일을 지우고 ValueError 발생.
+    메모리 사용량은 파일 크기와 무관하게 chunk_size 수준으로 유지됨.
+    반환: (기록한 바이트 수, sha256 hex)
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    dest_path = Path(dest_path)
+    tmp_path = dest_path.with_name(f".{dest_path.name}.part")
+    digest = hashlib.sha256()
+    written = 0
+    uploaded_file.seek(0)
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                chunk = uploaded_file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise ValueError(f"업로드 용량 제한({max_bytes // (1024 * 1024)}MB)을 초과했습니다.")
+                digest.update(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+    return written, digest.hexdigest()
+
+def blob_path(content_hash, ext):
+    """blob 해시 → 저장 경로 (앞 2글자로 디렉토리 분산)"""
+    return BLOBS_DIR / content_hash[:2] / f"{content_hash}{ext.lower()}"
+
+def store_upload_as_blob(uploaded_file, max_bytes=None):
+    """업로드 파일을 스트리밍 저장하면서 해시 계산 후 blob으로 등록
+
+    같은 내용의 blob이 이미 있으면 새로 쓴 파일은 버리고 기존 blob 사용.
+    반환: (blob 경로, sha256 hex, 바이트 수, 기존 blob 재사용 여부)
+    """
+    ext = Path(uploaded_file.name).suffix or ".mp4"
+    incoming_dir = BLOBS_DIR / ".incoming"
+    incoming_dir.mkdir(exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=incoming_dir, suffix=ext)
+    os.close(fd)
+    try:
+        file_size, content_hash = stream_upload_to_disk(uploaded_file, tmp_name, max_bytes=max_bytes)
+        path = blob_path(content_hash, ext)
+        if path.exists():
+            return path, content_hash, file_size, True
+        path.parent.mkdir(exist_ok=True)
+        os.replace(tmp_name, path)
+        return path, content_hash, file_size, False
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def video_content_key(video):
+    """영상 레코드의 파생 산출물(썸네일/변환본/랜드마크) 캐시 키 - blob 해시 우선"""
+    return video.get('blob_hash') or video_cache_key(video.get('video_path'))
+
+def probe_video(video_path):
+    """영상 정보 조회: {'duration': 초, 'fps': 프레임률, 'width': px, 'height': px} (ffprobe, 없으면 OpenCV)"""
+    if FFPROBE_PATH:
+        command = [
+            FFPROBE_PATH, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,r_frame_rate:format=duration",
+            "-of", "json", str(video_path)
+        ]
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode == 0:
+            info = json.loads(result.stdout or b"{}")
+            stream = (info.get('streams') or [{}])[0]
+            num, _, den = stream.get('r_frame_rate', '0/1').partition('/')
+            fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+            return {
+                'duration': float(info.get('format', {}).get('duration', 0) or 0),
+                'fps': round(fps, 3),
+                'width': int(stream.get('width', 0) or 0),
+                'height': int(stream.get('height', 0) or 0)
+            }
+
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        return {'duration': 0.0, 'fps': 0.0, 'width': 0, 'height': 0}
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    info = {
+        'duration': round(frame_count / fps, 3) if fps else 0.0,
+        'fps': round(fps, 3),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    }
+    cap.release()
+    return info
+
+def transcode_renditions(video_path, output_prefix, source_height=0):
+    """해상도별 H.264 MP4(faststart) 변환, 반환: {'360p': 경로, ...} - ffmpeg 없으면 빈 dict"""
+    if not FFMPEG_PATH:
+        return {}
+
+    renditions = {}
+    smallest = min(RENDITION_HEIGHTS, key=RENDITION_HEIGHTS.get)
+    for name, height in RENDITION_HEIGHTS.items():
+        # 원본보다 큰 해상도는 만들지 않음 (가장 작은 변환본은 항상 생성)
+        if source_height and height > source_height and name != smallest:
+            continue
+        output_path = RENDITIONS_DIR / f"{output_prefix}_{name}.mp4"
+        if not output_path.exists():
+            tmp_path = output_path.with_name(f".{output_path.name}.tmp.mp4")
+            command = [
+                FFMPEG_PATH, "-y", "-loglevel", "error", "-i", str(video_path),
+                "-vf", f"scale=-2:'min({height},ih)'",
+                "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+                "-profile:v", "main", "-pix_fmt", "yuv420p",
+                "-c:a", "aac", "-b:a", "96k",
+                "-movflags", "+faststart", str(tmp_path)
+            ]
+            result = subprocess.run(command, capture_output=True)
+            if result.returncode != 0 or not tmp_path.exists():
+                print(f"변환 실패 ({video_path} → {name}): {result.stderr.decode('utf-8', 'ignore')[:200]}")
+                if tmp_path.exists():
+                    os.remove(tmp_path)
+                continue
+            os.replace(tmp_path, output_path)
+        renditions[name] = str(output_path)
+    return renditions
+
+def update_video_fields(video_id, fields):
+    """videos.json의 영상 레코드 일부 필드만 갱신"""
+    def _update(data):
+        if video_id in data:
+            data[video_id].update(fields)
+    update_json(VIDEOS_FILE, _update)
+
+def _run_ingest_job(video_id, video_path, content_key=None):
+    """백그라운드 변환 작업: 정보 조회 → 해상도별 변환 → videos.json 기록
+
+    변환본은 content_key(blob 해시)로 저장되므로 같은 영상의 재업로드는 기존 변환본을 재사용
+    """
+    update_video_fields(video_id, {'ingest_status': 'processing'})
+    try:
+        info = probe_video(video_path)
+        renditions = transcode_renditions(video_path, content_key or video_id, source_height=info['height'])
+        update_video_fields(video_id, {
+            'duration': info['duration'],
+            'fps': info['fps'],
+            'width': info['width'],
+            'height': info['height'],
+            'renditions': renditions,
+            'ingest_status': 'ready' if renditions else 'original_only'
+        })
+    except Exception as e:
+        print(f"영상 변환 작업 실패 ({video_id}): {e}")
+        update_video_fields(video_id, {'ingest_status': 'failed'})
+
+@st.cache_resource
+def _get_ingest_executor():
+    """변환 작업용 스레드 풀 (프로세스당 1개, CPU 과점유 방지를 위해 작업 1개씩)"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-ingest")
+
+def submit_ingest_job(video_id, video_path, content_key=None):
+    """변환 작업을 백그라운드에 등록"""
+    return _get_ingest_executor().submit(_run_ingest_job, video_id, str(video_path), content_key)
+
+@st.cache_resource
+def resume_pending_ingest_jobs():
+    """서버 프로세스당 한 번: 이전 프로세스에서 끝나지 않은(queued/processing) 변환 작업 재등록
+
+    작업은 프로세스 안의 스레드 풀에만 있으므로 재시작하면 사라짐 - 원본이 없으면 failed로 기록
+    """
+    pending = [v for v in get_videos().values() if v.get('ingest_status') in ('queued', 'processing')]
+    for video in pending:
+        video_path = video.get('video_path')
+        if video_path and os.path.exists(video_path):
+            update_video_fields(video['id'], {'ingest_status': 'queued'})
+            submit_ingest_job(video['id'], video_path, content_key=video.get('blob_hash'))
+        else:
+            update_video_fields(video['id'], {'ingest_status': 'failed'})
+    return len(pending)
+
+def pick_video_rendition(video, context='detail'):
+    """화면 용도(context)에 맞는 재생 경로 선택 - 변환본이 없으면 원본"""
+    renditions = video.get('renditions') or {}
+    for name in RENDITION_PREFERENCES.get(context, []):
+        path = renditions.get(name)
+        if path and os.path.exists(path):
+            return path
+    return video.get('video_path')
+
+# 밈 카드 생성 함수 (개선된 버전)
+def create_meme_card(dna_type_name, dna_data):
+    """DNA 영상 배경을 사용한 밈 카드 생성"""
+    width, height = 1080, 1080
+    
+    # 1. DNA 타입 영상에서 프레임 캡쳐 시도
+    video_path = f"videos/{dna_data['video_file']}"
+    background = capture_video_frame(video_path, frame_position=0.5)
+    
+    if background:
+        # 이미지 크기 조정 (정사각형으로 크롭)
+        bg_width, bg_height = background.size
+        
+        # 중앙 크롭
+        if bg_width > bg_height:
+            left = (bg_width - bg_height) // 2
+            background = background.crop((left, 0, left + bg_height, bg_height))
+        else:
+            top = (bg_height - bg_width) // 2
+            background = background.crop((0, top, bg_width, top + bg_width))
+        
+        # 리사이즈
+        background = background.resize((width, height), Image.Resampling.LANCZOS)
+        
+        # 약간 어둡게 (텍스트 가독성 향상)
+        enhancer = ImageEnhance.Brightness(background)
+        background = enhancer.enhance(0.5)
+        
+        # 약간 블러 효과
+        background = background.filter(ImageFilter.GaussianBlur(2))
+    else:
+        # 영상이 없으면 단색 배경 사용
+        background = Image.new('RGB', (width, height), color=dna_data['color'])
+    
+    # 2. 반투명 오버레이 레이어 추가
+    overlay = Image.new('RGBA', (width, height), (0, 0, 0, 120))
+    background = background.convert('RGBA')
+    background = Image.alpha_composite(background, overlay)
+    
+    # 3. 텍스트 추가
+    draw = ImageDraw.Draw(background)
+    
+    # 폰트 로드 시도
+    try:
+        # Windows 한글 폰트
+        title_font = ImageFont.truetype("malgun.ttf", 90)
+        subtitle_font = ImageFont.truetype("malgun.ttf", 60)
+        hashtag_font = ImageFont.truetype("malgun.ttf", 45)
+    except:
+        try:
+            # 다른 한글 폰트 시도
+            title_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 90)
+            subtitle_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 60)
+            hashtag_font = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 45)
+        except:
+            # 기본 폰트
+            title_font = ImageFont.load_default()
+            subtitle_font = ImageFont.load_default()
+            hashtag_font = ImageFont.load_default()
+    
+    # 언어에 따른 텍스트
+    lang = st.session_state.get('language', 'ko')
+    
+    # 텍스트 위치 및 내용
+    texts = [
+        {
+            "text": f"{t('meme_i_am', lang)} {dna_type_name}!",
+            "font": title_font,
+            "position": (width//2, height//3),
+            "fill": "white"
+        },
+        {
+            "text": f"{dna_data['emoji']} {dna_data['title']}",
             "font": subtitle_font,
             "position": (width//2, height//2),
             "fill": "white"
@@ -3021,6 +5165,10 @@ def create_meme_gif(dna_type_name, dna_data, duration=3, fps=10, style='gradient
 # 메인 앱 로직
 def main():
     init_session_state()
+    start_library_thumbnail_warmup()
+    resume_pending_ingest_jobs()
+    calibrate_pose_models()   # 서버 프로세스당 1회 포즈 모델 등급 선택
+    get_progress_recorder().maybe_flush()
     
     # 재구성된 사이드바
     with st.sidebar:
@@ -3114,11 +5262,26 @@ def main():
             if st.button(t('custom_actions'), use_container_width=True):
                 st.session_state.current_step = 'custom_actions_setup'
                 st.rerun()
-            if st.button(t('org_logout'), use_container_width=True):
-                st.session_state.org_logged_in = False
-                st.session_state.org_id = None
-                st.session_state.user_role = None
+            if st.button(t('group_practice'), use_container_width=True):
+                st.session_state.current_step = 'group_practice'
                 st.rerun()
+            # 동작 연습 기록을 남길 학생 (진행 기록은 progress.json에 일괄 저장)
+            # 단체 전체 명단 대신 현재 선택 + 검색 결과 한 페이지만 불러옴
+            practice_student = get_practice_student()
+            if practice_student is None:
+                st.session_state.student_id = None
+            student_query = st.text_input("연습 학생 검색", key="practice_student_search",
+                                          placeholder="이름/이메일").strip()
+            candidates = [practice_student] if practice_student else []
+            if student_query:
+                found, _ = search_records_page(
+                    STUDENTS_FILE, 'org_id', st.session_state.org_id, student_query, ('name', 'email'),
+                    page_size=STUDENT_PAGE_SIZE)
+                candidates += [s for s in found if not practice_student or s['id'] != practice_student['id']]
+            student_labels = {s['id']: f"{s.get('name', '')} ({s.get('email') or '-'})" for s in candidates}
+            st.selectbox("연습 학생", [None] + [s['id'] for s in candidates], key="student_id",
+                         format_func=lambda sid: "선택 안 함" if sid is None else student_labels.get(sid, sid))
+            st.button(t('org_logout'), use_container_width=True, on_click=logout_org)
         else:
             if st.button(t('org_login'), use_container_width=True):
                 st.session_state.current_step = 'org_login'
@@ -3210,6 +5373,8 @@ def main():
         show_custom_actions_setup_page()
     elif st.session_state.current_step == 'org_statistics':
         show_org_statistics_page()
+    elif st.session_state.current_step == 'group_practice':
+        show_group_practice_page()
 
 def show_landing_page():
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -3411,10 +5576,7 @@ def show_result_page():
         cols = st.columns(min(3, len(dna_videos)))
         for i, video in enumerate(sorted(dna_videos, key=lambda x: x.get('created_at', ''), reverse=True)[:3]):
             with cols[i % 3]:
-                try:
-                    st.video(video.get('video_path'))
-                except:
-                    st.info("영상 로드 중...")
+                show_video_thumbnail(video.get('video_path'), video['id'], get_record_thumbnails(video))
                 st.markdown(f"**{video.get('title', '')}**")
                 expert = get_experts().get(video.get('expert_id', ''), {})
                 st.markdown(f"👤 {expert.get('name', '전문가')}")
@@ -3643,10 +5805,6 @@ def show_action_page():
         return
 
     # ===== WebRTC 방식으로 변경 (모바일 지원) =====
-    from queue import Queue
-
-    result_queue = Queue()
-
     # 세션 상태 초기화 (웹캠 제어용)
     if 'action_webcam_running' not in st.session_state:
         st.session_state.action_webcam_running = False
@@ -3689,7 +5847,7 @@ def show_action_page():
 
     if st.session_state.action_webcam_running:
         # MediaPipe Pose Landmarker 초기화 (두 개 모두 VIDEO 모드)
-        pose_model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
+        pose_model_path = get_pose_model_path()
 
         # 전문가 영상용 VIDEO 모드
         expert_base_options = python.BaseOptions(model_asset_path=pose_model_path)
@@ -3737,18 +5895,27 @@ def show_action_page():
         user_hand_landmarker = vision.HandLandmarker.create_from_options(user_hand_options)
 
         # 전문가 영상 캡처 초기화
+        # skeleton 영상은 프로세스/디스크 공유 캐시 - 있으면 그대로 재생하고 프레임마다 전문가 포즈를 다시 감지하지 않음
         expert_cap = None
-        expert_landmarks = None
+        skeleton_video_path = None
         if os.path.exists(video_path):
-            expert_cap = cv2.VideoCapture(video_path)
+            with st.spinner("전문가 영상에 Skeleton 적용 중... (최초 1회만)"):
+                skeleton_video_path = get_expert_skeleton_video(video_path)
+            expert_cap = cv2.VideoCapture(skeleton_video_path or video_path)
             expert_fps = expert_cap.get(cv2.CAP_PROP_FPS) or 30
         else:
             expert_video_placeholder.info(f"{action['name']} 시범 영상 - 업로드 예정")
 
+        # 전문가 키포즈 라이브러리 (영상별 최초 1회 추출 후 공유), 실패 시 대표 자세 1개로 비교
+        with st.spinner("전문가 대표 자세 분석 중... (최초 1회만)"):
+            expert_keyposes = get_expert_keyposes(video_path)
+        expert_landmarks = None if expert_keyposes is not None else get_expert_landmarks(video_path)
+
         # 웹캠 초기화
         cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_RESOLUTION[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_RESOLUTION[1])
+        resolution_controller = ResolutionController()
 
         # 타임스탬프 초기화
         expert_timestamp_ms = 0
@@ -3760,8 +5927,10 @@ def show_action_page():
         last_comparison_frame = -30  # 첫 프레임부터 즉시 비교 시작
 
         # 랜드마크 초기화
-        expert_landmarks = None
         user_landmarks = None
+        user_hands = []
+        user_smoother = LandmarkSmoother()
+        score_aggregator = PoseScoreAggregator()
 
         try:
             while st.session_state.action_webcam_running:
@@ -3777,21 +5946,24 @@ def show_action_page():
                     if ret_expert:
                         expert_frame_rgb = cv2.cvtColor(expert_frame, cv2.COLOR_BGR2RGB)
 
-                        # MediaPipe Image로 변환
-                        expert_mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=expert_frame_rgb)
+                        # skeleton 영상 생성에 실패한 경우에만 프레임마다 직접 감지해서 그림
+                        if skeleton_video_path is None:
+                            # MediaPipe Image로 변환
+                            expert_mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=expert_frame_rgb)
 
-                        # Pose 감지
-                        expert_result = expert_pose_landmarker.detect_for_video(expert_mp_image, expert_timestamp_ms)
+                            # Pose 감지
+                            expert_result = expert_pose_landmarker.detect_for_video(expert_mp_image, expert_timestamp_ms)
 
-                        # Pose 랜드마크 그리기
-                        if expert_result.pose_landmarks:
-                            expert_frame_rgb = draw_landmarks_on_image(expert_frame_rgb, expert_result)
-                            expert_landmarks = expert_result.pose_landmarks[0]
+                            # Pose 랜드마크 그리기
+                            if expert_result.pose_landmarks:
+                                expert_frame_rgb = draw_landmarks_on_image(expert_frame_rgb, expert_result)
+                                if expert_keyposes is None:
+                                    expert_landmarks = expert_result.pose_landmarks[0]
 
-                        # Hand 감지 및 그리기
-                        expert_hand_result = expert_hand_landmarker.detect_for_video(expert_mp_image, expert_timestamp_ms)
-                        if expert_hand_result.hand_landmarks:
-                            expert_frame_rgb = draw_hands_on_image(expert_frame_rgb, expert_hand_result)
+                            # Hand 감지 및 그리기
+                            expert_hand_result = expert_hand_landmarker.detect_for_video(expert_mp_image, expert_timestamp_ms)
+                            if expert_hand_result.hand_landmarks:
+                                expert_frame_rgb = draw_hands_on_image(expert_frame_rgb, expert_hand_result)
 
                         # 전문가 영상 표시
                         expert_video_placeholder.image(expert_frame_rgb, channels="RGB", use_container_width=True)
@@ -3812,22 +5984,49 @@ def show_action_page():
                 # 좌우 반전 (거울 효과)
                 user_frame_rgb = cv2.flip(user_frame_rgb, 1)
 
-                # MediaPipe Image로 변환
-                user_mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=user_frame_rgb)
+                # Pose/Hand 감지 (LANDMARK_DETECT_EVERY 프레임마다, 나머지는 스무딩 필터로 예측)
+                # 감지는 해상도 조절기가 고른 크기로 축소한 복사본에서 실행
+                user_time_s = user_timestamp_ms / 1000
+                if user_frame_count % LANDMARK_DETECT_EVERY == 0:
+                    detect_start = time.perf_counter()
+                    user_mp_image = mp.Image(image_format=mp.ImageFormat.SRGB,
+                                             data=resolution_controller.downscale(user_frame_rgb))
+                    user_result = user_pose_landmarker.detect_for_video(user_mp_image, user_timestamp_ms)
+                    if user_result.pose_landmarks:
+                        user_landmarks = user_smoother.smooth_pose(user_result.pose_landmarks[0], user_time_s)
+                    else:
+                        user_smoother.reset_pose()
+                        user_landmarks = None
+                    user_hand_result = user_hand_landmarker.detect_for_video(user_mp_image, user_timestamp_ms)
+                    user_hands = user_smoother.smooth_hands(user_hand_result, user_time_s)
+                    resolution_controller.report(
+                        (time.perf_counter() - detect_start) * 1000,
+                        pose_confidence(user_result.pose_landmarks[0] if user_result.pose_landmarks else None)
+                    )
+                else:
+                    user_landmarks = user_smoother.predict_pose(user_time_s)
+                    user_hands = user_smoother.predict_hands(user_time_s)
 
-                # Pose 감지 (매 프레임)
-                user_result = user_pose_landmarker.detect_for_video(user_mp_image, user_timestamp_ms)
+                # 프레임별 빠른 점수 → 이동 평균/EMA/최고점 집계
+                score_aggregator.update(
+                    fast_pose_score(user_landmarks, expert_keyposes, expert_landmarks), user_time_s
+                )
+                score_snapshot = score_aggregator.snapshot()
+                st.session_state.comparison_score = score_snapshot['ema']
 
                 # 랜드마크 그리기
-                if user_result.pose_landmarks:
-                    user_frame_rgb = draw_landmarks_on_image(user_frame_rgb, user_result)
-                    user_landmarks = user_result.pose_landmarks[0]
+                if user_landmarks:
+                    user_frame_rgb = draw_landmarks_on_image(user_frame_rgb, SimpleNamespace(pose_landmarks=[user_landmarks]))
 
-                    # 자세 비교 (1초마다 한번)
+                    # 상세 비교 - 피드백 문장 (1초마다 한번)
                     if user_frame_count - last_comparison_frame >= comparison_interval:
-                        if expert_landmarks:
+                        comparison_result = None
+                        if expert_keyposes is not None:
+                            # 가장 가까운 전문가 키포즈와 비교
+                            comparison_result = compare_with_keyposes(user_landmarks, expert_keyposes)
+                        elif expert_landmarks:
                             comparison_result = compare_poses(user_landmarks, expert_landmarks)
-                            st.session_state.comparison_score = comparison_result['overall_score']
+                        if comparison_result:
                             st.session_state.comparison_feedback = comparison_result['feedback']
                             st.session_state.joint_coverage_percent = comparison_result['joint_coverage_percent']
                             last_comparison_frame = user_frame_count
@@ -3836,10 +6035,9 @@ def show_action_page():
                     cv2.putText(user_frame_rgb, 'Pose: Not Detected', (10, 30),
                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
 
-                # Hand 감지 및 그리기
-                user_hand_result = user_hand_landmarker.detect_for_video(user_mp_image, user_timestamp_ms)
-                if user_hand_result.hand_landmarks:
-                    user_frame_rgb = draw_hands_on_image(user_frame_rgb, user_hand_result)
+                # Hand 그리기
+                if user_hands:
+                    user_frame_rgb = draw_hands_on_image(user_frame_rgb, SimpleNamespace(hand_landmarks=user_hands))
 
                 # 사용자 웹캠 표시
                 user_video_placeholder.image(user_frame_rgb, channels="RGB", use_container_width=True)
@@ -3851,6 +6049,8 @@ def show_action_page():
                     # 점수와 감지율을 같은 줄에 표시
                     coverage_percent = st.session_state.get('joint_coverage_percent', 100)
                     feedback_text = f"**{score_color} {st.session_state.comparison_score:.0f}점, 카메라에 감지된 관절: {coverage_percent}%**\n\n"
+                    feedback_text += (f"최고 {score_snapshot['best']:.0f}점 · "
+                                      f"{SCORE_PASS_THRESHOLD}점 이상 {score_snapshot['time_above']:.1f}초\n\n")
 
                     if st.session_state.comparison_feedback:
                         # 각 피드백 항목 사이에 줄바꿈 추가
@@ -3860,7 +6060,7 @@ def show_action_page():
                         feedback_text += "🟢 완벽합니다!"
 
                     feedback_placeholder.markdown(feedback_text)
-                elif user_result.pose_landmarks and expert_landmarks:
+                elif user_landmarks and (expert_landmarks or expert_keyposes is not None):
                     feedback_placeholder.info("분석 중...")
                 else:
                     feedback_placeholder.info("전신이 보이도록 자세를 취해주세요")
@@ -3883,6 +6083,20 @@ def show_action_page():
             expert_hand_landmarker.close()
             user_hand_landmarker.close()
             st.session_state.action_webcam_running = False
+
+            # 연습 시도 기록 (버퍼에 추가, 저장은 ProgressRecorder가 일괄 처리)
+            practice_student = get_practice_student()
+            final_snapshot = score_aggregator.snapshot()
+            if practice_student and final_snapshot['frames']:
+                get_progress_recorder().record_attempt(
+                    student_id=practice_student['id'],
+                    org_id=practice_student.get('org_id'),
+                    instructor_id=practice_student.get('instructor_id'),
+                    action_key=f"basic:{st.session_state.current_action}",
+                    action_name=action['name'],
+                    score=final_snapshot['best'],
+                    completed=final_snapshot['ema'] >= SCORE_PASS_THRESHOLD
+                )
     else:
         # 웹캠 중지 상태일 때
         if os.path.exists(video_path):
@@ -3919,381 +6133,6 @@ def show_action_page():
         st.session_state.badges.append(completed_count)
         st.success(f"{badge['emoji']} {badge['name']} {t('badge_earned')} {badge['message']}")
 
-    return  # 여기서 함수 종료
-
-    # ===== 아래 코드는 사용되지 않음 (삭제 대상) =====
-    # 전문가 영상 처리 함수 (skeleton 그리기)
-    def process_expert_video_with_skeleton(expert_video_path):
-        """전문가 영상에 skeleton을 그려서 새 영상 생성"""
-        if not os.path.exists(expert_video_path):
-            return None
-
-        try:
-            # 출력 파일 경로
-            output_dir = "data/processed_videos"
-            os.makedirs(output_dir, exist_ok=True)
-            video_filename = os.path.basename(expert_video_path)
-            output_path = os.path.join(output_dir, f"skeleton_{video_filename}")
-
-            # 이미 처리된 파일이 있으면 반환
-            if os.path.exists(output_path):
-                return output_path
-
-            # MediaPipe 초기화
-            pose_model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
-            pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
-            pose_options = vision.PoseLandmarkerOptions(
-                base_options=pose_base_options,
-                running_mode=vision.RunningMode.VIDEO
-            )
-            pose_landmarker = vision.PoseLandmarker.create_from_options(pose_options)
-
-            hand_model_path = os.path.join(os.path.dirname(__file__), "models", "hand_landmarker.task")
-            hand_base_options = python.BaseOptions(model_asset_path=hand_model_path)
-            hand_options = vision.HandLandmarkerOptions(
-                base_options=hand_base_options,
-                running_mode=vision.RunningMode.VIDEO,
-                num_hands=2
-            )
-            hand_landmarker = vision.HandLandmarker.create_from_options(hand_options)
-
-            # 영상 읽기
-            cap = cv2.VideoCapture(expert_video_path)
-            fps = cap.get(cv2.CAP_PROP_FPS) or 30
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-            # 비디오 writer 설정
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-            frame_timestamp_ms = 0
-            frame_count = 0
-
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # RGB 변환
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-                frame_timestamp_ms = int(frame_count * 1000 / fps)
-
-                # Pose detection
-                pose_result = pose_landmarker.detect_for_video(mp_image, frame_timestamp_ms)
-                if pose_result.pose_landmarks:
-                    frame_rgb = draw_landmarks_on_image(frame_rgb, pose_result)
-
-                # Hand detection
-                hand_result = hand_landmarker.detect_for_video(mp_image, frame_timestamp_ms)
-                if hand_result.hand_landmarks:
-                    frame_rgb = draw_hands_on_image(frame_rgb, hand_result)
-
-                # BGR로 변환하여 저장
-                frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-                out.write(frame_bgr)
-
-                frame_count += 1
-
-            cap.release()
-            out.release()
-
-            return output_path
-
-        except Exception as e:
-            print(f"전문가 영상 처리 실패: {e}")
-            return None
-
-    # 전문가 영상에서 대표 자세 landmarks 추출
-    def extract_expert_landmarks(expert_video_path):
-        """전문가 영상의 중간 프레임에서 landmarks 추출"""
-        if not os.path.exists(expert_video_path):
-            return None
-
-        try:
-            # MediaPipe 초기화
-            pose_model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
-            pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
-            pose_options = vision.PoseLandmarkerOptions(
-                base_options=pose_base_options,
-                running_mode=vision.RunningMode.IMAGE
-            )
-            pose_landmarker = vision.PoseLandmarker.create_from_options(pose_options)
-
-            # 영상 열기
-            cap = cv2.VideoCapture(expert_video_path)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            mid_frame = total_frames // 2
-
-            # 중간 프레임으로 이동
-            cap.set(cv2.CAP_PROP_POS_FRAMES, mid_frame)
-            ret, frame = cap.read()
-            cap.release()
-
-            if ret:
-                # RGB로 변환
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-
-                # Pose 감지
-                result = pose_landmarker.detect(mp_image)
-                if result.pose_landmarks:
-                    return result.pose_landmarks[0]
-
-            return None
-        except Exception as e:
-            print(f"Expert landmarks 추출 실패: {e}")
-            return None
-
-    # 전문가 영상 처리 (skeleton 그리기) - 캐싱
-    if 'expert_video_processed_cache' not in st.session_state:
-        st.session_state.expert_video_processed_cache = {}
-
-    if video_path not in st.session_state.expert_video_processed_cache:
-        with st.spinner("전문가 영상에 Skeleton 적용 중... (최초 1회만)"):
-            processed_video_path = process_expert_video_with_skeleton(video_path)
-            st.session_state.expert_video_processed_cache[video_path] = processed_video_path
-    else:
-        processed_video_path = st.session_state.expert_video_processed_cache[video_path]
-
-    # 전문가 landmarks 미리 추출 (캐싱)
-    if 'expert_landmarks_cache' not in st.session_state:
-        st.session_state.expert_landmarks_cache = {}
-
-    if video_path not in st.session_state.expert_landmarks_cache:
-        expert_landmarks = extract_expert_landmarks(video_path)
-        st.session_state.expert_landmarks_cache[video_path] = expert_landmarks
-    else:
-        expert_landmarks = st.session_state.expert_landmarks_cache[video_path]
-
-    # Factory 함수로 expert_landmarks를 closure로 캡처
-    def create_action_processor(expert_lm):
-        """사용자 영상만 처리하고 전문가 landmarks와 비교"""
-
-        class ActionVideoProcessor:
-            def __init__(self):
-                self.lock = threading.Lock()
-                self.pose_landmarker = None
-                self.hand_landmarker = None
-                self.frame_timestamp_ms = 0
-                self.frame_count = 0
-                self.prev_time = time.time()
-                self.fps = 0
-                self.expert_landmarks = expert_lm
-                self.comparison_interval = 30  # 1초에 한 번 비교
-                self.last_comparison_frame = -30
-
-            def _initialize_landmarkers(self):
-                """MediaPipe 초기화 - Pose + Hand"""
-                # PoseLandmarker 초기화
-                pose_model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
-                pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
-                pose_options = vision.PoseLandmarkerOptions(
-                    base_options=pose_base_options,
-                    running_mode=vision.RunningMode.VIDEO,
-                    min_pose_detection_confidence=0.3,  # 낮춰서 빠르게
-                    min_tracking_confidence=0.3
-                )
-                self.pose_landmarker = vision.PoseLandmarker.create_from_options(pose_options)
-
-                # HandLandmarker 초기화
-                hand_model_path = os.path.join(os.path.dirname(__file__), "models", "hand_landmarker.task")
-                hand_base_options = python.BaseOptions(model_asset_path=hand_model_path)
-                hand_options = vision.HandLandmarkerOptions(
-                    base_options=hand_base_options,
-                    running_mode=vision.RunningMode.VIDEO,
-                    num_hands=2,
-                    min_hand_detection_confidence=0.3,
-                    min_tracking_confidence=0.3
-                )
-                self.hand_landmarker = vision.HandLandmarker.create_from_options(hand_options)
-
-            def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
-                """사용자 프레임 처리 - Hand만 간헐적으로 감지"""
-                if not self.pose_landmarker:
-                    self._initialize_landmarkers()
-
-                # 사용자 프레임 처리
-                img = frame.to_ndarray(format="bgr24")
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                img_rgb = cv2.flip(img_rgb, 1)  # 거울 효과
-
-                # 처리 속도 향상을 위해 이미지 크기 조정 (선택적)
-                h, w = img_rgb.shape[:2]
-                if w > 640:
-                    scale = 640 / w
-                    img_rgb = cv2.resize(img_rgb, (640, int(h * scale)))
-
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-                self.frame_timestamp_ms += 33
-
-                # 사용자 자세 감지 (매 프레임)
-                user_result = self.pose_landmarker.detect_for_video(mp_image, self.frame_timestamp_ms)
-
-                # Pose 랜드마크 그리기
-                user_landmarks = None
-                if user_result.pose_landmarks:
-                    img_rgb = draw_landmarks_on_image(img_rgb, user_result)
-                    user_landmarks = user_result.pose_landmarks[0]
-                else:
-                    cv2.putText(img_rgb, 'Pose: Not Detected', (10, 60),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-
-                # Hand 감지 (매 프레임)
-                if self.hand_landmarker:
-                    user_hand_result = self.hand_landmarker.detect_for_video(mp_image, self.frame_timestamp_ms)
-                    if user_hand_result.hand_landmarks:
-                        img_rgb = draw_hands_on_image(img_rgb, user_hand_result)
-
-                # 자세 비교 (1초마다)
-                if (self.frame_count - self.last_comparison_frame >= self.comparison_interval):
-                    if user_landmarks and self.expert_landmarks:
-                        try:
-                            comparison = compare_poses(user_landmarks, self.expert_landmarks)
-                            result_queue.put(comparison)
-                            self.last_comparison_frame = self.frame_count
-                        except:
-                            pass
-
-                # FPS 표시
-                current_time = time.time()
-                self.fps = 1 / (current_time - self.prev_time) if (current_time - self.prev_time) > 0 else 0
-                self.prev_time = current_time
-                cv2.putText(img_rgb, f'FPS: {int(self.fps)}', (10, 30),
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-                # 프레임 카운트 증가
-                self.frame_count += 1
-
-                img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-                return av.VideoFrame.from_ndarray(img_bgr, format="bgr24")
-
-        return ActionVideoProcessor
-
-    # UI 레이아웃
-    st.markdown("### 📹 실시간 동작 비교")
-    st.info("👇 **왼쪽 전문가 영상**을 보며 **오른쪽 START 버튼**을 클릭하여 따라해보세요!")
-
-    # 좌우 분할 레이아웃
-    col_left, col_right = st.columns(2)
-
-    with col_left:
-        st.markdown("""
-        <div style='text-align: center; padding: 0.5rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 8px; margin-bottom: 0.5rem;'>
-            <strong>🎯 전문가 시연 (Skeleton)</strong>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # 전문가 영상 재생 (Skeleton 그려진 버전)
-        if processed_video_path and os.path.exists(processed_video_path):
-            st.video(processed_video_path, loop=True, autoplay=True)
-        elif os.path.exists(video_path):
-            st.video(video_path, loop=True, autoplay=True)
-        else:
-            st.warning("전문가 영상을 찾을 수 없습니다.")
-
-    with col_right:
-        st.markdown("""
-        <div style='text-align: center; padding: 0.5rem; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white; border-radius: 8px; margin-bottom: 0.5rem;'>
-            <strong>📹 내 모습 (Skeleton)</strong>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # WebRTC 스트리머 (사용자 웹캠만)
-        webrtc_ctx = webrtc_streamer(
-            key="action-comparison",
-            mode=WebRtcMode.SENDRECV,
-            rtc_configuration={
-                "iceServers": [
-                    {"urls": ["stun:stun.l.google.com:19302"]},
-                ]
-            },
-            video_processor_factory=create_action_processor(expert_landmarks),
-            media_stream_constraints={
-                "video": {
-                    "width": {"ideal": 640},
-                    "height": {"ideal": 480},
-                    "frameRate": {"ideal": 15, "max": 20}
-                },
-                "audio": False
-            },
-            async_processing=True,
-        )
-
-    # 피드백 UI - 영상 바로 밑에 배치
-    st.markdown("---")
-
-    if webrtc_ctx.state.playing:
-        st.success("✅ 웹캠 실행 중 - 자세를 취해보세요!")
-
-        # Queue에서 최신 결과 가져오기 (논블로킹)
-        try:
-            result = result_queue.get_nowait()
-            st.session_state.comparison_score = result['overall_score']
-            st.session_state.latest_comparison = result
-
-            # 80점 달성 시 완료 처리
-            if result['overall_score'] >= 80:
-                if st.session_state.current_action not in st.session_state.completed_actions:
-                    st.session_state.completed_actions.append(st.session_state.current_action)
-                st.balloons()
-                st.session_state.action_completed_just_now = True
-                st.rerun()
-        except:
-            # Queue가 비어있으면 이전 결과 사용
-            pass
-
-        # 피드백 표시
-        if 'latest_comparison' in st.session_state and st.session_state.latest_comparison:
-            result = st.session_state.latest_comparison
-
-            # 점수 표시
-            score = result['overall_score']
-            score_emoji = "🟢" if score >= 80 else "🟡" if score >= 60 else "🔴"
-
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("전체 점수", f"{score:.0f}점",
-                        delta=f"{score_emoji} {'우수' if score >= 80 else '양호' if score >= 60 else '연습 필요'}")
-            with col2:
-                st.metric("관절 감지", f"{result['joint_coverage_percent']}%",
-                        delta="✓ 감지됨" if result['joint_coverage_percent'] > 50 else "⚠️ 재조정 필요")
-            with col3:
-                target_score = 80
-                remaining = max(0, target_score - score)
-                st.metric("목표까지", f"{remaining:.0f}점",
-                        delta="✅ 완료!" if score >= target_score else f"📈 {remaining}점 남음")
-
-            # 개선 조언 표시
-            feedback_list = result.get('feedback', [])
-            if feedback_list:
-                st.markdown("### 💡 개선 포인트")
-                for fb in feedback_list[:3]:
-                    st.info(fb)
-            else:
-                st.success("🟢 완벽합니다!")
-    else:
-        st.info("👆 위의 START 버튼을 눌러 카메라를 활성화하세요")
-
-    # 동작완료(수동) 버튼
-    st.markdown("---")
-    if st.button(t('action_complete_manual'), help=t('ai_judgement'), use_container_width=True):
-        if st.session_state.current_action not in st.session_state.completed_actions:
-            st.session_state.completed_actions.append(st.session_state.current_action)
-        st.session_state.current_action += 1
-        st.rerun()
-
-    # Badge check
-    completed_count = len(st.session_state.completed_actions)
-    badge_system = get_badge_system(st.session_state.language)
-    if completed_count in badge_system and completed_count not in st.session_state.badges:
-        badge = badge_system[completed_count]
-        st.session_state.badges.append(completed_count)
-        st.success(f"{badge['emoji']} {badge['name']} {t('badge_earned')} {badge['message']}")
-
-    return  # 여기서 함수 종료
-
 
 def show_expanded_action_page():
     # 모바일 반응형 스타일 추가
@@ -4636,10 +6475,8 @@ def show_dna_gallery_page():
                 
                 # 영상
                 video_path = f"videos/{dna_data['video_file']}"
-                try:
-                    st.video(video_path)
-                except:
-                    st.info(f"{t('expert_video')} - {t('coming_soon')}")
+                show_video_thumbnail(video_path, f"library_{dna_name}",
+                                     fallback_text=f"{t('expert_video')} - {t('coming_soon')}")
                 
                 st.markdown("---")
     
@@ -4673,10 +6510,8 @@ def show_dna_gallery_page():
                 
                 # 영상
                 video_path = f"videos/{dna_data['video_file']}"
-                try:
-                    st.video(video_path)
-                except:
-                    st.info(f"{t('expert_video')} - {t('coming_soon')}")
+                show_video_thumbnail(video_path, f"library_{dna_name}",
+                                     fallback_text=f"{t('expert_video')} - {t('coming_soon')}")
                 
                 st.markdown("---")
     
@@ -4710,10 +6545,8 @@ def show_dna_gallery_page():
                 
                 # 영상
                 video_path = f"videos/{dna_data['video_file']}"
-                try:
-                    st.video(video_path)
-                except:
-                    st.info(f"{t('expert_video')} - {t('coming_soon')}")
+                show_video_thumbnail(video_path, f"library_{dna_name}",
+                                     fallback_text=f"{t('expert_video')} - {t('coming_soon')}")
                 
                 st.markdown("---")
     
@@ -4747,10 +6580,8 @@ def show_dna_gallery_page():
                 
                 # 영상
                 video_path = f"videos/{dna_data['video_file']}"
-                try:
-                    st.video(video_path)
-                except:
-                    st.info(f"{t('expert_video')} - {t('coming_soon')}")
+                show_video_thumbnail(video_path, f"library_{dna_name}",
+                                     fallback_text=f"{t('expert_video')} - {t('coming_soon')}")
                 
                 st.markdown("---")
     
@@ -5116,6 +6947,36 @@ def show_meme_page():
     
     st.success(success_message)
 
+# ==================== 페이지 이동 컨트롤 ====================
+
+GALLERY_PAGE_SIZE = 9   # 3열 그리드 × 3줄
+PROFILE_PAGE_SIZE = 5
+COMMENT_PAGE_SIZE = 10
+STUDENT_PAGE_SIZE = 50
+
+def get_page_cursor(state_key):
+    """현재 페이지의 cursor (session_state에 페이지별 cursor 스택 보관)"""
+    stack_key = f"page_cursors_{state_key}"
+    if stack_key not in st.session_state:
+        st.session_state[stack_key] = [None]
+    return st.session_state[stack_key][-1]
+
+def show_page_controls(state_key, next_cursor):
+    """이전/다음 페이지 버튼"""
+    stack = st.session_state[f"page_cursors_{state_key}"]
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("◀ 이전", key=f"{state_key}_prev", disabled=len(stack) <= 1, width='stretch'):
+            stack.pop()
+            st.rerun()
+    with col_info:
+        st.markdown(f"<div style='text-align: center; padding-top: 0.5rem;'>{len(stack)} 페이지</div>",
+                    unsafe_allow_html=True)
+    with col_next:
+        if st.button("다음 ▶", key=f"{state_key}_next", disabled=next_cursor is None, width='stretch'):
+            stack.append(next_cursor)
+            st.rerun()
+
 # ==================== 전문가 시스템 페이지 ====================
 
 def show_expert_login_page():
@@ -5173,7 +7034,7 @@ def show_expert_signup_page():
                     if any(e.get('email') == email for e in experts.values()):
                         st.error("이미 등록된 이메일입니다.")
                     else:
-                        expert_id = f"expert_{int(time.time())}"
+                        expert_id = generate_id("expert")
                         expert_data = {
                             'id': expert_id,
                             'name': name,
@@ -5220,13 +7081,21 @@ def show_expert_upload_page():
         
         if st.button("업로드", type="primary", width='stretch'):
             if title and video_file:
-                # 영상 저장
-                video_id = f"video_{int(time.time())}"
-                video_filename = f"{video_id}_{video_file.name}"
-                video_path = EXPERT_VIDEOS_DIR / video_filename
+                # 영상 저장 (내용 해시 기준 blob - 같은 영상은 한 번만 저장)
+                video_id = generate_id("video")
+                
+                if video_file.size and video_file.size > MAX_UPLOAD_BYTES:
+                    st.error(f"영상 파일은 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB 이하만 업로드할 수 있습니다.")
+                    return
+                try:
+                    video_path, content_hash, file_size, _ = store_upload_as_blob(video_file)
+                except ValueError as e:
+                    st.error(str(e))
+                    return
                 
-                with open(video_path, "wb") as f:
-                    f.write(video_file.getbuffer())
+                # 그리드용 포스터/미리보기 생성 (blob 해시 기준 캐시 - 중복 영상은 재사용)
+                with st.spinner("썸네일 생성 중..."):
+                    thumbnails = get_video_thumbnails(str(video_path), cache_key=content_hash)
                 
                 # 영상 데이터 저장
                 video_data = {
@@ -5237,12 +7106,21 @@ def show_expert_upload_page():
                     'dna_type': selected_dna_type,
                     'tags': [tag.strip() for tag in tags.split(',')] if tags else [],
                     'video_path': str(video_path),
+                    'blob_hash': content_hash,
+                    'original_filename': video_file.name,
+                    'file_size': file_size,
+                    'thumbnail_path': thumbnails['poster'],
+                    'preview_path': thumbnails['preview'],
                     'created_at': datetime.now().isoformat(),
                     'likes': 0,
                     'comments': 0,
-                    'views': 0
+                    'views': 0,
+                    'renditions': {},
+                    'ingest_status': 'queued'
                 }
                 save_video(video_id, video_data)
+                # 해상도별 변환은 백그라운드에서 진행 (완료 전에는 원본 재생)
+                submit_ingest_job(video_id, video_path, content_key=content_hash)
                 st.success(t('upload_success'))
                 st.session_state.current_step = 'expert_profile'
                 st.rerun()
@@ -5262,8 +7140,10 @@ def show_expert_profile_page():
         return
     
     expert = get_experts().get(st.session_state.expert_id, {})
-    videos = get_videos()
-    expert_videos = [v for v in videos.values() if v.get('expert_id') == st.session_state.expert_id]
+    page_key = f"profile_{st.session_state.expert_id}"
+    expert_videos, next_cursor, total_videos = query_records_page(
+        VIDEOS_FILE, 'expert_id', st.session_state.expert_id,
+        cursor=get_page_cursor(page_key), page_size=PROFILE_PAGE_SIZE)
     reputation_score = calculate_reputation_score(st.session_state.expert_id)
     reputation_level = get_reputation_level(reputation_score)
     
@@ -5285,21 +7165,18 @@ def show_expert_profile_page():
         st.markdown(f"**{t('expert_name')}:** {expert.get('name', '')}")
         st.markdown(f"**{t('expert_bio')}:** {expert.get('bio', '')}")
         st.markdown(f"**{t('expert_specialty')}:** {expert.get('specialty', '')}")
-        st.markdown(f"**{t('total_videos')}:** {len(expert_videos)}개")
+        st.markdown(f"**{t('total_videos')}:** {total_videos}개")
     
     # 내 영상 목록
     st.markdown("---")
     st.markdown(f"### {t('expert_my_videos')}")
     
     if expert_videos:
-        for video in sorted(expert_videos, key=lambda x: x.get('created_at', ''), reverse=True):
+        for video in expert_videos:
             with st.container():
                 col1, col2 = st.columns([1, 2])
                 with col1:
-                    try:
-                        st.video(video.get('video_path'))
-                    except:
-                        st.info("영상 로드 중...")
+                    show_video_thumbnail(video.get('video_path'), video['id'], get_record_thumbnails(video))
                 with col2:
                     st.markdown(f"### {video.get('title', '')}")
                     st.markdown(f"**DNA 타입:** {video.get('dna_type', '')}")
@@ -5310,6 +7187,7 @@ def show_expert_profile_page():
                         st.session_state.current_step = 'video_detail'
                         st.rerun()
                 st.markdown("---")
+        show_page_controls(page_key, next_cursor)
     else:
         st.info(t('no_videos'))
     
@@ -5321,35 +7199,35 @@ def show_expert_gallery_page():
     """전문가 갤러리 페이지"""
     st.markdown(f"## {t('expert_gallery')}")
     
-    videos = get_videos()
     dna_types = get_dna_types(st.session_state.language)
     
     # DNA 타입별 필터
     dna_type_names = ["전체"] + list(dna_types.keys())
     selected_filter = st.selectbox("DNA 타입 필터", dna_type_names)
     
-    filtered_videos = videos.values()
-    if selected_filter != "전체":
-        filtered_videos = [v for v in filtered_videos if v.get('dna_type') == selected_filter]
+    page_key = f"expert_gallery_{selected_filter}"
+    group_field = None if selected_filter == "전체" else 'dna_type'
+    filtered_videos, next_cursor, _ = query_records_page(
+        VIDEOS_FILE, group_field, selected_filter,
+        cursor=get_page_cursor(page_key), page_size=GALLERY_PAGE_SIZE)
     
     if filtered_videos:
+        experts = get_experts()
         # 그리드 레이아웃으로 영상 표시
         cols = st.columns(3)
-        for i, video in enumerate(sorted(filtered_videos, key=lambda x: x.get('created_at', ''), reverse=True)):
+        for i, video in enumerate(filtered_videos):
             with cols[i % 3]:
                 with st.container():
-                    try:
-                        st.video(video.get('video_path'))
-                    except:
-                        st.info("영상 로드 중...")
+                    show_video_thumbnail(video.get('video_path'), video['id'], get_record_thumbnails(video))
                     st.markdown(f"**{video.get('title', '')}**")
-                    expert = get_experts().get(video.get('expert_id', ''), {})
+                    expert = experts.get(video.get('expert_id', ''), {})
                     st.markdown(f"👤 {expert.get('name', '전문가')}")
                     st.markdown(f"🎭 {video.get('dna_type', '')}")
                     if st.button(f"보기", key=f"gallery_{video['id']}"):
                         st.session_state.viewing_video_id = video['id']
                         st.session_state.current_step = 'video_detail'
                         st.rerun()
+        show_page_controls(page_key, next_cursor)
     else:
         st.info(t('no_videos'))
 
@@ -5357,32 +7235,15 @@ def show_expert_ranking_page():
     """전문가 랭킹 페이지"""
     st.markdown(f"## {t('expert_ranking')}")
     
-    experts = get_experts()
-    expert_scores = []
-    
-    for expert_id, expert_data in experts.items():
-        score = calculate_reputation_score(expert_id)
-        expert_scores.append({
-            'expert_id': expert_id,
-            'expert_data': expert_data,
-            'score': score
-        })
-    
-    expert_scores.sort(key=lambda x: x['score'], reverse=True)
+    expert_scores = compute_expert_rankings()
     
     if expert_scores:
         for rank, item in enumerate(expert_scores, 1):
             expert = item['expert_data']
             score = item['score']
             level = get_reputation_level(score)
-            
-            videos = get_videos()
-            expert_videos = [v for v in videos.values() if v.get('expert_id') == item['expert_id']]
-            feedbacks = get_feedback()
-            video_ids = [v['id'] for v in expert_videos]
-            expert_feedbacks = [f for f in feedbacks.values() if f.get('video_id') in video_ids]
-            total_likes = sum(1 for f in expert_feedbacks if f.get('type') == 'like')
-            total_comments = sum(1 for f in expert_feedbacks if f.get('type') == 'comment')
+            total_likes = item['total_likes']
+            total_comments = item['total_comments']
             
             with st.container():
                 col1, col2, col3 = st.columns([1, 3, 2])
@@ -5401,7 +7262,7 @@ def show_expert_ranking_page():
                 with col3:
                     st.markdown(f"**{t('reputation_score')}:** {score}점")
                     st.markdown(f"**{t('reputation_level')}:** {level['level']}")
-                    st.markdown(f"**{t('total_videos')}:** {len(expert_videos)}개")
+                    st.markdown(f"**{t('total_videos')}:** {item['video_count']}개")
                     st.markdown(f"**{t('total_likes')}:** {total_likes}개")
                     st.markdown(f"**{t('total_comments')}:** {total_comments}개")
                     if st.button(f"{t('view_profile')}", key=f"rank_{item['expert_id']}"):
@@ -5432,26 +7293,27 @@ def show_dna_type_gallery_page():
     else:
         selected_dna_type = st.selectbox("DNA 타입 선택", dna_type_names)
     
-    videos = get_videos()
-    dna_videos = [v for v in videos.values() if v.get('dna_type') == selected_dna_type]
+    page_key = f"dna_gallery_{selected_dna_type}"
+    dna_videos, next_cursor, total_videos = query_records_page(
+        VIDEOS_FILE, 'dna_type', selected_dna_type,
+        cursor=get_page_cursor(page_key), page_size=GALLERY_PAGE_SIZE)
     
     if dna_videos:
-        st.markdown(f"### {selected_dna_type} 영상 ({len(dna_videos)}개)")
+        st.markdown(f"### {selected_dna_type} 영상 ({total_videos}개)")
+        experts = get_experts()
         cols = st.columns(3)
-        for i, video in enumerate(sorted(dna_videos, key=lambda x: x.get('created_at', ''), reverse=True)):
+        for i, video in enumerate(dna_videos):
             with cols[i % 3]:
                 with st.container():
-                    try:
-                        st.video(video.get('video_path'))
-                    except:
-                        st.info("영상 로드 중...")
+                    show_video_thumbnail(video.get('video_path'), video['id'], get_record_thumbnails(video))
                     st.markdown(f"**{video.get('title', '')}**")
-                    expert = get_experts().get(video.get('expert_id', ''), {})
+                    expert = experts.get(video.get('expert_id', ''), {})
                     st.markdown(f"👤 {expert.get('name', '전문가')}")
                     if st.button(f"보기", key=f"dna_{video['id']}"):
                         st.session_state.viewing_video_id = video['id']
                         st.session_state.current_step = 'video_detail'
                         st.rerun()
+        show_page_controls(page_key, next_cursor)
     else:
         st.info(f"{selected_dna_type} 타입의 영상이 아직 없습니다.")
 
@@ -5463,7 +7325,7 @@ def show_video_detail_page():
         st.rerun()
         return
     
-    videos = get_videos()
+    _, videos = get_sorted_index(VIDEOS_FILE)
     video = videos.get(st.session_state.viewing_video_id)
     
     if not video:
@@ -5473,31 +7335,36 @@ def show_video_detail_page():
         return
     
     expert = get_experts().get(video.get('expert_id', ''), {})
-    feedbacks = get_feedback()
-    video_feedbacks = [f for f in feedbacks.values() if f.get('video_id') == st.session_state.viewing_video_id]
-    comments = [f for f in video_feedbacks if f.get('type') == 'comment']
-    likes = [f for f in video_feedbacks if f.get('type') == 'like']
+    feedback_group = ('video_id', 'type')
+    video_id = st.session_state.viewing_video_id
+    like_count = count_records(FEEDBACK_FILE, feedback_group, (video_id, 'like'))
+    comment_page_key = f"comments_{video_id}"
+    comments, next_comment_cursor, comment_count = query_records_page(
+        FEEDBACK_FILE, feedback_group, (video_id, 'comment'),
+        cursor=get_page_cursor(comment_page_key), page_size=COMMENT_PAGE_SIZE)
     
     st.markdown(f"## {video.get('title', '')}")
     
     col1, col2 = st.columns([2, 1])
     with col1:
         try:
-            st.video(video.get('video_path'))
+            st.video(pick_video_rendition(video, 'detail'))
         except:
             st.info("영상 로드 중...")
+        if video.get('ingest_status') in ('queued', 'processing'):
+            st.caption("⏳ 스트리밍용 영상 변환 중 - 완료 전까지 원본으로 재생됩니다")
     
     with col2:
         st.markdown(f"**👤 전문가:** {expert.get('name', '')}")
         st.markdown(f"**🎭 DNA 타입:** {video.get('dna_type', '')}")
         st.markdown(f"**📅 업로드:** {video.get('created_at', '')[:10]}")
-        st.markdown(f"**❤️ 좋아요:** {len(likes)}")
-        st.markdown(f"**💬 댓글:** {len(comments)}")
+        st.markdown(f"**❤️ 좋아요:** {like_count}")
+        st.markdown(f"**💬 댓글:** {comment_count}")
         
         # 좋아요 버튼
         like_key = f"like_{st.session_state.viewing_video_id}"
         if st.button(f"❤️ {t('like')}", key=like_key, width='stretch'):
-            feedback_id = f"feedback_{int(time.time())}"
+            feedback_id = generate_id("feedback")
             feedback_data = {
                 'id': feedback_id,
                 'video_id': st.session_state.viewing_video_id,
@@ -5511,7 +7378,7 @@ def show_video_detail_page():
         # 평점
         rating = st.slider(t('rating'), 1, 5, 3)
         if st.button("평점 등록", width='stretch'):
-            feedback_id = f"feedback_{int(time.time())}"
+            feedback_id = generate_id("feedback")
             feedback_data = {
                 'id': feedback_id,
                 'video_id': st.session_state.viewing_video_id,
@@ -5531,13 +7398,13 @@ def show_video_detail_page():
         st.markdown("**태그:** " + ", ".join([f"#{tag}" for tag in video.get('tags', [])]))
     
     st.markdown("---")
-    st.markdown(f"### {t('comment')} ({len(comments)}개)")
+    st.markdown(f"### {t('comment')} ({comment_count}개)")
     
     # 댓글 작성
     new_comment = st.text_area(t('write_comment'))
     if st.button(t('submit_comment')):
         if new_comment:
-            feedback_id = f"feedback_{int(time.time())}"
+            feedback_id = generate_id("feedback")
             feedback_data = {
                 'id': feedback_id,
                 'video_id': st.session_state.viewing_video_id,
@@ -5550,13 +7417,15 @@ def show_video_detail_page():
             st.rerun()
     
     # 댓글 목록
-    for comment in sorted(comments, key=lambda x: x.get('created_at', ''), reverse=True):
+    for comment in comments:
         st.markdown(f"""
         <div style='background: #f0f0f0; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
             <p>{comment.get('content', '')}</p>
             <small>{comment.get('created_at', '')[:16]}</small>
         </div>
         """, unsafe_allow_html=True)
+    if comment_count > COMMENT_PAGE_SIZE:
+        show_page_controls(comment_page_key, next_comment_cursor)
     
     if st.button("뒤로가기"):
         st.session_state.viewing_video_id = None
@@ -5630,7 +7499,7 @@ def show_org_signup_page():
                     if any(o.get('email') == email for o in orgs.values()):
                         st.error("이미 등록된 이메일입니다.")
                     else:
-                        org_id = f"org_{int(time.time())}"
+                        org_id = generate_id("org")
                         org_data = {
                             'id': org_id,
                             'name': name,
@@ -5645,7 +7514,7 @@ def show_org_signup_page():
                         save_organization(org_id, org_data)
                         
                         # 구독 생성
-                        sub_id = f"sub_{int(time.time())}"
+                        sub_id = generate_id("sub")
                         sub_data = {
                             'id': sub_id,
                             'org_id': org_id,
@@ -5682,11 +7551,7 @@ def show_org_dashboard_page():
     org_sub = next((s for s in subscriptions.values() if s.get('org_id') == st.session_state.org_id), None)
     plan = SUBSCRIPTION_PLANS.get(org_sub.get('plan', 'basic'), SUBSCRIPTION_PLANS['basic']) if org_sub else SUBSCRIPTION_PLANS['basic']
     
-    instructors = get_instructors()
-    org_instructors = [i for i in instructors.values() if i.get('org_id') == st.session_state.org_id]
-    
-    students = get_students()
-    org_students = [s for s in students.values() if s.get('org_id') == st.session_state.org_id]
+    dashboard_stats = compute_org_dashboard_stats(st.session_state.org_id)
     
     st.markdown(f"## {org.get('name', '단체')} {t('org_dashboard')}")
     
@@ -5695,17 +7560,12 @@ def show_org_dashboard_page():
     with col1:
         st.metric(t('current_plan'), plan['name'])
     with col2:
-        st.metric(t('total_instructors'), len(org_instructors))
+        st.metric(t('total_instructors'), dashboard_stats['instructor_count'])
     with col3:
-        st.metric(t('total_students'), len(org_students))
+        st.metric(t('total_students'), dashboard_stats['student_count'])
     with col4:
-        progress_data = get_progress()
-        org_progress = [p for p in progress_data.values() if p.get('org_id') == st.session_state.org_id]
-        if org_progress:
-            completed = sum(1 for p in org_progress if p.get('completed', False))
-            total = len(org_progress)
-            completion_rate = (completed / total * 100) if total > 0 else 0
-            st.metric(t('completion_rate'), f"{completion_rate:.1f}%")
+        if dashboard_stats['progress_total']:
+            st.metric(t('completion_rate'), f"{dashboard_stats['completion_rate']:.1f}%")
         else:
             st.metric(t('completion_rate'), "0%")
     
@@ -5733,12 +7593,8 @@ def show_org_dashboard_page():
     # 최근 활동
     st.markdown("---")
     st.markdown("### 최근 활동")
-    if org_students:
-        st.dataframe(pd.DataFrame([{
-            '학생명': s.get('name', ''),
-            '강사': next((i.get('name', '') for i in org_instructors if i.get('id') == s.get('instructor_id')), ''),
-            '상태': '활성'
-        } for s in org_students[:10]]), width='stretch')
+    if dashboard_stats['recent_activity']:
+        st.dataframe(pd.DataFrame(dashboard_stats['recent_activity']), width='stretch')
     else:
         st.info("등록된 학생이 없습니다.")
 
@@ -5787,6 +7643,46 @@ def show_subscription_management_page():
         st.session_state.current_step = 'org_dashboard'
         st.rerun()
 
+def show_roster_import_section(kind, org_id, current_count, max_count):
+    """학생/강사 관리 페이지의 CSV/XLSX 일괄 등록 영역"""
+    spec = ROSTER_COLUMNS[kind]
+    label = "학생" if kind == 'student' else "강사"
+    with st.expander(f"📄 {label} 일괄 등록 (CSV/XLSX)"):
+        template = pd.DataFrame(columns=spec['required'] + spec['optional'])
+        st.download_button("양식 다운로드", template.to_csv(index=False).encode('utf-8-sig'),
+                           file_name=f"{kind}_roster_template.csv", mime="text/csv", key=f"roster_template_{kind}")
+        roster_file = st.file_uploader("명단 파일", type=['csv', 'xlsx'], key=f"roster_file_{kind}")
+        if roster_file is None:
+            return
+
+        existing_emails = {(r.get('email') or '').lower() for r in
+                           (get_students() if kind == 'student' else get_instructors()).values()
+                           if r.get('org_id') == org_id}
+        instructor_index = instructor_email_index(org_id) if kind == 'student' else None
+        try:
+            valid_rows, errors = validate_roster(read_roster_file(roster_file), kind, existing_emails, instructor_index)
+        except Exception as e:
+            st.error(f"명단 파일을 읽을 수 없습니다: {e}")
+            return
+
+        st.markdown(f"등록 가능: **{len(valid_rows)}명** | 오류: **{len(errors)}행**")
+        if len(errors):
+            st.dataframe(errors, width='stretch', hide_index=True)
+
+        over_limit = max_count > 0 and current_count + len(valid_rows) > max_count
+        if over_limit:
+            st.error(f"최대 {label} 수({max_count}명)를 초과합니다. (현재 {current_count}명 + 등록 {len(valid_rows)}명) "
+                     "플랜을 업그레이드하거나 명단을 줄여주세요.")
+        if st.button(f"{len(valid_rows)}명 등록", type="primary", key=f"roster_import_{kind}",
+                     disabled=over_limit or valid_rows.empty):
+            try:
+                added = import_roster(kind, org_id, valid_rows, max_count)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.success(f"{label} {added}명이 등록되었습니다!")
+            st.rerun()
+
 def show_instructor_management_page():
     """강사 관리 페이지"""
     if not st.session_state.org_logged_in:
@@ -5806,6 +7702,7 @@ def show_instructor_management_page():
     
     st.markdown(f"## {t('instructor_management')}")
     st.markdown(f"**{t('max_instructors')}:** {max_instructors if max_instructors > 0 else '무제한'} | **현재:** {len(org_instructors)}명")
+    show_roster_import_section('instructor', st.session_state.org_id, len(org_instructors), max_instructors)
     
     # 강사 추가
     st.markdown("---")
@@ -5820,7 +7717,7 @@ def show_instructor_management_page():
                 if max_instructors > 0 and len(org_instructors) >= max_instructors:
                     st.error(f"최대 강사 수({max_instructors}명)에 도달했습니다. 플랜을 업그레이드하세요.")
                 else:
-                    instructor_id = f"instructor_{int(time.time())}"
+                    instructor_id = generate_id("instructor")
                     instructor_data = {
                         'id': instructor_id,
                         'org_id': st.session_state.org_id,
@@ -5851,12 +7748,13 @@ def show_instructor_management_page():
                     st.markdown(f"담당 학생: {len(instructor_students)}명")
                 with col3:
                     if st.button("삭제", key=f"del_{instructor['id']}"):
-                        # 강사 삭제 시 학생들의 instructor_id도 제거
-                        for student in instructor_students:
-                            student['instructor_id'] = None
-                            save_student(student['id'], student)
-                        del instructors[instructor['id']]
-                        save_json(INSTRUCTORS_FILE, instructors)
+                        # 강사 삭제 시 학생들의 instructor_id도 제거 (한 번의 쓰기)
+                        def _unassign(data, instructor_id=instructor['id']):
+                            for student in data.values():
+                                if student.get('instructor_id') == instructor_id:
+                                    student['instructor_id'] = None
+                        update_json(STUDENTS_FILE, _unassign)
+                        delete_instructors([instructor['id']])
                         st.success("강사가 삭제되었습니다!")
                         st.rerun()
                 st.markdown("---")
@@ -5880,14 +7778,15 @@ def show_student_management_page():
     org_sub = next((s for s in subscriptions.values() if s.get('org_id') == st.session_state.org_id), None)
     plan = SUBSCRIPTION_PLANS.get(org_sub.get('plan', 'basic'), SUBSCRIPTION_PLANS['basic']) if org_sub else SUBSCRIPTION_PLANS['basic']
     
-    students = get_students()
-    org_students = [s for s in students.values() if s.get('org_id') == st.session_state.org_id]
-    instructors = get_instructors()
-    org_instructors = [i for i in instructors.values() if i.get('org_id') == st.session_state.org_id]
+    # 학생 수/강사 이름은 단체 통계 뷰에서, 학생 목록은 정렬 인덱스에서 한 페이지만 읽음
+    org_stats = get_org_stats(st.session_state.org_id)
+    student_count = org_stats['student_count']
+    instructor_names = org_stats['instructor_names']
     max_students = plan['max_students']
     
     st.markdown(f"## {t('student_management')}")
-    st.markdown(f"**{t('max_students')}:** {max_students if max_students > 0 else '무제한'} | **현재:** {len(org_students)}명")
+    st.markdown(f"**{t('max_students')}:** {max_students if max_students > 0 else '무제한'} | **현재:** {student_count}명")
+    show_roster_import_section('student', st.session_state.org_id, student_count, max_students)
     
     # 학생 추가
     st.markdown("---")
@@ -5895,22 +7794,15 @@ def show_student_management_page():
     with st.form("add_student_form"):
         student_name = st.text_input(t('student_name'))
         student_email = st.text_input(t('student_email'))
-        instructor_options = ["없음"] + [f"{i['name']} ({i['email']})" for i in org_instructors]
-        selected_instructor = st.selectbox("담당 강사", instructor_options)
+        instructor_id = st.selectbox("담당 강사", [None] + list(instructor_names),
+                                     format_func=lambda i: "없음" if i is None else instructor_names[i])
         
         if st.form_submit_button("학생 추가", type="primary"):
             if student_name and student_email:
-                if max_students > 0 and len(org_students) >= max_students:
+                if max_students > 0 and student_count >= max_students:
                     st.error(f"최대 학생 수({max_students}명)에 도달했습니다. 플랜을 업그레이드하세요.")
                 else:
-                    student_id = f"student_{int(time.time())}"
-                    instructor_id = None
-                    if selected_instructor != "없음":
-                        instructor_name_email = selected_instructor.split(" (")[0]
-                        instructor = next((i for i in org_instructors if i['name'] == instructor_name_email), None)
-                        if instructor:
-                            instructor_id = instructor['id']
-                    
+                    student_id = generate_id("student")
                     student_data = {
                         'id': student_id,
                         'org_id': st.session_state.org_id,
@@ -5925,26 +7817,46 @@ def show_student_management_page():
             else:
                 st.error("필수 항목을 모두 입력해주세요.")
     
-    # 학생 목록
+    # 학생 목록 (최신 등록순 페이지, 검색 + 선택 삭제)
     st.markdown("---")
     st.markdown("### 학생 목록")
-    if org_students:
-        for student in org_students:
-            with st.container():
-                col1, col2, col3 = st.columns([2, 2, 1])
-                with col1:
-                    st.markdown(f"**{student.get('name', '')}**")
-                    st.markdown(f"이메일: {student.get('email', '')}")
-                with col2:
-                    instructor = next((i for i in org_instructors if i.get('id') == student.get('instructor_id')), None)
-                    st.markdown(f"담당 강사: {instructor.get('name', '없음') if instructor else '없음'}")
-                with col3:
-                    if st.button("삭제", key=f"del_{student['id']}"):
-                        del students[student['id']]
-                        save_json(STUDENTS_FILE, students)
-                        st.success("학생이 삭제되었습니다!")
-                        st.rerun()
-                st.markdown("---")
+    search_query = st.text_input("🔍 이름/이메일 검색", key="student_search").strip()
+    page_key = f"students_{st.session_state.org_id}_{search_query}"
+    cursor = get_page_cursor(page_key)
+    if search_query:
+        page_students, next_cursor = search_records_page(
+            STUDENTS_FILE, 'org_id', st.session_state.org_id, search_query, ('name', 'email'),
+            cursor=cursor, page_size=STUDENT_PAGE_SIZE)
+    else:
+        page_students, next_cursor, _ = query_records_page(
+            STUDENTS_FILE, 'org_id', st.session_state.org_id, cursor=cursor, page_size=STUDENT_PAGE_SIZE)
+    cursor_stack = st.session_state[f"page_cursors_{page_key}"]
+    if not page_students and len(cursor_stack) > 1:
+        # 첫 페이지가 아닌 페이지의 학생을 모두 삭제한 경우 → 이전 페이지로
+        cursor_stack.pop()
+        st.rerun()
+    
+    if page_students:
+        student_table = pd.DataFrame([{
+            '선택': False,
+            '이름': s.get('name', ''),
+            '이메일': s.get('email', ''),
+            '담당 강사': instructor_names.get(s.get('instructor_id'), '없음'),
+            '등록일': (s.get('created_at') or '')[:10]
+        } for s in page_students])
+        edited_table = st.data_editor(
+            student_table, key=f"student_table_{page_key}_{cursor}", hide_index=True, width='stretch',
+            disabled=['이름', '이메일', '담당 강사', '등록일'],
+            column_config={'선택': st.column_config.CheckboxColumn('선택', width='small')})
+        selected_ids = [s['id'] for s, selected in zip(page_students, edited_table['선택']) if selected]
+        
+        if st.button(f"선택한 학생 {len(selected_ids)}명 삭제", disabled=not selected_ids, key="delete_selected_students"):
+            delete_students(selected_ids)
+            st.success(f"학생 {len(selected_ids)}명이 삭제되었습니다!")
+            st.rerun()
+        show_page_controls(page_key, next_cursor)
+    elif search_query:
+        st.info("검색 결과가 없습니다.")
     else:
         st.info("등록된 학생이 없습니다.")
     
@@ -6042,33 +7954,237 @@ def show_org_statistics_page():
     
     st.markdown(f"## {t('statistics')}")
     
-    students = get_students()
-    org_students = [s for s in students.values() if s.get('org_id') == st.session_state.org_id]
-    progress_data = get_progress()
-    org_progress = [p for p in progress_data.values() if p.get('org_id') == st.session_state.org_id]
+    org_stats = compute_org_dashboard_stats(st.session_state.org_id)
     
     # 통계 표시
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("전체 학생", len(org_students))
-        st.metric("완료된 동작", sum(1 for p in org_progress if p.get('completed', False)))
+        st.metric("전체 학생", org_stats['student_count'])
+        st.metric("완료된 동작", org_stats['completed'])
     with col2:
-        if org_progress:
-            completed = sum(1 for p in org_progress if p.get('completed', False))
-            completion_rate = (completed / len(org_progress) * 100) if org_progress else 0
-            st.metric("완료율", f"{completion_rate:.1f}%")
+        if org_stats['progress_total']:
+            st.metric("완료율", f"{org_stats['completion_rate']:.1f}%")
+    
+    # 동작별 집계
+    if org_stats['actions']:
+        st.markdown("### 동작별 현황")
+        action_rows = [{
+            '동작': a['name'],
+            '기록 수': a['records'],
+            '완료': a['completed'],
+            '완료율': f"{a['completed'] / a['records'] * 100:.1f}%" if a['records'] else "0%",
+            '최고 점수': round(a['best_score'], 1)
+        } for a in org_stats['actions'].values()]
+        st.dataframe(pd.DataFrame(action_rows), width='stretch', hide_index=True)
+    
+    # 상세 리포트 (movement_log/progress.json을 압축한 Parquet 데이터 기준)
+    st.markdown("---")
+    st.markdown("### 상세 리포트")
+    if st.button("분석 데이터 갱신"):
+        get_progress_recorder().flush()
+        with st.spinner("진행 기록 압축 중..."):
+            compact_result = progress_analytics.compact_all()
+        st.success(f"시도 {compact_result['attempts']:,}건 추가, 진행 기록 {compact_result['progress']:,}건 반영 "
+                   f"({compact_result['seconds']:.1f}초)")
+    
+    report_labels = {'student': '학생별', 'action': '동작별', 'week': '주별 추이'}
+    report_kind = st.radio("리포트", list(report_labels), format_func=report_labels.get,
+                           horizontal=True, key="org_report_kind")
+    report = progress_analytics.REPORTS[report_kind](st.session_state.org_id)
+    if report.empty:
+        st.info("분석 데이터가 없습니다. '분석 데이터 갱신'을 눌러주세요.")
+    else:
+        if report_kind == 'student':
+            student_names = {sid: s.get('name', '') for sid, s in get_students().items()
+                             if s.get('org_id') == st.session_state.org_id}
+            report.insert(1, 'name', report['student_id'].map(student_names))
+        st.dataframe(report, width='stretch', hide_index=True)
+        st.download_button("CSV 다운로드", progress_analytics.to_csv_bytes(report),
+                           file_name=f"{st.session_state.org_id}_{report_kind}_report.csv", mime="text/csv")
     
     if st.button("뒤로가기"):
         st.session_state.current_step = 'org_dashboard'
         st.rerun()
 
+def show_group_practice_page():
+    """그룹 연습 페이지 - 교실 카메라 1대로 여러 학생을 동시에 추적/채점"""
+    if not st.session_state.org_logged_in:
+        st.warning("로그인이 필요합니다.")
+        st.session_state.current_step = 'org_login'
+        st.rerun()
+        return
+
+    st.markdown(f"## 👥 {t('group_practice')}")
+    st.caption(f"카메라 한 대로 최대 {GROUP_MAX_DANCERS}명까지 동시에 감지하고, 댄서별 점수를 학생 진행 기록으로 저장합니다.")
+
+    basic_actions = get_basic_actions(st.session_state.language)
+    action_index = st.selectbox("연습할 동작", range(len(basic_actions)),
+                                format_func=lambda i: basic_actions[i]['name'], key="group_action_index")
+    action = basic_actions[action_index]
+    video_path = f"videos/{action['video_file']}"
+
+    if 'group_webcam_running' not in st.session_state:
+        st.session_state.group_webcam_running = False
+    if 'group_results' not in st.session_state:
+        st.session_state.group_results = {}
+
+    button_col1, button_col2, button_col3 = st.columns([1, 1, 4])
+    with button_col1:
+        if st.button("▶️ 시작", key="group_start", use_container_width=True,
+                     disabled=st.session_state.group_webcam_running):
+            st.session_state.group_webcam_running = True
+            st.session_state.group_results = {}
+            st.rerun()
+    with button_col2:
+        if st.button("⏹️ 중지", key="group_stop", use_container_width=True,
+                     disabled=not st.session_state.group_webcam_running):
+            st.session_state.group_webcam_running = False
+            st.rerun()
+
+    video_placeholder = st.empty()
+    scoreboard_placeholder = st.empty()
+
+    if st.session_state.group_webcam_running:
+        with st.spinner("전문가 대표 자세 분석 중... (최초 1회만)"):
+            expert_keyposes = get_expert_keyposes(video_path)
+            expert_landmarks = None if expert_keyposes is not None else get_expert_landmarks(video_path)
+
+        pose_options = vision.PoseLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=get_pose_model_path()),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=GROUP_MAX_DANCERS,
+            min_pose_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        pose_landmarker = vision.PoseLandmarker.create_from_options(pose_options)
+
+        cap = cv2.VideoCapture(0)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+
+        tracker = GroupTracker()
+        aggregators = {}   # 트랙 번호 → PoseScoreAggregator
+        timestamp_ms = 0
+        frame_count = 0
+
+        try:
+            while st.session_state.group_webcam_running:
+                ret, frame = cap.read()
+                if not ret:
+                    st.error("❌ 웹캠에서 영상을 읽을 수 없습니다.")
+                    break
+
+                frame_rgb = cv2.flip(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), 1)
+                height, width = frame_rgb.shape[:2]
+                result = pose_landmarker.detect_for_video(
+                    mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb), timestamp_ms
+                )
+                t_s = timestamp_ms / 1000
+
+                if result.pose_landmarks:
+                    # 모든 댄서를 (N, 33, 4) 배열 하나로 모아 추적/채점
+                    pose_arrays = np.stack([landmarks_to_array(lms) for lms in result.pose_landmarks])
+                    boxes = landmark_bounding_boxes(pose_arrays)
+                    track_ids = tracker.update(boxes)
+                    scores = batch_pose_scores(pose_arrays, expert_keyposes, expert_landmarks)
+
+                    draw_landmarks_on_image(frame_rgb, result, in_place=True)
+                    for track_id, box, score in zip(track_ids, boxes, scores):
+                        aggregator = aggregators.setdefault(track_id, PoseScoreAggregator())
+                        aggregator.update(None if np.isnan(score) else float(score), t_s)
+                        label = f"#{track_id} {aggregator.ema:.0f}"
+                        cv2.putText(frame_rgb, label, (int(box[0] * width), max(int(box[1] * height) - 10, 20)),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+                else:
+                    tracker.update(np.empty((0, 4)))
+
+                video_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
+
+                # 점수판 (약 0.5초마다 갱신)
+                if frame_count % 15 == 0 and aggregators:
+                    st.session_state.group_results = {
+                        track_id: aggregator.snapshot() for track_id, aggregator in aggregators.items()
+                    }
+                    scoreboard_placeholder.dataframe(pd.DataFrame([
+                        {'댄서': f"#{track_id}", '현재(EMA)': round(r['ema']), '최고': round(r['best']),
+                         f'{SCORE_PASS_THRESHOLD}점 이상(초)': round(r['time_above'], 1)}
+                        for track_id, r in sorted(st.session_state.group_results.items())
+                    ]), width='stretch')
+
+                timestamp_ms += 33
+                frame_count += 1
+                time.sleep(0.01)
+        except Exception as e:
+            st.error(f"❌ 오류 발생: {str(e)}")
+        finally:
+            cap.release()
+            pose_landmarker.close()
+            if aggregators:
+                st.session_state.group_results = {
+                    track_id: aggregator.snapshot() for track_id, aggregator in aggregators.items()
+                }
+            st.session_state.group_webcam_running = False
+    else:
+        video_placeholder.info("▶️ 시작을 누르면 교실 카메라로 여러 명을 동시에 감지합니다.")
+
+    # 세션 결과 → 학생 배정 후 진행 기록으로 한 번에 저장
+    results = {track_id: r for track_id, r in st.session_state.group_results.items() if r['frames'] > 0}
+    if results and not st.session_state.group_webcam_running:
+        st.markdown("---")
+        st.markdown("### 📋 댄서별 결과 저장")
+        students = get_students()
+        org_students = [s for s in students.values() if s.get('org_id') == st.session_state.org_id]
+        student_options = [None] + [s['id'] for s in org_students]
+        student_names = {s['id']: f"{s.get('name', '')} ({s.get('email', '')})" for s in org_students}
+
+        with st.form("group_results_form"):
+            assignments = {}
+            for track_id, r in sorted(results.items()):
+                col1, col2 = st.columns([1, 2])
+                with col1:
+                    st.markdown(f"**댄서 #{track_id}** — 최고 {r['best']:.0f}점 · 평균 {r['mean']:.0f}점 · EMA {r['ema']:.0f}점")
+                with col2:
+                    assignments[track_id] = st.selectbox(
+                        "학생", student_options, key=f"group_assign_{track_id}",
+                        format_func=lambda sid: "배정 안 함" if sid is None else student_names[sid]
+                    )
+
+            if st.form_submit_button("진행 기록 저장", type="primary"):
+                attempts = [
+                    make_progress_attempt(
+                        student_id=student_id,
+                        org_id=st.session_state.org_id,
+                        instructor_id=students[student_id].get('instructor_id'),
+                        action_key=f"basic:{action_index}",
+                        action_name=action['name'],
+                        score=results[track_id]['best'],
+                        # 완료 판정은 단일 연습과 같은 기준 (최고점 한 프레임이 아닌 EMA)
+                        completed=results[track_id]['ema'] >= SCORE_PASS_THRESHOLD,
+                        mode='group'
+                    )
+                    for track_id, student_id in assignments.items() if student_id
+                ]
+                if not attempts:
+                    st.warning("결과를 저장할 학생을 배정해주세요.")
+                # 반 전체 결과를 한 번의 쓰기로 저장 (실패하면 결과를 남겨 다시 저장할 수 있게)
+                elif get_progress_recorder().save_attempts(attempts):
+                    st.session_state.group_results = {}
+                    st.success(f"{len(attempts)}명의 진행 기록을 저장했습니다!")
+                    st.rerun()
+                else:
+                    st.error("진행 기록을 저장하지 못했습니다. 잠시 후 다시 시도해주세요.")
+
+    if st.button("뒤로가기", key="group_back"):
+        st.session_state.current_step = 'org_dashboard'
+        st.rerun()
+
 # ==================== 동작 테스트 페이지 ====================
 
 # MediaPipe 랜드마크 그리기 헬퍼 함수
-def draw_landmarks_on_image(rgb_image, detection_result):
-    """MediaPipe Pose 랜드마크를 이미지에 그리기"""
+def draw_landmarks_on_image(rgb_image, detection_result, in_place=False):
+    """MediaPipe Pose 랜드마크를 이미지에 그리기 (in_place=True면 복사 없이 rgb_image에 직접)"""
     pose_landmarks_list = detection_result.pose_landmarks
-    annotated_image = np.copy(rgb_image)
+    annotated_image = rgb_image if in_place else np.copy(rgb_image)
 
     if not pose_landmarks_list:
         return annotated_image
@@ -6109,10 +8225,10 @@ def draw_landmarks_on_image(rgb_image, detection_result):
 
     return annotated_image
 
-def draw_hands_on_image(rgb_image, detection_result):
-    """MediaPipe Hands 랜드마크를 이미지에 그리기"""
+def draw_hands_on_image(rgb_image, detection_result, in_place=False):
+    """MediaPipe Hands 랜드마크를 이미지에 그리기 (in_place=True면 복사 없이 rgb_image에 직접)"""
     hand_landmarks_list = detection_result.hand_landmarks
-    annotated_image = np.copy(rgb_image)
+    annotated_image = rgb_image if in_place else np.copy(rgb_image)
 
     if not hand_landmarks_list:
         return annotated_image
@@ -6185,6 +8301,25 @@ def show_pose_test_page():
         show_landmarks = st.checkbox("랜드마크 표시", value=True)
         enable_hands = st.checkbox("✋ 손 감지 활성화", value=True)
 
+        # 포즈 모델 등급 (기본: 서버 캘리브레이션 결과)
+        calibration = calibrate_pose_models()
+        timings = calibration['timings_ms']
+        tier_options = ['auto'] + (available_pose_model_tiers() or [DEFAULT_POSE_MODEL_TIER])
+
+        def format_tier(tier):
+            if tier == 'auto':
+                return f"자동 ({calibration['tier']})"
+            return f"{tier} ({timings[tier]:.0f}ms)" if tier in timings else tier
+
+        selected_tier = st.selectbox("🧠 포즈 모델", tier_options, format_func=format_tier, key="pose_model_tier_choice")
+        pose_model_path = get_pose_model_path(None if selected_tier == 'auto' else selected_tier)
+        if timings:
+            st.caption(f"캘리브레이션 (예산 {calibration['budget_ms']:.0f}ms/프레임): "
+                       + " · ".join(f"{tier} {ms:.0f}ms" for tier, ms in timings.items())
+                       + " — 변경 시 카메라를 다시 시작하세요")
+        else:
+            st.caption("모델 파일을 찾지 못해 기본 모델(lite)을 사용합니다")
+
         st.markdown("---")
         st.markdown("#### 데이터 저장")
         save_data = st.checkbox("랜드마크 데이터 기록")
@@ -6236,10 +8371,12 @@ def show_pose_test_page():
                 self.hand_data = []
                 self.prev_time = time.time()
                 self.fps = 0
+                self.resolution_controller = ResolutionController()
+                self.frame_buffer = None
+                self.alloc_counter = FrameAllocationCounter()
 
             def _initialize_landmarkers(self):
-                # PoseLandmarker 초기화
-                pose_model_path = os.path.join(os.path.dirname(__file__), "models", "pose_landmarker_lite.task")
+                # PoseLandmarker 초기화 (설정에서 고른 모델 등급)
                 pose_base_options = python.BaseOptions(model_asset_path=pose_model_path)
                 pose_options = vision.PoseLandmarkerOptions(
                     base_options=pose_base_options,
@@ -6264,24 +8401,35 @@ def show_pose_test_page():
                 if not self.pose_landmarker:
                     self._initialize_landmarkers()
                 
-                img = frame.to_ndarray(format="bgr24")
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                img_rgb = cv2.flip(img_rgb, 1)
-
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+                # rgb24로 바로 받아 재사용 버퍼에 좌우 반전 (색 변환/반전 결과 할당 없음)
+                img = frame.to_ndarray(format="rgb24")
+                self.alloc_counter.add(img.nbytes)
+                self.frame_buffer = mirror_into_buffer(img, self.frame_buffer, self.alloc_counter)
+                img_rgb = self.frame_buffer
+
+                # 감지는 축소 복사본에서 (해상도 자동 조절), 그리기는 원본 프레임에
+                detect_start = time.perf_counter()
+                detect_image = self.resolution_controller.downscale(img_rgb)
+                if detect_image is not img_rgb:
+                    self.alloc_counter.add(detect_image.nbytes)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=detect_image)
                 self.frame_timestamp_ms += 33  # Approx 30 FPS
 
                 pose_result = self.pose_landmarker.detect_for_video(mp_image, self.frame_timestamp_ms)
                 hand_result = None
                 if enable_hands and self.hand_landmarker:
                     hand_result = self.hand_landmarker.detect_for_video(mp_image, self.frame_timestamp_ms)
+                self.resolution_controller.report(
+                    (time.perf_counter() - detect_start) * 1000,
+                    pose_confidence(pose_result.pose_landmarks[0] if pose_result.pose_landmarks else None)
+                )
                 
                 with self.lock:
                     if show_landmarks:
                         if pose_result.pose_landmarks:
-                            img_rgb = draw_landmarks_on_image(img_rgb, pose_result)
+                            draw_landmarks_on_image(img_rgb, pose_result, in_place=True)
                         if hand_result and hand_result.hand_landmarks:
-                            img_rgb = draw_hands_on_image(img_rgb, hand_result)
+                            draw_hands_on_image(img_rgb, hand_result, in_place=True)
 
                     if save_data:
                         current_time_stamp = time.time()
@@ -6307,17 +8455,21 @@ def show_pose_test_page():
                 current_time = time.time()
                 self.fps = 1 / (current_time - self.prev_time)
                 self.prev_time = current_time
-                cv2.putText(img_rgb, f'FPS: {int(self.fps)}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                cv2.putText(img_rgb, f'FPS: {int(self.fps)} | {self.resolution_controller.width}px', (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
                 
-                img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-                return av.VideoFrame.from_ndarray(img_bgr, format="bgr24")
+                # from_ndarray는 버퍼 내용을 새 프레임으로 복사하므로 버퍼는 다음 프레임에 재사용 가능
+                self.alloc_counter.add(img_rgb.nbytes)
+                with self.lock:
+                    self.alloc_counter.end_frame()
+                return av.VideoFrame.from_ndarray(img_rgb, format="rgb24")
 
         webrtc_ctx = webrtc_streamer(
             key="pose-test",
             mode=WebRtcMode.SENDRECV,
             rtc_configuration={"iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]},
             video_processor_factory=VideoProcessor,
-            media_stream_constraints={"video": True, "audio": False},
+            media_stream_constraints=webrtc_video_constraints(),
             async_processing=True,
         )
 
@@ -6325,6 +8477,10 @@ def show_pose_test_page():
             st.success("✅ 웹캠 실행 중")
             if webrtc_ctx.video_processor:
                  with webrtc_ctx.video_processor.lock:
+                    alloc_counter = webrtc_ctx.video_processor.alloc_counter
+                    if alloc_counter.frames:
+                        st.caption(f"🧮 프레임당 메모리 할당: 평균 {alloc_counter.avg_frame_bytes / 1024:.0f}KB "
+                                   f"(최근 {alloc_counter.last_frame_bytes / 1024:.0f}KB)")
                     if save_data:
                         st.session_state.pose_landmarks_data = webrtc_ctx.video_processor.pose_data
                         st.session_state.hand_landmarks_data = webrtc_ctx.video_processor.hand_data
@@ -0,0 +1,205 @@
+# 춤마루 밈 렌더링 벤치마크 / 회귀 검사 하네스
+# app_v18.py의 create_meme_card, create_meme_card_* 4종, create_meme_gif를
+# (DNA 타입 × 스타일 × 길이) 조합별로 헤드리스 렌더링하고
+# 실행 시간, 최대 메모리, 결과물 바이트 크기를 기록한 뒤 저장된 기준값과 비교합니다.
+#
+# 실행방법:
+#   python bench_meme.py                       # 측정 + 기준값 대비 회귀 검사
+#   python bench_meme.py --update-baseline     # 현재 측정값을 기준값으로 저장
+#   python bench_meme.py --quick               # DNA 타입 1개, GIF 길이 2초만 측정
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE_PATH = ROOT_DIR / "bench_meme_baseline.json"
+GIF_STYLES = ['gradient', 'neon', 'dualtone', 'minimal']
+GIF_DURATIONS = [2, 3, 5]
+GIF_FPS = 10
+
+# 기준값 대비 허용 범위 (비율)
+DEFAULT_TIME_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.25
+DEFAULT_SIZE_TOLERANCE = 0.10
+
+
+class SessionStateStub(dict):
+    """st.session_state 대체용 - dict + 속성 접근 지원"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def load_app(language='ko'):
+    """st.session_state를 대체한 상태로 app_v18 모듈을 로드"""
+    # 영상 경로(videos/...)가 상대 경로이므로 저장소 루트에서 실행
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, str(ROOT_DIR))
+
+    import streamlit as st
+    st.session_state = SessionStateStub(language=language)
+
+    import app_v18
+    return app_v18
+
+
+def get_static_renderers(app):
+    """정적 밈 카드 렌더러 목록 (스타일 이름 -> 함수)"""
+    return {
+        'default': app.create_meme_card,
+        'gradient_box': app.create_meme_card_gradient_box,
+        'neon': app.create_meme_card_neon,
+        'dualtone': app.create_meme_card_dualtone,
+        'minimal': app.create_meme_card_minimal,
+    }
+
+
+def measure(render):
+    """render()를 실행하고 (결과, 실행시간 ms, 최대 메모리 bytes) 반환
+
+    최대 메모리는 tracemalloc 기준(Python/NumPy 할당)이며,
+    Pillow 내부 버퍼처럼 tracemalloc이 추적하지 않는 할당은 포함되지 않습니다.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = render()
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed_ms, peak_bytes
+
+
+def image_to_png_bytes(image):
+    """PIL 이미지를 다운로드 버튼과 동일한 PNG 바이트로 변환"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def run_benchmark(app, dna_names=None, durations=None):
+    """모든 조합을 렌더링하고 결과 dict 반환 (키: 'kind/dna/style/duration')"""
+    dna_types = app.get_dna_types('ko')
+    dna_names = dna_names or list(dna_types.keys())
+    durations = durations or GIF_DURATIONS
+    results = {}
+
+    for dna_name in dna_names:
+        dna_data = dna_types[dna_name]
+
+        for style_name, renderer in get_static_renderers(app).items():
+            key = f"card/{dna_name}/{style_name}/-"
+            image, elapsed_ms, peak_bytes = measure(lambda: renderer(dna_name, dna_data))
+            output_bytes = len(image_to_png_bytes(image)) if image is not None else 0
+            results[key] = {
+                'wall_ms': round(elapsed_ms, 2),
+                'peak_bytes': peak_bytes,
+                'output_bytes': output_bytes,
+            }
+            print(f"  {key}: {elapsed_ms:.0f}ms, peak {peak_bytes / 1e6:.1f}MB, {output_bytes / 1e3:.0f}KB")
+
+        for style_name in GIF_STYLES:
+            for duration in durations:
+                key = f"gif/{dna_name}/{style_name}/{duration}s"
+                gif_buffer, elapsed_ms, peak_bytes = measure(
+                    lambda: app.create_meme_gif(dna_name, dna_data, duration=duration,
+                                                fps=GIF_FPS, style=style_name)
+                )
+                output_bytes = gif_buffer.getbuffer().nbytes if gif_buffer else 0
+                results[key] = {
+                    'wall_ms': round(elapsed_ms, 2),
+                    'peak_bytes': peak_bytes,
+                    'output_bytes': output_bytes,
+                }
+                print(f"  {key}: {elapsed_ms:.0f}ms, peak {peak_bytes / 1e6:.1f}MB, {output_bytes / 1e3:.0f}KB")
+
+    return results
+
+
+def find_regressions(results, baseline, time_tolerance, memory_tolerance, size_tolerance):
+    """기준값보다 허용 범위 이상 나빠진 항목 목록 반환"""
+    checks = [
+        ('wall_ms', time_tolerance),
+        ('peak_bytes', memory_tolerance),
+        ('output_bytes', size_tolerance),
+    ]
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric, tolerance in checks:
+            base_value = base.get(metric, 0)
+            if base_value and current[metric] > base_value * (1 + tolerance):
+                regressions.append({
+                    'key': key,
+                    'metric': metric,
+                    'baseline': base_value,
+                    'current': current[metric],
+                    'ratio': current[metric] / base_value,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="춤마루 밈 렌더링 벤치마크")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument('--update-baseline', action='store_true', help="현재 측정값을 기준값으로 저장")
+    parser.add_argument('--output', type=Path, help="측정 결과 JSON 저장 경로")
+    parser.add_argument('--quick', action='store_true', help="DNA 타입 1개, GIF 2초만 측정")
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument('--size-tolerance', type=float, default=DEFAULT_SIZE_TOLERANCE)
+    args = parser.parse_args()
+
+    app = load_app()
+    dna_names = list(app.get_dna_types('ko').keys())[:1] if args.quick else None
+    durations = [2] if args.quick else None
+
+    print("밈 렌더링 벤치마크를 시작합니다...")
+    results = run_benchmark(app, dna_names=dna_names, durations=durations)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if args.update_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"✅ 기준값을 저장했습니다: {args.baseline} ({len(results)}개 항목)")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"⚠️ 기준값 파일이 없습니다: {args.baseline} (--update-baseline 으로 생성하세요)")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    regressions = find_regressions(results, baseline, args.time_tolerance,
+                                   args.memory_tolerance, args.size_tolerance)
+    if regressions:
+        print(f"\n❌ 회귀 {len(regressions)}건 발견:")
+        for r in regressions:
+            print(f"  {r['key']} [{r['metric']}] {r['baseline']} -> {r['current']} (x{r['ratio']:.2f})")
+        return 1
+
+    print(f"\n✅ 회귀 없음 ({len(results)}개 항목)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# 춤마루 저장소(JSON) 부하 테스트 / 벤치마크
+# 가상의 B2B 단체(단체, 강사, 학생, 진행 기록)와 전문가 영상/피드백 데이터를
+# 지정한 규모(1천 ~ 1백만 레코드)로 생성한 뒤, app_v18.py의 get_*/save_* 함수와
+# 대시보드/랭킹 페이지 집계 시간을 측정하여 규모별 성능 곡선 리포트를 출력합니다.
+#
+# 실행방법:
+#   python bench_storage.py                                  # 1k, 10k, 100k 측정
+#   python bench_storage.py --scales 1000,10000,100000,1000000 --max-op-seconds 60
+#   python bench_storage.py --generate-only --data-dir /tmp/choomaru_data --scales 100000
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+# 전체 레코드 수 대비 엔티티별 비율
+RECORD_MIX = {
+    'organizations': 0.002,
+    'instructors': 0.02,
+    'students': 0.30,
+    'progress': 0.45,
+    'experts': 0.005,
+    'videos': 0.05,
+    'feedback': 0.173,
+}
+
+# app_v18의 파일 경로 상수 이름
+DATA_FILE_ATTRS = {
+    'organizations': 'ORGANIZATIONS_FILE',
+    'subscriptions': 'SUBSCRIPTIONS_FILE',
+    'instructors': 'INSTRUCTORS_FILE',
+    'students': 'STUDENTS_FILE',
+    'groups': 'GROUPS_FILE',
+    'progress': 'PROGRESS_FILE',
+    'org_stats': 'ORG_STATS_FILE',
+    'experts': 'EXPERTS_FILE',
+    'videos': 'VIDEOS_FILE',
+    'feedback': 'FEEDBACK_FILE',
+}
+
+
+def entity_counts(scale):
+    """전체 레코드 수를 엔티티별 개수로 분배 (엔티티당 최소 1개)"""
+    return {name: max(1, int(scale * ratio)) for name, ratio in RECORD_MIX.items()}
+
+
+def generate_synthetic_data(scale, data_dir, seed=42, dna_type_names=None, plans=None):
+    """가상 데이터를 생성해 data_dir에 JSON 파일로 저장하고 엔티티별 개수 반환"""
+    rng = random.Random(seed)
+    counts = entity_counts(scale)
+    dna_type_names = dna_type_names or ['밈 제조기', '무드 큐레이터', '완벽 플래너', '디테일 장인']
+    plans = plans or ['basic', 'standard', 'premium', 'enterprise']
+    base_time = datetime(2025, 1, 1)
+
+    def created_at():
+        return (base_time + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))).isoformat()
+
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    organizations, subscriptions = {}, {}
+    for i in range(counts['organizations']):
+        org_id = f"org_{i:07d}"
+        organizations[org_id] = {
+            'id': org_id, 'name': f"학원 {i}", 'type': '학원',
+            'email': f"org{i}@example.com", 'password': 'pw',
+            'manager': f"관리자 {i}", 'address': '', 'phone': '',
+            'created_at': created_at()
+        }
+        sub_id = f"sub_{i:07d}"
+        subscriptions[sub_id] = {
+            'id': sub_id, 'org_id': org_id, 'plan': rng.choice(plans),
+            'start_date': created_at(), 'status': 'active'
+        }
+    org_ids = list(organizations.keys())
+
+    instructors = {}
+    for i in range(counts['instructors']):
+        instructor_id = f"instructor_{i:07d}"
+        instructors[instructor_id] = {
+            'id': instructor_id, 'org_id': rng.choice(org_ids),
+            'name': f"강사 {i}", 'email': f"instructor{i}@example.com",
+            'phone': '', 'created_at': created_at()
+        }
+    instructors_by_org = {}
+    for instructor in instructors.values():
+        instructors_by_org.setdefault(instructor['org_id'], []).append(instructor['id'])
+
+    students = {}
+    for i in range(counts['students']):
+        student_id = f"student_{i:07d}"
+        org_id = rng.choice(org_ids)
+        org_instructors = instructors_by_org.get(org_id)
+        students[student_id] = {
+            'id': student_id, 'org_id': org_id,
+            'instructor_id': rng.choice(org_instructors) if org_instructors else None,
+            'name': f"학생 {i}", 'email': f"student{i}@example.com",
+            'created_at': created_at()
+        }
+    student_list = list(students.values())
+
+    progress = {}
+    for i in range(counts['progress']):
+        student = rng.choice(student_list)
+        progress_id = f"progress_{i:07d}"
+        progress[progress_id] = {
+            'id': progress_id, 'org_id': student['org_id'], 'student_id': student['id'],
+            'action_type': 'basic', 'action_index': rng.randrange(12),
+            'score': rng.randint(30, 100), 'completed': rng.random() < 0.6,
+            'created_at': created_at()
+        }
+
+    experts = {}
+    for i in range(counts['experts']):
+        expert_id = f"expert_{i:07d}"
+        experts[expert_id] = {
+            'id': expert_id, 'name': f"전문가 {i}", 'email': f"expert{i}@example.com",
+            'password': 'pw', 'bio': '', 'specialty': '한국무용', 'created_at': created_at()
+        }
+    expert_ids = list(experts.keys())
+
+    videos = {}
+    for i in range(counts['videos']):
+        video_id = f"video_{i:07d}"
+        videos[video_id] = {
+            'id': video_id, 'expert_id': rng.choice(expert_ids),
+            'title': f"영상 {i}", 'description': '', 'dna_type': rng.choice(dna_type_names),
+            'tags': [], 'video_path': f"expert_videos/{video_id}.mp4",
+            'created_at': created_at(), 'likes': 0, 'comments': 0, 'views': 0
+        }
+    video_ids = list(videos.keys())
+
+    feedback = {}
+    for i in range(counts['feedback']):
+        feedback_id = f"feedback_{i:07d}"
+        feedback_type = rng.choice(['like', 'comment', 'rating'])
+        record = {
+            'id': feedback_id, 'video_id': rng.choice(video_ids),
+            'type': feedback_type, 'created_at': created_at()
+        }
+        if feedback_type == 'comment':
+            record['content'] = f"댓글 {i}"
+        elif feedback_type == 'rating':
+            record['rating'] = rng.randint(1, 5)
+        feedback[feedback_id] = record
+
+    files = {
+        'organizations': organizations, 'subscriptions': subscriptions,
+        'instructors': instructors, 'students': students, 'groups': {},
+        'progress': progress, 'experts': experts, 'videos': videos, 'feedback': feedback,
+    }
+    for name, records in files.items():
+        with open(data_dir / f"{name}.json", 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+    return counts
+
+
+def load_app():
+    """app_v18 모듈 로드 (st.session_state는 dict로 대체)"""
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, str(ROOT_DIR))
+
+    import streamlit as st
+    st.session_state = {'language': 'ko'}
+
+    import app_v18
+    return app_v18
+
+
+def point_app_to(app, data_dir):
+    """app_v18의 데이터 파일 경로를 data_dir로 변경"""
+    data_dir = Path(data_dir)
+    app.DATA_DIR = data_dir
+    for name, attr in DATA_FILE_ATTRS.items():
+        setattr(app, attr, data_dir / f"{name}.json")
+
+
+def time_call(func, repeat=1):
+    """func를 repeat회 실행하고 최소 실행시간(초) 반환"""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def build_operations(app):
+    """측정 대상 연산 목록 (이름 -> 함수)"""
+    busiest_org = {}
+
+    def pick_org():
+        if 'org_id' not in busiest_org:
+            org_counts = {}
+            for s in app.get_students().values():
+                org_counts[s['org_id']] = org_counts.get(s['org_id'], 0) + 1
+            busiest_org['org_id'] = max(org_counts, key=org_counts.get) if org_counts else None
+        return busiest_org['org_id']
+
+    now = datetime.now().isoformat()
+    return {
+        'get_organizations': app.get_organizations,
+        'get_subscriptions': app.get_subscriptions,
+        'get_instructors': app.get_instructors,
+        'get_students': app.get_students,
+        'get_progress': app.get_progress,
+        'get_experts': app.get_experts,
+        'get_videos': app.get_videos,
+        'get_feedback': app.get_feedback,
+        'save_student': lambda: app.save_student('student_bench', {
+            'id': 'student_bench', 'org_id': pick_org(), 'instructor_id': None,
+            'name': '벤치 학생', 'email': 'bench@example.com', 'created_at': now}),
+        'save_progress': lambda: app.save_progress('progress_bench', {
+            'id': 'progress_bench', 'org_id': pick_org(), 'completed': True, 'created_at': now}),
+        'save_video': lambda: app.save_video('video_bench', {
+            'id': 'video_bench', 'expert_id': 'expert_0000000', 'title': '벤치 영상',
+            'dna_type': '밈 제조기', 'created_at': now}),
+        'save_feedback': lambda: app.save_feedback('feedback_bench', {
+            'id': 'feedback_bench', 'video_id': 'video_0000000', 'type': 'like', 'created_at': now}),
+        'org_dashboard_stats': lambda: app.compute_org_dashboard_stats(pick_org()),
+        'expert_rankings': app.compute_expert_rankings,
+    }
+
+
+def run_benchmark(app, scales, repeat, max_op_seconds, seed):
+    """규모별로 데이터를 생성하고 연산 시간 측정. 반환: {op: {scale: 초 또는 None}}"""
+    results = {}
+    slow_ops = set()
+
+    for scale in scales:
+        data_dir = Path(tempfile.mkdtemp(prefix=f"choomaru_bench_{scale}_"))
+        try:
+            print(f"\n[{scale:,} 레코드] 가상 데이터 생성 중...")
+            counts = generate_synthetic_data(scale, data_dir, seed=seed,
+                                             dna_type_names=list(app.get_dna_types('ko').keys()),
+                                             plans=list(app.SUBSCRIPTION_PLANS.keys()))
+            print("  " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+            point_app_to(app, data_dir)
+
+            for op_name, op in build_operations(app).items():
+                if op_name in slow_ops:
+                    # 이전 규모에서 제한 시간을 넘긴 연산은 더 큰 규모에서 건너뜀
+                    results.setdefault(op_name, {})[scale] = None
+                    print(f"  {op_name:<22} 건너뜀 (이전 규모에서 {max_op_seconds}s 초과)")
+                    continue
+                seconds = time_call(op, repeat=repeat)
+                results.setdefault(op_name, {})[scale] = seconds
+                print(f"  {op_name:<22} {seconds * 1000:>12.1f} ms")
+                if max_op_seconds and seconds > max_op_seconds:
+                    slow_ops.add(op_name)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    return results
+
+
+def scaling_exponent(results_for_op, scales):
+    """연속 규모 간 log-log 기울기 (1.0 ≈ 선형, 2.0 ≈ 제곱)"""
+    exponents = []
+    for small, large in zip(scales, scales[1:]):
+        t_small, t_large = results_for_op.get(small), results_for_op.get(large)
+        if t_small and t_large:
+            exponents.append(math.log(t_large / t_small) / math.log(large / small))
+    return exponents
+
+
+def print_report(results, scales):
+    """규모별 성능 곡선 리포트 (마크다운 표) 출력"""
+    header = "| 연산 | " + " | ".join(f"{s:,}" for s in scales) + " | 증가 기울기 |"
+    print("\n## 저장소 성능 곡선 (ms)\n")
+    print(header)
+    print("|" + "---|" * (len(scales) + 2))
+    for op_name, by_scale in results.items():
+        cells = []
+        for scale in scales:
+            seconds = by_scale.get(scale)
+            cells.append(f"{seconds * 1000:.1f}" if seconds is not None else "-")
+        exponents = scaling_exponent(by_scale, scales)
+        slope = " → ".join(f"{e:.2f}" for e in exponents) if exponents else "-"
+        print(f"| {op_name} | " + " | ".join(cells) + f" | {slope} |")
+
+
+def write_csv(results, scales, output_path):
+    """측정 결과를 CSV(op, scale, ms)로 저장"""
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['operation', 'records', 'ms'])
+        for op_name, by_scale in results.items():
+            for scale in scales:
+                seconds = by_scale.get(scale)
+                writer.writerow([op_name, scale, f"{seconds * 1000:.3f}" if seconds is not None else ''])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="춤마루 JSON 저장소 부하 테스트")
+    parser.add_argument('--scales', default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="쉼표로 구분한 전체 레코드 수 (예: 1000,10000,100000,1000000)")
+    parser.add_argument('--repeat', type=int, default=3, help="연산별 반복 측정 횟수 (최소값 사용)")
+    parser.add_argument('--max-op-seconds', type=float, default=30.0,
+                        help="이 시간을 넘긴 연산은 더 큰 규모에서 건너뜀 (0이면 제한 없음)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help="CSV 리포트 저장 경로")
+    parser.add_argument('--generate-only', action='store_true', help="데이터만 생성 (--data-dir 필요)")
+    parser.add_argument('--data-dir', type=Path, help="--generate-only 시 데이터 저장 경로")
+    args = parser.parse_args()
+
+    scales = sorted(int(s) for s in args.scales.split(',') if s.strip())
+
+    if args.generate_only:
+        if not args.data_dir:
+            parser.error("--generate-only 사용 시 --data-dir 이 필요합니다")
+        counts = generate_synthetic_data(scales[-1], args.data_dir, seed=args.seed)
+        print(f"✅ 가상 데이터 생성 완료: {args.data_dir}")
+        print("  " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+        return 0
+
+    app = load_app()
+    results = run_benchmark(app, scales, args.repeat, args.max_op_seconds, args.seed)
+    print_report(results, scales)
+
+    if args.output:
+        write_csv(results, scales, args.output)
+        print(f"\n✅ CSV 리포트 저장: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# 춤마루 진행 기록 분석 엔진
+# progress.json(학생×동작 집계 레코드)과 movement_log.jsonl(연습 시도별 기록)을
+# 단체(org_id) / 월(month)별로 나눈 Parquet 파일로 압축하고,
+# 단체 통계 페이지용 벡터화 group-by 질의(학생별, 동작별, 주별)와 CSV 내보내기를 제공합니다.
+#
+# 저장 구조 (hive 파티션 - 질의 시 org_id/month 조건으로 필요한 파일만 읽음):
+#   data/analytics/attempts/org_id=<단체>/month=<YYYY-MM>/*.parquet   movement_log 증분 추가
+#     (증분 파일 이름은 log-<로그 세대>-<시작 오프셋>-<번호>.parquet - 오프셋 저장 전에 중단된 쓰기를 다음 압축 때 지우고 다시 씀)
+#   data/analytics/progress/org_id=<단체>/month=<YYYY-MM>/*.parquet   progress.json 스냅샷 (매번 교체)
+#
+# 실행방법:
+#   python progress_analytics.py compact                          # 새 로그/진행 기록 압축
+#   python progress_analytics.py report --org <org_id> --by week  # 주별 추이 출력
+#   python progress_analytics.py report --org <org_id> --by student --csv out.csv
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = Path("data")
+PROGRESS_FILE = DATA_DIR / "progress.json"
+MOVEMENT_LOG_FILE = DATA_DIR / "movement_log.jsonl"
+ANALYTICS_DIR = DATA_DIR / "analytics"
+ATTEMPTS_DIR = ANALYTICS_DIR / "attempts"
+PROGRESS_DATASET_DIR = ANALYTICS_DIR / "progress"
+STATE_FILE = ANALYTICS_DIR / "state.json"
+
+PARTITION_COLS = ['org_id', 'month']
+LOG_READ_BLOCK_BYTES = 64 * 1024 * 1024   # movement_log를 이 크기 단위로 읽어 변환 (메모리 상한)
+MAX_PARTS_PER_PARTITION = 16              # 파티션 안의 파일이 이보다 많으면 하나로 합침
+
+ATTEMPT_COLUMNS = ['org_id', 'student_id', 'instructor_id', 'action_key', 'action_name',
+                   'score', 'completed', 'mode', 'timestamp']
+PROGRESS_COLUMNS = ['org_id', 'student_id', 'instructor_id', 'action_key', 'action_name',
+                    'attempts', 'best_score', 'last_score', 'completed', 'created_at', 'updated_at']
+
+# 같은 프로세스의 여러 세션이 동시에 압축하지 않도록 (모듈은 스크립트 재실행 간 유지됨)
+_compact_lock = threading.Lock()
+
+
+# ==================== 상태 파일 ====================
+
+def _load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'movement_log_offset': 0, 'movement_log_generation': 0}
+
+
+def _save_state(state):
+    tmp_path = STATE_FILE.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, STATE_FILE)
+
+
+# ==================== 정규화 (dict/JSON → 열 형식) ====================
+
+def _normalize(df, columns, time_col):
+    """열 순서/타입 정리 + month 파티션 열 추가 (org_id 없는 행은 단체 통계에 쓸 수 없어 제외)"""
+    df = df.reindex(columns=columns)
+    df[time_col] = pd.to_datetime(df[time_col], errors='coerce', format='ISO8601')
+    df = df[df['org_id'].notna() & df[time_col].notna()].copy()
+    df['month'] = df[time_col].dt.strftime('%Y-%m')
+    for col in ('score', 'best_score', 'last_score'):
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    if 'attempts' in df:
+        # attempts가 없는 예전 기록은 시도 1회당 레코드 1개
+        df['attempts'] = pd.to_numeric(df['attempts'], errors='coerce').fillna(1).astype('int32')
+    df['completed'] = df['completed'].fillna(False).astype(bool)
+    return df
+
+
+def _progress_action_key(df):
+    """action_key가 없는 예전 기록은 action_index/action_name으로 채움 (app_v18과 같은 규칙)"""
+    key = df['action_key'] if 'action_key' in df else pd.Series(None, index=df.index, dtype=object)
+    if 'action_index' in df:
+        index_key = 'basic:' + df['action_index'].astype('Int64').astype(str)
+        key = key.fillna(index_key.where(df['action_index'].notna()))
+    if 'action_name' in df:
+        key = key.fillna(df['action_name'])
+    return key
+
+
+# ==================== 압축 ====================
+
+def _append_partitions(df, dataset_dir, basename_template=None):
+    """org_id/month 파티션으로 나눠 새 Parquet 파일 추가 (기존 파일은 그대로)
+
+    basename_template: 파일 이름 규칙 ('{i}' 포함, 없으면 pyarrow 기본값)
+    """
+    if df.empty:
+        return 0
+    kwargs = {'basename_template': basename_template} if basename_template else {}
+    df.to_parquet(dataset_dir, engine='pyarrow', partition_cols=PARTITION_COLS, index=False, **kwargs)
+    return len(df)
+
+
+def _log_part_prefix(generation, offset):
+    """movement_log(generation번째 파일)의 offset부터 읽은 묶음을 담은 attempts 파일 이름 접두어"""
+    return f"log-{generation:04d}-{offset:016d}-"
+
+
+def _discard_uncommitted_parts(prefix):
+    """
+    저장된 오프셋에서 시작하는 묶음 파일 삭제 - 파일은 썼지만 오프셋을 저장하기 전에 중단된 압축의 잔여물
+    (오프셋은 파일을 쓴 뒤에만 앞으로 가므로 이 접두어의 파일은 아직 반영되지 않은 것)
+    """
+    for part in ATTEMPTS_DIR.glob(f"org_id=*/month=*/{prefix}*.parquet"):
+        part.unlink()
+
+
+def _merge_small_parts(dataset_dir):
+    """파일이 많이 쌓인 파티션을 하나의 파일로 합침 (질의 시 파일 열기 횟수 감소)"""
+    if not dataset_dir.exists():
+        return
+    for partition in dataset_dir.glob('org_id=*/month=*'):
+        parts = sorted(partition.glob('*.parquet'))
+        if len(parts) <= MAX_PARTS_PER_PARTITION:
+            continue
+        table = pa.concat_tables([pq.read_table(part) for part in parts])
+        merged_path = partition / f"merged-{time.time_ns()}.parquet"
+        pq.write_table(table, merged_path)
+        for part in parts:
+            part.unlink()
+
+
+def compact_movement_log():
+    """movement_log.jsonl에서 지난번 이후 추가된 줄만 읽어 attempts 데이터셋에 추가, 반환: 추가된 행 수"""
+    state = _load_state()
+    offset = state.get('movement_log_offset', 0)
+    generation = state.get('movement_log_generation', 0)
+    if not MOVEMENT_LOG_FILE.exists():
+        return 0
+    if MOVEMENT_LOG_FILE.stat().st_size < offset:
+        # 로그가 교체/초기화됨 - 새 세대로 처음부터 (이전 세대 파일 이름과 겹치지 않도록)
+        offset = 0
+        generation += 1
+        state.update(movement_log_offset=offset, movement_log_generation=generation)
+        _save_state(state)
+
+    appended = 0
+    with open(MOVEMENT_LOG_FILE, 'rb') as f:
+        f.seek(offset)
+        while True:
+            block = f.read(LOG_READ_BLOCK_BYTES)
+            if not block:
+                break
+            # 쓰는 중인 마지막 줄(개행 없음)은 다음 압축 때 처리
+            end = block.rfind(b'\n') + 1
+            if end == 0:
+                break
+            f.seek(offset + end)
+            df = pd.read_json(io.BytesIO(block[:end]), lines=True, dtype=False)
+            # 같은 오프셋의 이전 쓰기가 남아 있으면 지우고 다시 써서 두 번 집계되지 않도록
+            prefix = _log_part_prefix(generation, offset)
+            _discard_uncommitted_parts(prefix)
+            appended += _append_partitions(_normalize(df, ATTEMPT_COLUMNS, 'timestamp'), ATTEMPTS_DIR,
+                                           basename_template=prefix + "{i}.parquet")
+            offset += end
+            state['movement_log_offset'] = offset
+            _save_state(state)
+
+    _merge_small_parts(ATTEMPTS_DIR)
+    return appended
+
+
+def compact_progress_snapshot():
+    """progress.json 전체를 progress 데이터셋으로 교체 (레코드가 갱신되므로 증분이 아닌 스냅샷), 반환: 행 수"""
+    if not PROGRESS_FILE.exists():
+        return 0
+    with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    df = pd.DataFrame.from_records(list(records.values()))
+    del records
+    if df.empty:
+        return 0
+    df['action_key'] = _progress_action_key(df)
+    if 'updated_at' not in df:
+        df['updated_at'] = df.get('created_at')
+    else:
+        df['updated_at'] = df['updated_at'].fillna(df.get('created_at'))
+    df = _normalize(df, PROGRESS_COLUMNS, 'updated_at')
+
+    # 새 디렉토리에 쓰고 교체 (읽는 쪽은 이전 또는 새 스냅샷 중 하나를 봄)
+    tmp_dir = PROGRESS_DATASET_DIR.with_name(f"{PROGRESS_DATASET_DIR.name}.tmp-{os.getpid()}")
+    old_dir = PROGRESS_DATASET_DIR.with_name(f"{PROGRESS_DATASET_DIR.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    _append_partitions(df, tmp_dir)
+    if PROGRESS_DATASET_DIR.exists():
+        os.replace(PROGRESS_DATASET_DIR, old_dir)
+    os.replace(tmp_dir, PROGRESS_DATASET_DIR)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(df)
+
+
+def compact_all():
+    """movement_log 증분 + progress 스냅샷 압축, 반환: {'attempts': n, 'progress': n, 'seconds': s}"""
+    with _compact_lock:
+        ANALYTICS_DIR.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        attempts = compact_movement_log()
+        progress = compact_progress_snapshot()
+        return {'attempts': attempts, 'progress': progress, 'seconds': time.perf_counter() - start}
+
+
+# ==================== 질의 ====================
+
+def _read_dataset(dataset_dir, org_id, columns, months=None):
+    """단체(+월) 파티션만 읽어 DataFrame 반환 (없으면 빈 DataFrame)"""
+    if not dataset_dir.exists():
+        return pd.DataFrame(columns=columns)
+    filters = [('org_id', '=', org_id)]
+    if months:
+        filters.append(('month', 'in', list(months)))
+    try:
+        df = pd.read_parquet(dataset_dir, engine='pyarrow', columns=columns, filters=filters)
+    except (FileNotFoundError, ValueError):
+        # 스냅샷 교체 중이거나 해당 단체 파티션이 없음
+        return pd.DataFrame(columns=columns)
+    return df
+
+
+def read_attempts(org_id, months=None):
+    """단체의 연습 시도 기록 (movement_log 압축본)"""
+    columns = ['student_id', 'action_key', 'action_name', 'score', 'completed', 'mode', 'timestamp']
+    return _read_dataset(ATTEMPTS_DIR, org_id, columns, months)
+
+
+def read_progress(org_id):
+    """단체의 (학생, 동작)별 진행 기록 스냅샷"""
+    columns = ['student_id', 'instructor_id', 'action_key', 'action_name',
+               'attempts', 'best_score', 'last_score', 'completed', 'updated_at']
+    return _read_dataset(PROGRESS_DATASET_DIR, org_id, columns)
+
+
+def student_summary(org_id, months=None):
+    """학생별 시도 수, 평균/최고 점수, 완료 시도 수, 연습한 동작 수, 마지막 연습 시각"""
+    df = read_attempts(org_id, months)
+    if df.empty:
+        return pd.DataFrame(columns=['student_id', 'attempts', 'mean_score', 'best_score',
+                                     'completed_attempts', 'actions', 'last_practice'])
+    return (df.groupby('student_id', observed=True)
+              .agg(attempts=('score', 'size'),
+                   mean_score=('score', 'mean'),
+                   best_score=('score', 'max'),
+                   completed_attempts=('completed', 'sum'),
+                   actions=('action_key', 'nunique'),
+                   last_practice=('timestamp', 'max'))
+              .reset_index()
+              .sort_values('last_practice', ascending=False, ignore_index=True))
+
+
+def action_summary(org_id):
+    """동작별 연습 학생 수, 완료 학생 수/완료율, 평균 최고 점수, 총 시도 수 (progress 스냅샷 기준)"""
+    df = read_progress(org_id)
+    if df.empty:
+        return pd.DataFrame(columns=['action_key', 'action_name', 'students', 'completed',
+                                     'completion_rate', 'mean_best_score', 'attempts'])
+    grouped = df.groupby('action_key', observed=True)
+    summary = grouped.agg(action_name=('action_name', 'first'),
+                          students=('student_id', 'nunique'),
+                          mean_best_score=('best_score', 'mean'),
+                          attempts=('attempts', 'sum'))
+    # 예전 기록은 (학생, 동작)당 여러 행일 수 있으므로 완료 행 수가 아닌 완료 학생 수
+    summary['completed'] = (df[df['completed']].groupby('action_key', observed=True)['student_id']
+                            .nunique().reindex(summary.index, fill_value=0))
+    summary['completion_rate'] = summary['completed'] / summary['students'] * 100
+    columns = ['action_name', 'students', 'completed', 'completion_rate', 'mean_best_score', 'attempts']
+    return summary[columns].reset_index().sort_values('action_key', ignore_index=True)
+
+
+def weekly_trend(org_id, months=None):
+    """주별(월요일 시작) 시도 수, 활동 학생 수, 평균 점수, 완료 시도 수"""
+    df = read_attempts(org_id, months)
+    if df.empty:
+        return pd.DataFrame(columns=['week', 'attempts', 'active_students', 'mean_score', 'completed_attempts'])
+    week = df['timestamp'].dt.to_period('W-SUN').dt.start_time.rename('week')
+    return (df.groupby(week)
+              .agg(attempts=('score', 'size'),
+                   active_students=('student_id', 'nunique'),
+                   mean_score=('score', 'mean'),
+                   completed_attempts=('completed', 'sum'))
+              .reset_index())
+
+
+REPORTS = {
+    'student': student_summary,
+    'action': action_summary,
+    'week': weekly_trend,
+}
+
+
+def to_csv_bytes(df):
+    """CSV 내보내기용 바이트 (엑셀에서 한글이 깨지지 않도록 UTF-8 BOM 포함)"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="춤마루 진행 기록 분석")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('compact', help="movement_log/progress.json을 Parquet으로 압축")
+    report_parser = subparsers.add_parser('report', help="단체 리포트 출력")
+    report_parser.add_argument('--org', required=True, help="단체 ID")
+    report_parser.add_argument('--by', choices=list(REPORTS), default='week')
+    report_parser.add_argument('--csv', type=Path, help="CSV 저장 경로")
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        result = compact_all()
+        print(f"✅ 압축 완료: 시도 {result['attempts']:,}건 추가, 진행 기록 {result['progress']:,}건 "
+              f"({result['seconds']:.1f}s)")
+        return 0
+
+    report = REPORTS[args.by](args.org)
+    if args.csv:
+        args.csv.write_bytes(to_csv_bytes(report))
+        print(f"✅ {len(report):,}행을 저장했습니다: {args.csv}")
+    else:
+        print(report.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
 import os
+import json
+import glob
+import hashlib
+import threading
+import numpy as np
 # LLM
 from langchain_google_genai import ChatGoogleGenerativeAI
 # Chain (오류 해결을 위한 우회 경로 적용)
@@ -6,6 +11,7 @@ from langchain_community.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 
 # 임베딩 및 벡터스토어
+from langchain_core.embeddings import Embeddings
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 
@@ -19,6 +25,27 @@ KB_DIR = "KB-Dance-History"
 CHROMA_DB_PATH = "./chroma_db"
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# 색인된 파일별 내용 해시와 청크 ID 목록 (다음 실행 때 바뀐 파일만 다시 임베딩)
+MANIFEST_FILE_NAME = "index_manifest.json"
+# (모델 이름, 텍스트 해시) -> 임베딩 벡터 디스크 캐시 (색인/질문 모두 공유)
+EMBEDDING_CACHE_DIR = "./embedding_cache"
+
+def add_file_metadata(doc: Document) -> None:
+    """파일 이름(분류-주제-출처.txt)에서 메타데이터를 추출합니다."""
+    base_name = os.path.basename(doc.metadata['source'])
+    parts = os.path.splitext(base_name)[0].split('-')
+    if len(parts) >= 3:
+        doc.metadata['분류'] = parts[0]
+        doc.metadata['주제'] = parts[1]
+        doc.metadata['출처'] = parts[2]
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n", "\n", " ", ""]
+    )
 
 def load_and_split_documents(kb_dir: str) -> list[Document]:
     """문서 로드 및 청크 분할을 담당합니다."""
@@ -33,47 +60,235 @@ def load_and_split_documents(kb_dir: str) -> list[Document]:
     print(f"총 {len(documents)}개의 문서가 로드되었습니다.")
 
     for doc in documents:
-        base_name = os.path.basename(doc.metadata['source'])
-        parts = os.path.splitext(base_name)[0].split('-')
-        if len(parts) >= 3:
-            doc.metadata['분류'] = parts[0]
-            doc.metadata['주제'] = parts[1]
-            doc.metadata['출처'] = parts[2]
+        add_file_metadata(doc)
             
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    
-    split_docs = text_splitter.split_documents(documents)
+    split_docs = get_text_splitter().split_documents(documents)
     print(f"총 문서가 {len(split_docs)}개의 청크(Chunk)로 분할되었습니다.")
     return split_docs
 
+def load_and_split_file(file_path: str) -> list[Document]:
+    """파일 하나를 로드하고 청크로 분할합니다."""
+    documents = TextLoader(file_path, encoding="utf-8").load()
+    for doc in documents:
+        add_file_metadata(doc)
+    return get_text_splitter().split_documents(documents)
+
+
+# --- 임베딩 캐시 ---
+
+class CachedEmbeddings(Embeddings):
+    """
+    디스크 임베딩 캐시를 거치는 임베딩 (키: 모델 이름 + 텍스트 해시)
+    벡터는 모델별 디렉토리의 float16 memmap 파일(vectors.f16)에 행 단위로 추가하고,
+    키 -> 행 번호는 index.json에 저장합니다. 모델은 캐시에 없는 텍스트가 처음 나올 때만 로드합니다.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache_dir: str = EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.cache_dir = os.path.join(cache_dir, hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:12])
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.f16")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._vectors = None  # 읽기 전용 memmap (행이 추가되면 다시 엶)
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"model": self.model_name, "dim": None, "rows": {}}
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _get_model(self) -> HuggingFaceEmbeddings:
+        if self._model is None:
+            print(f"임베딩 모델을 로드합니다... ({self.model_name})")
+            self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._model
+
+    @staticmethod
+    def _key(kind: str, text: str) -> str:
+        # 문서/질문 임베딩이 다른 모델도 있으므로 종류를 키에 포함
+        return hashlib.sha1(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _read_rows(self, rows: list[int]) -> np.ndarray:
+        dim = self._index["dim"]
+        row_count = os.path.getsize(self.vectors_path) // (dim * 2)
+        if self._vectors is None or len(self._vectors) < row_count:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(row_count, dim))
+        return self._vectors[rows].astype(np.float32)
+
+    def _append_rows(self, keys: list[str], vectors: list[list[float]]) -> None:
+        """벡터를 파일 끝에 추가한 뒤 index 저장 (중간에 중단되면 index에 없는 행만 남음)"""
+        array = np.asarray(vectors, dtype=np.float16)
+        if self._index["dim"] is None:
+            self._index["dim"] = array.shape[1]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        row_bytes = self._index["dim"] * 2
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        first_row = size // row_bytes
+        if size != first_row * row_bytes:
+            # 이전 추가가 행 중간에서 중단됨 - 남은 조각을 잘라내야 새 행의 위치가 행 번호와 맞음
+            self._vectors = None  # 매핑된 파일은 잘라낼 수 없는 플랫폼 대비
+            os.truncate(self.vectors_path, first_row * row_bytes)
+        with open(self.vectors_path, "ab") as f:
+            f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        for offset, key in enumerate(keys):
+            self._index["rows"][key] = first_row + offset
+        self._save_index()
+
+    def _embed(self, kind: str, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        keys = [self._key(kind, text) for text in texts]
+        with self._lock:
+            rows = self._index["rows"]
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in rows:
+                    missing.setdefault(key, text)
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            if missing:
+                model = self._get_model()
+                missing_texts = list(missing.values())
+                if kind == "query":
+                    vectors = [model.embed_query(text) for text in missing_texts]
+                else:
+                    vectors = model.embed_documents(missing_texts)
+                self._append_rows(list(missing), vectors)
+            # 새로 계산한 벡터도 캐시에서 읽어 항상 같은(float16) 값을 반환
+            return self._read_rows([rows[key] for key in keys]).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed("document", texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed("query", [text])[0]
+
+
+# --- 증분 색인 ---
+
+def file_sha256(file_path: str) -> str:
+    """파일 내용 해시 (변경 감지용)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_ids_for(file_key: str, chunks: list[Document]) -> list[str]:
+    """
+    청크 내용 기반 결정적 ID (파일 + 청크 텍스트 해시 + 같은 텍스트의 등장 순번)
+    파일 일부만 수정되면 바뀌지 않은 청크는 ID가 그대로라 다시 임베딩하지 않습니다.
+    """
+    file_prefix = hashlib.sha1(file_key.encode("utf-8")).hexdigest()[:8]
+    seen = {}
+    ids = []
+    for chunk in chunks:
+        text_hash = hashlib.sha1(chunk.page_content.encode("utf-8")).hexdigest()[:16]
+        occurrence = seen.get(text_hash, 0)
+        seen[text_hash] = occurrence + 1
+        ids.append(f"{file_prefix}-{text_hash}-{occurrence}")
+    return ids
+
+def index_settings() -> dict:
+    """이 값이 바뀌면 기존 청크/벡터를 재사용할 수 없으므로 전체 재색인"""
+    return {"model": EMBEDDING_MODEL_NAME, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+def load_manifest(db_path: str) -> dict:
+    manifest_path = os.path.join(db_path, MANIFEST_FILE_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"settings": None, "files": {}}
+
+def save_manifest(db_path: str, manifest: dict) -> None:
+    """임시 파일에 쓰고 교체 (중간에 중단돼도 이전 manifest 유지)"""
+    os.makedirs(db_path, exist_ok=True)
+    manifest_path = os.path.join(db_path, MANIFEST_FILE_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def scan_kb_files(kb_dir: str) -> dict:
+    """KB 폴더의 .txt 파일 -> 내용 해시 (키는 kb_dir 기준 상대 경로)"""
+    return {
+        os.path.relpath(path, kb_dir): file_sha256(path)
+        for path in sorted(glob.glob(os.path.join(kb_dir, "*.txt")))
+    }
+
 
 def setup_vector_store(kb_dir: str, db_path: str):
-    """문서를 로드, 분할하고 임베딩하여 벡터 데이터베이스에 저장합니다."""
-    print("문서 로드 및 청크 분할을 시작합니다...")
-    chunks = load_and_split_documents(kb_dir)
-    print("문서 분할 완료.")
-    
-    # 2. 임베딩 모델 설정
-    print("임베딩 모델을 로드합니다...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2"
+    """
+    KB 폴더를 벡터 데이터베이스에 증분 색인합니다.
+    manifest와 비교해 새로 생기거나 바뀐 파일의 새 청크만 임베딩/추가하고,
+    삭제된 파일과 바뀐 파일의 사라진 청크는 DB에서 지웁니다. 변경이 없으면 기존 DB를 그대로 엽니다.
+    """
+    # 색인과 질문 검색(retriever)이 같은 캐시를 사용
+    embeddings = CachedEmbeddings(EMBEDDING_MODEL_NAME)
+    vectorstore = Chroma(
+        persist_directory=db_path,
+        embedding_function=embeddings
     )
 
-    # 3. ChromaDB에 저장 (임베딩 실행)
-    print("청크를 벡터로 변환하고 ChromaDB에 저장합니다...")
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=db_path  # 로컬에 DB 파일 생성
-    )
-    
-    # DB 파일이 저장되도록 강제로 디스크에 기록
+    manifest = load_manifest(db_path)
+    if manifest.get("settings") != index_settings():
+        # manifest가 없거나(이전 방식으로 만든 DB 포함) 모델/청크 설정이 바뀐 경우: 비우고 전체 재색인
+        existing_ids = vectorstore.get(include=[])["ids"]
+        if existing_ids:
+            print(f"색인 설정이 바뀌어 기존 청크 {len(existing_ids)}개를 지우고 전체를 다시 색인합니다...")
+            vectorstore.delete(ids=existing_ids)
+        manifest = {"settings": index_settings(), "files": {}}
+
+    current_files = scan_kb_files(kb_dir)
+    indexed_files = manifest["files"]
+    removed = [key for key in indexed_files if key not in current_files]
+    changed = [key for key, file_hash in current_files.items()
+               if indexed_files.get(key, {}).get("hash") != file_hash]
+
+    if not removed and not changed:
+        print(f"✅ 변경된 문서가 없어 기존 벡터 데이터베이스를 사용합니다. 저장 경로: {db_path}")
+        return vectorstore
+
+    print(f"문서 변경 감지: 추가/수정 {len(changed)}개, 삭제 {len(removed)}개")
+    delete_ids = []
+    for key in removed:
+        delete_ids.extend(indexed_files.pop(key)["chunk_ids"])
+
+    new_chunks, new_ids = [], []
+    for key in changed:
+        chunks = load_and_split_file(os.path.join(kb_dir, key))
+        ids = chunk_ids_for(key, chunks)
+        old_ids = set(indexed_files.get(key, {}).get("chunk_ids", []))
+        delete_ids.extend(old_ids - set(ids))
+        for chunk_id, chunk in zip(ids, chunks):
+            if chunk_id not in old_ids:
+                new_ids.append(chunk_id)
+                new_chunks.append(chunk)
+        indexed_files[key] = {"hash": current_files[key], "chunk_ids": ids}
+
+    if delete_ids:
+        print(f"사라진 청크 {len(delete_ids)}개를 삭제합니다...")
+        vectorstore.delete(ids=delete_ids)
+    if new_chunks:
+        print(f"새 청크 {len(new_chunks)}개를 벡터로 변환하고 ChromaDB에 저장합니다...")
+        vectorstore.add_documents(documents=new_chunks, ids=new_ids)
+
+    # DB 파일이 저장되도록 강제로 디스크에 기록한 뒤 manifest 갱신
     vectorstore.persist()
-    print(f"✅ 벡터 데이터베이스가 성공적으로 구축되었습니다. 저장 경로: {db_path}")
+    save_manifest(db_path, manifest)
+    print(f"✅ 벡터 데이터베이스가 갱신되었습니다. 저장 경로: {db_path}")
 
     return vectorstore
 
@@ -133,4 +348,7 @@ if __name__ == "__main__":
     print("\n**[참조된 원본 데이터]**")
     for doc in result['source_documents']:
         print(f"- 출처: {doc.metadata.get('출처', '정보 없음')} ({doc.metadata.get('주제', '정보 없음')})")
-    print("-" * 50)
\ No newline at end of file
+    print("-" * 50)
+
+    embeddings = vector_db.embeddings
+    print(f"임베딩 캐시: 적중 {embeddings.hits}건, 계산 {embeddings.misses}건")
\ No newline at end of file